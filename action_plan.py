@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入框选择的动作计划
+定位、选中输入框的按键序列先写成动作列表，每个任务开始前编译一次:
+- 被后面的动作完全覆盖的光标移动/选择被删除（如 Ctrl+A 之后的 Home、End）
+- Ctrl+End 紧接 Ctrl+Shift+Home 等同于全选，合并为一次 Ctrl+A
+- 按键按顺序进入前台窗口的输入队列，按键之间的等待被删除，只在最后保留一次等待（取最长的一次）
+编译后的计划和预计耗时可以通过API查看
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+# 动作类型
+ACTION_PRESS = 'press'
+ACTION_HOTKEY = 'hotkey'
+ACTION_WAIT = 'wait'
+
+# 按键对光标和选区的作用
+_EFFECT_FOCUS = 'focus'              # 切换焦点（Tab），不能删除
+_EFFECT_MOVE_LINE = 'move_line'      # 移到行首/行尾，结果与之前在同一行的位置无关
+_EFFECT_MOVE_DOC = 'move_doc'        # 移到全文开头/末尾，结果与之前的光标和选区无关
+_EFFECT_SELECT_ALL = 'select_all'    # 全选，结果与之前的光标和选区无关
+_EFFECT_EXTEND_START = 'extend_start'  # 从光标选到全文开头
+_EFFECT_OTHER = 'other'
+
+_EFFECTS = {
+    ('tab',): _EFFECT_FOCUS,
+    ('home',): _EFFECT_MOVE_LINE,
+    ('end',): _EFFECT_MOVE_LINE,
+    ('ctrl', 'home'): _EFFECT_MOVE_DOC,
+    ('ctrl', 'end'): _EFFECT_MOVE_DOC,
+    ('ctrl', 'a'): _EFFECT_SELECT_ALL,
+    ('ctrl', 'shift', 'home'): _EFFECT_EXTEND_START,
+}
+
+# 后一个动作会完全覆盖哪些前一个动作的效果
+_OVERWRITES = {
+    _EFFECT_SELECT_ALL: (_EFFECT_MOVE_LINE, _EFFECT_MOVE_DOC, _EFFECT_SELECT_ALL),
+    _EFFECT_MOVE_DOC: (_EFFECT_MOVE_LINE, _EFFECT_MOVE_DOC, _EFFECT_SELECT_ALL),
+    _EFFECT_MOVE_LINE: (_EFFECT_MOVE_LINE,),
+}
+
+# 估算耗时时每次按键本身的耗时（秒），不含pyautogui.PAUSE
+DEFAULT_KEY_SECONDS = 0.01
+
+
+class Action:
+    def __init__(self, kind: str, keys: Sequence[str] = (), timeout: float = 0.0, fallback: float = 0.0):
+        """
+        Args:
+            kind: press/hotkey/wait
+            keys: 按键（press为一个键，hotkey为组合键）
+            timeout: wait等待QQ成为前台窗口的最长时间（秒）
+            fallback: wait无法探测前台窗口时的固定延迟（秒）
+        """
+        self.kind = kind
+        self.keys = tuple(keys)
+        self.timeout = timeout
+        self.fallback = fallback
+
+    @property
+    def effect(self) -> Optional[str]:
+        if self.kind == ACTION_WAIT:
+            return None
+        return _EFFECTS.get(self.keys, _EFFECT_OTHER)
+
+    def describe(self) -> str:
+        if self.kind == ACTION_WAIT:
+            return f"等待 {self.timeout:g} 秒（无法探测时 {self.fallback:g} 秒）"
+        return '+'.join(self.keys)
+
+    def to_dict(self) -> Dict:
+        if self.kind == ACTION_WAIT:
+            return {'action': self.kind, 'timeout': self.timeout, 'fallback': self.fallback}
+        return {'action': self.kind, 'keys': list(self.keys)}
+
+
+def press(key: str) -> Action:
+    return Action(ACTION_PRESS, (key,))
+
+
+def hotkey(*keys: str) -> Action:
+    return Action(ACTION_HOTKEY, keys)
+
+
+def wait(timeout: float, fallback: float) -> Action:
+    return Action(ACTION_WAIT, timeout=timeout, fallback=fallback)
+
+
+class ActionPlan:
+    def __init__(self, actions: List[Action], source: Optional[List[Action]] = None,
+                 removed: Optional[List[str]] = None):
+        """
+        Args:
+            actions: 要执行的动作
+            source: 编译前的动作
+            removed: 编译时删除或合并的动作说明
+        """
+        self.actions = actions
+        self.source = source if source is not None else list(actions)
+        self.removed = removed or []
+
+    @property
+    def key_count(self) -> int:
+        return sum(1 for action in self.actions if action.kind != ACTION_WAIT)
+
+    def estimate(self, pause: float = 0.0, key_seconds: float = DEFAULT_KEY_SECONDS,
+                 actions: Optional[List[Action]] = None) -> float:
+        """
+        预计耗时（秒）: 每次按键的耗时加上pyautogui.PAUSE，等待按固定延迟计算
+        actions: 要估算的动作，默认为编译后的动作
+        """
+        total = 0.0
+        for action in self.actions if actions is None else actions:
+            if action.kind == ACTION_WAIT:
+                total += action.fallback
+            else:
+                total += key_seconds + pause
+        return total
+
+    def run(self, backend, waiter, probe=None):
+        """按顺序执行，等待动作等待probe（QQ在前台）满足"""
+        for action in self.actions:
+            if action.kind == ACTION_PRESS:
+                backend.press(action.keys[0])
+            elif action.kind == ACTION_HOTKEY:
+                backend.hotkey(*action.keys)
+            else:
+                waiter.wait_for(probe, timeout=action.timeout, fallback=action.fallback)
+
+    def to_dict(self, pause: float = 0.0, key_seconds: float = DEFAULT_KEY_SECONDS) -> Dict:
+        return {
+            'steps': [action.to_dict() for action in self.actions],
+            'estimated_seconds': round(self.estimate(pause, key_seconds), 3),
+            'source_steps': [action.to_dict() for action in self.source],
+            'source_estimated_seconds': round(self.estimate(pause, key_seconds, self.source), 3),
+            'removed': self.removed,
+        }
+
+
+def compile_plan(actions: List[Action], trailing_wait: bool = True) -> ActionPlan:
+    """
+    编译动作列表
+    trailing_wait: 是否在最后保留一次等待；计划之后紧接着输入时不需要（输入的按键同样按顺序排队）
+    """
+    keys: List[Action] = []
+    removed: List[str] = []
+    longest_wait = None
+
+    for action in actions:
+        if action.kind == ACTION_WAIT:
+            if longest_wait is None:
+                longest_wait = wait(action.timeout, action.fallback)
+            else:
+                longest_wait = wait(max(longest_wait.timeout, action.timeout),
+                                    max(longest_wait.fallback, action.fallback))
+            continue
+
+        effect = action.effect
+        if effect == _EFFECT_EXTEND_START and keys and keys[-1].keys == ('ctrl', 'end'):
+            # 先移到末尾再选到开头，就是全选
+            removed.append(f"{keys.pop().describe()} + {action.describe()} 合并为 ctrl+a")
+            action, effect = hotkey('ctrl', 'a'), _EFFECT_SELECT_ALL
+        overwritten = _OVERWRITES.get(effect, ())
+        while keys and keys[-1].effect in overwritten:
+            removed.append(f"{keys.pop().describe()} 被 {action.describe()} 覆盖")
+        keys.append(action)
+
+    waits = sum(1 for action in actions if action.kind == ACTION_WAIT)
+    if waits:
+        kept = 1 if trailing_wait else 0
+        if waits > kept:
+            removed.append(f"{waits - kept} 次按键间的等待（按键按顺序排队，只需在最后等待一次）")
+    if trailing_wait and longest_wait is not None:
+        keys.append(longest_wait)
+    return ActionPlan(keys, list(actions), removed)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于锚点图片定位QQ输入框
+没有UI Automation时使用: 在QQ窗口区域内查找锚点图片（如输入框上方的工具栏图标），
+锚点位置加上偏移就是输入框的点击位置。匹配只在窗口区域内、以灰度和缩小后的图像进行，
+结果按窗口记为相对窗口左上角的坐标，之后直接点击；只有窗口大小变化时才重新匹配。
+没有OpenCV时只能精确匹配，缩小后的图像像素有差异，精确匹配时不缩小
+"""
+
+import importlib.util
+from typing import Dict, Optional, Tuple
+
+from input_backend import InputBackend, get_backend
+
+# 匹配前图像的缩放比例，越小越快（只用于按相似度匹配）
+DEFAULT_SCALE = 0.5
+# 匹配的相似度（需要OpenCV，未安装时使用精确匹配）
+DEFAULT_CONFIDENCE = 0.8
+# 输入框点击位置相对锚点中心的默认偏移（像素）: 锚点为输入框上方的工具栏时向下偏移
+DEFAULT_OFFSET = (0, 40)
+
+
+def confidence_supported() -> bool:
+    """是否可以按相似度匹配（pyautogui需要OpenCV）"""
+    return importlib.util.find_spec('cv2') is not None
+
+
+def parse_offset(value: str) -> Tuple[int, int]:
+    """解析 "dx,dy" 格式的偏移"""
+    try:
+        dx, dy = value.split(',')
+        return int(dx), int(dy)
+    except ValueError:
+        raise ValueError(f"偏移格式应为 dx,dy: {value}")
+
+
+class AnchorLocator:
+    def __init__(self, anchor_path: str, offset: Tuple[int, int] = DEFAULT_OFFSET,
+                 backend: Optional[InputBackend] = None, scale: float = DEFAULT_SCALE,
+                 confidence: Optional[float] = DEFAULT_CONFIDENCE):
+        """
+        Args:
+            anchor_path: 锚点图片（从QQ窗口中截取的一小块）
+            offset: 输入框点击位置相对锚点中心的偏移（原始像素）
+            backend: 输入后端，用于截图、匹配和点击
+            scale: 匹配前图像的缩放比例（精确匹配时不缩小）
+            confidence: 匹配的相似度，None表示精确匹配（未安装OpenCV时同样精确匹配）
+        """
+        self.anchor_path = anchor_path
+        self.offset = offset
+        self.backend = backend or get_backend()
+        if confidence is not None and not confidence_supported():
+            print("未安装OpenCV，锚点图片按原始大小精确匹配")
+            confidence = None
+        # 缩小时插值改变了像素值，精确匹配只能在原始大小的图像上进行
+        self.scale = scale if confidence is not None else 1
+        self.confidence = confidence
+        # 缩小后的灰度锚点图片，第一次匹配时读取
+        self._anchor = None
+        # 窗口句柄 -> (窗口宽高, 相对窗口左上角的点击位置)
+        self.positions: Dict[int, Tuple[Tuple[int, int], Tuple[int, int]]] = {}
+        # 匹配的次数，用于观察缓存命中情况
+        self.match_count = 0
+
+    def _prepare(self, image):
+        """转为灰度并缩小"""
+        image = image.convert('L')
+        if self.scale != 1:
+            size = (max(1, int(image.width * self.scale)), max(1, int(image.height * self.scale)))
+            image = image.resize(size)
+        return image
+
+    def anchor(self):
+        if self._anchor is None:
+            from PIL import Image
+            with Image.open(self.anchor_path) as image:
+                self._anchor = self._prepare(image)
+        return self._anchor
+
+    def position(self, window) -> Optional[Tuple[int, int]]:
+        """
+        输入框在屏幕上的点击位置
+        窗口大小未变化时直接使用缓存的相对位置（窗口移动不影响），否则在窗口区域内重新匹配
+        返回: (x, y)，找不到锚点时返回None
+        """
+        if window is None or window.width <= 0 or window.height <= 0:
+            return None
+        hwnd = getattr(window, '_hWnd', None)
+        size = (window.width, window.height)
+
+        cached = self.positions.get(hwnd)
+        if cached is None or cached[0] != size:
+            relative = self.match(window)
+            if relative is None:
+                self.invalidate(hwnd)
+                return None
+            cached = (size, relative)
+            self.positions[hwnd] = cached
+
+        dx, dy = cached[1]
+        return window.left + dx, window.top + dy
+
+    def match(self, window) -> Optional[Tuple[int, int]]:
+        """在窗口区域内匹配锚点，返回点击位置相对窗口左上角的坐标"""
+        self.match_count += 1
+        region = (window.left, window.top, window.width, window.height)
+        screenshot = self.backend.screenshot(region)
+        if screenshot is None:
+            return None
+        try:
+            box = self.backend.locate(self.anchor(), self._prepare(screenshot), self.confidence)
+        except Exception as e:
+            print(f"匹配锚点图片失败: {e}")
+            return None
+        if box is None:
+            return None
+
+        left, top, width, height = box
+        # 换算回原始像素
+        center_x = (left + width / 2) / self.scale
+        center_y = (top + height / 2) / self.scale
+        return int(center_x + self.offset[0]), int(center_y + self.offset[1])
+
+    def click(self, window) -> bool:
+        """点击输入框，返回是否找到了输入框"""
+        position = self.position(window)
+        if position is None:
+            return False
+        self.backend.click(*position)
+        return True
+
+    def invalidate(self, hwnd: Optional[int] = None):
+        """清空某个窗口（默认所有窗口）的缓存"""
+        if hwnd is None:
+            self.positions.clear()
+        else:
+            self.positions.pop(hwnd, None)
@@ -0,0 +1,320 @@
+// 全局变量
+let isSending = false;
+let logUpdateInterval;
+let lastSeq = 0;  // 已显示的最后一条服务器日志序号
+let interruptedJobs = [];  // 上次退出时中断、可以继续的任务
+let pendingSubmitKey = null;  // 未收到响应的提交的幂等键，重试时沿用，避免重复入队
+
+// DOM元素
+const sendBtn = document.getElementById('sendBtn');
+const stopBtn = document.getElementById('stopBtn');
+const clearBtn = document.getElementById('clearBtn');
+const resumeBtn = document.getElementById('resumeBtn');
+const statusIndicator = document.getElementById('statusIndicator');
+const statusText = document.getElementById('statusText');
+const logContainer = document.getElementById('logContainer');
+const progressFill = document.getElementById('progressFill');
+
+// 消息类型切换
+document.querySelectorAll('input[name="messageType"]').forEach(radio => {
+    radio.addEventListener('change', function() {
+        const singleGroup = document.getElementById('singleMessageGroup');
+        const multipleGroup = document.getElementById('multipleMessageGroup');
+        const templateGroup = document.getElementById('templateMessageGroup');
+
+        singleGroup.classList.toggle('hidden', this.value !== 'single');
+        multipleGroup.classList.toggle('hidden', this.value !== 'multiple');
+        templateGroup.classList.toggle('hidden', this.value !== 'template');
+    });
+});
+
+// 发送消息
+sendBtn.addEventListener('click', async function() {
+    const messageType = document.querySelector('input[name="messageType"]:checked').value;
+    const contact = document.getElementById('contact').value;
+    const delay = parseInt(document.getElementById('delay').value);
+    const interval = parseFloat(document.getElementById('interval').value);
+    const burst = parseInt(document.getElementById('burst').value);
+    const autoSelect = document.querySelector('input[name="selectMode"]:checked').value === 'auto';
+    const inputMode = document.querySelector('input[name="inputMode"]:checked').value;
+    const runAt = document.getElementById('runAt').value;
+
+    let messages = [];
+    if (messageType === 'single') {
+        const message = document.getElementById('singleMessage').value.trim();
+        if (!message) {
+            alert('请输入要发送的消息');
+            return;
+        }
+        messages = [message];
+    } else if (messageType === 'template') {
+        if (!document.getElementById('templateText').value.trim() ||
+            !document.getElementById('recipients').value.trim()) {
+            alert('请输入消息模板和收件人表');
+            return;
+        }
+    } else {
+        const text = document.getElementById('multipleMessage').value.trim();
+        if (!text) {
+            alert('请输入要发送的消息');
+            return;
+        }
+        messages = text.split('\n').filter(line => line.trim());
+    }
+
+    const data = {
+        message_type: messageType,
+        // 模板群发的联系人在收件人表的contact列中
+        contact: messageType === 'template' ? '' : contact,
+        delay: delay,
+        interval: interval,
+        burst: burst,
+        auto_select: autoSelect,
+        input_mode: inputMode,
+        single_message: document.getElementById('singleMessage').value,
+        multiple_messages: document.getElementById('multipleMessage').value,
+        template: document.getElementById('templateText').value,
+        recipients: document.getElementById('recipients').value
+    };
+    if (runAt) {
+        data.run_at = runAt;
+    }
+
+    if (!pendingSubmitKey) {
+        pendingSubmitKey = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    }
+
+    try {
+        const response = await fetch(runAt ? '/api/schedule' : '/api/send', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Idempotency-Key': pendingSubmitKey
+            },
+            body: JSON.stringify(data)
+        });
+
+        const result = await response.json();
+        pendingSubmitKey = null;
+
+        if (result.success) {
+            if (!isSending && !runAt) {
+                setSendingState(true);
+                startLogUpdates();
+            }
+            addLog(result.message);
+        } else {
+            alert(result.message);
+        }
+    } catch (error) {
+        alert('发送失败: ' + error.message);
+    }
+});
+
+// 停止发送
+stopBtn.addEventListener('click', async function() {
+    try {
+        const response = await fetch('/api/stop', {
+            method: 'POST'
+        });
+
+        const result = await response.json();
+        if (result.success) {
+            // 排队中的任务会继续执行，由状态轮询决定何时结束
+            addLog(result.message);
+        }
+    } catch (error) {
+        alert('停止失败: ' + error.message);
+    }
+});
+
+// 继续中断的任务
+resumeBtn.addEventListener('click', async function() {
+    for (const jobId of interruptedJobs) {
+        try {
+            const response = await fetch(`/api/jobs/${jobId}/resume`, {
+                method: 'POST'
+            });
+            const result = await response.json();
+            addLog(result.message);
+        } catch (error) {
+            alert('继续任务失败: ' + error.message);
+            return;
+        }
+    }
+});
+
+// 清空内容
+clearBtn.addEventListener('click', function() {
+    document.getElementById('contact').value = '';
+    document.getElementById('singleMessage').value = '';
+    document.getElementById('multipleMessage').value = '';
+    document.getElementById('templateText').value = '';
+    document.getElementById('recipients').value = '';
+    document.getElementById('delay').value = '3';
+    document.getElementById('interval').value = '2';
+    document.getElementById('burst').value = '1';
+    document.getElementById('runAt').value = '';
+    addLog('内容已清空', 'system');
+});
+
+// 设置发送状态
+function setSendingState(sending) {
+    isSending = sending;
+    // 发送中仍可提交新任务，新任务排队执行
+    stopBtn.disabled = !sending;
+
+    if (sending) {
+        statusIndicator.className = 'status-indicator status-sending';
+        statusText.textContent = '正在发送消息...';
+    } else {
+        statusIndicator.className = 'status-indicator status-idle';
+        statusText.textContent = '系统就绪';
+    }
+}
+
+// 添加日志
+function addLog(message, type = 'info') {
+    appendLogEntry(new Date().toLocaleTimeString(), message);
+}
+
+// 追加一条日志
+function appendLogEntry(timestamp, message) {
+    const logEntry = document.createElement('div');
+    logEntry.className = 'log-entry';
+    const timestampSpan = document.createElement('span');
+    timestampSpan.className = 'log-timestamp';
+    timestampSpan.textContent = `[${timestamp}]`;
+    logEntry.appendChild(timestampSpan);
+    logEntry.appendChild(document.createTextNode(' ' + message));
+    logContainer.appendChild(logEntry);
+    logContainer.scrollTop = logContainer.scrollHeight;
+}
+
+// 根据服务器状态更新界面
+function applyStatus(data) {
+    interruptedJobs = data.interrupted_jobs || [];
+    resumeBtn.textContent = `↩️ 继续中断的任务 (${interruptedJobs.length})`;
+    resumeBtn.classList.toggle('hidden', interruptedJobs.length === 0);
+
+    const active = data.sending || data.queued > 0 || data.running > 0;
+    if (active && !isSending) {
+        setSendingState(true);
+    } else if (!active && isSending) {
+        setSendingState(false);
+        stopLogUpdates();
+    }
+}
+
+// 显示缺失日志的提示
+function showDropped(dropped) {
+    if (dropped > 0) {
+        addLog(`有 ${dropped} 条日志已被覆盖，未能显示`);
+    }
+}
+
+// 追加服务器日志（按序号去重）
+function appendServerLog(log) {
+    if (log.seq <= lastSeq) {
+        return;
+    }
+    lastSeq = log.seq;
+    appendLogEntry(log.timestamp, log.message);
+}
+
+// 订阅服务器推送的事件（SSE），浏览器不支持时退回轮询
+let eventSource = null;
+// 服务器的启动标识，变化说明服务器已重启
+let bootId = null;
+function connectEvents() {
+    if (!window.EventSource) {
+        return false;
+    }
+    // 首次连接补发历史日志，断线重连时浏览器通过Last-Event-ID继续
+    eventSource = new EventSource(`/api/events?since=${lastSeq}`);
+    eventSource.addEventListener('sync', function(event) {
+        const data = JSON.parse(event.data);
+        // 服务器已重启，序号重新开始（之后补发的日志从新的序号开始）
+        if ((bootId !== null && data.boot_id !== bootId) || data.last_seq < lastSeq) {
+            lastSeq = 0;
+        }
+        bootId = data.boot_id;
+    });
+    eventSource.addEventListener('log', function(event) {
+        appendServerLog(JSON.parse(event.data));
+    });
+    eventSource.addEventListener('dropped', function(event) {
+        showDropped(JSON.parse(event.data).dropped);
+    });
+    eventSource.addEventListener('status', function(event) {
+        applyStatus(JSON.parse(event.data));
+    });
+    return true;
+}
+
+// 开始日志更新（仅在不支持SSE时轮询）
+function startLogUpdates() {
+    if (eventSource || logUpdateInterval) {
+        return;
+    }
+    logUpdateInterval = setInterval(updateLogs, 1000);
+}
+
+// 停止日志更新
+function stopLogUpdates() {
+    if (logUpdateInterval) {
+        clearInterval(logUpdateInterval);
+        logUpdateInterval = null;
+    }
+}
+
+// 获取上次之后的新日志
+async function fetchNewLogs() {
+    try {
+        const response = await fetch(`/api/logs?since=${lastSeq}`);
+        const data = await response.json();
+
+        // 服务器已重启，序号重新开始
+        if (data.last_seq < lastSeq) {
+            lastSeq = 0;
+        }
+        showDropped(data.dropped);
+
+        // 添加日志条目
+        data.logs.forEach(appendServerLog);
+    } catch (error) {
+        console.error('获取日志失败:', error);
+    }
+}
+
+// 更新日志（轮询模式）
+async function updateLogs() {
+    try {
+        await fetchNewLogs();
+
+        // 检查发送状态
+        const statusResponse = await fetch('/api/status');
+        applyStatus(await statusResponse.json());
+
+    } catch (error) {
+        console.error('更新日志失败:', error);
+    }
+}
+
+// 页面加载时检查状态
+window.addEventListener('load', async function() {
+    if (connectEvents()) {
+        return;
+    }
+    try {
+        const response = await fetch('/api/status');
+        const data = await response.json();
+
+        if (data.sending || data.queued || data.running) {
+            setSendingState(true);
+            startLogUpdates();
+        }
+    } catch (error) {
+        console.error('检查状态失败:', error);
+    }
+});
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量发送分组
+将(联系人, 消息)列表按联系人分组，减少切换聊天窗口的次数；
+也可以把整个列表作为一个任务发送，联系人变化时才切换聊天窗口
+"""
+
+from collections.abc import Sequence
+from typing import Iterable, List, Optional, Tuple
+
+# (联系人, 消息)，联系人为None表示当前聊天窗口
+BatchItem = Tuple[Optional[str], str]
+
+
+def group_by_contact(items: Iterable[BatchItem]) -> List[Tuple[Optional[str], List[str]]]:
+    """
+    按联系人分组
+    联系人按首次出现的顺序排列，同一联系人的消息保持原来的先后顺序
+
+    返回: [(联系人, [消息, ...]), ...]
+    """
+    groups = {}
+    for contact, message in items:
+        groups.setdefault(contact, []).append(message)
+    return list(groups.items())
+
+
+def count_switches(items: Iterable[BatchItem]) -> int:
+    """按原顺序逐条发送时需要切换联系人的次数"""
+    switches = 0
+    previous = object()
+    for contact, _ in items:
+        if contact != previous:
+            switches += 1
+            previous = contact
+    return switches
+
+
+class ContactMessages(Sequence):
+    """每条消息带有自己联系人的消息列表，可像普通消息列表一样取长度和遍历"""
+
+    def __init__(self, messages: List[str], contacts: List[Optional[str]]):
+        if len(messages) != len(contacts):
+            raise ValueError("消息和联系人的条数不一致")
+        self.messages = messages
+        self.contacts = contacts
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def contact_at(self, index: int) -> Optional[str]:
+        """第index条消息（从0开始）要发到的联系人，None为当前聊天窗口"""
+        return self.contacts[index]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送引擎性能测试
+使用模拟输入后端驱动 QQMessageSender.send_messages，在不同的消息数量、消息长度、
+消息间隔和输入框选择模式下统计吞吐量和各阶段耗时（p50/p95/p99），结果输出为JSON
+
+使用方法:
+    python benchmarks/bench_send_engine.py
+    python benchmarks/bench_send_engine.py --counts 10,100 --lengths 10,500 --output results.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_backend import FakeBackend, DEFAULT_LATENCIES  # noqa: E402
+from input_engine import INPUT_MODES, INPUT_MODE_AUTO  # noqa: E402
+from qq_message_sender_web import QQMessageSender  # noqa: E402
+
+
+def percentile(values, p):
+    """计算百分位数（线性插值）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(values):
+    """汇总一组耗时（秒）"""
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+
+
+def make_messages(count, length):
+    """生成指定长度的英文测试消息（自动输入方式下短消息逐字输入，长消息粘贴）"""
+    base = "benchmark message "
+    messages = []
+    for i in range(count):
+        text = f"{i:05d} " + base * (length // len(base) + 1)
+        messages.append(text[:length])
+    return messages
+
+
+def run_case(count, length, interval, auto_select, input_mode, latencies, simulate_pause):
+    """运行一组参数，返回结果"""
+    backend = FakeBackend(latencies=latencies, simulate_pause=simulate_pause)
+    sender = QQMessageSender(backend)
+    messages = make_messages(count, length)
+
+    phases = {}
+    lock = threading.Lock()
+
+    def on_phase(name, seconds):
+        with lock:
+            phases.setdefault(name, []).append(seconds)
+
+    start = time.perf_counter()
+    if not sender.send_messages(messages, None, delay=0, interval=interval, auto_select=auto_select,
+                                input_mode=input_mode, on_phase=on_phase):
+        raise RuntimeError("发送器正在运行中")
+    # send_messages在后台线程中发送，发送结束后sending复位
+    while sender.sending:
+        time.sleep(0.001)
+    total = time.perf_counter() - start
+
+    delivered = backend.sent_messages()
+    return {
+        'params': {
+            'count': count,
+            'length': length,
+            'interval': interval,
+            'auto_select': auto_select,
+            'input_mode': input_mode,
+        },
+        'delivered': len(delivered),
+        'correct': delivered == messages,
+        'total_seconds': total,
+        'messages_per_second': count / total if total > 0 else None,
+        'backend_calls': len(backend.calls),
+        'phases': {name: summarize(values) for name, values in sorted(phases.items())},
+    }
+
+
+def parse_list(text, cast):
+    return [cast(item) for item in text.split(',') if item.strip()]
+
+
+def parse_bool_list(text):
+    values = []
+    for item in text.split(','):
+        item = item.strip().lower()
+        if item in ('1', 'true', 'on', 'auto'):
+            values.append(True)
+        elif item in ('0', 'false', 'off', 'manual'):
+            values.append(False)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QQ消息发送引擎性能测试（模拟输入后端）")
+    parser.add_argument('--counts', default='10,50', help="消息数量列表，逗号分隔")
+    parser.add_argument('--lengths', default='10,200', help="消息长度列表，逗号分隔")
+    parser.add_argument('--intervals', default='0', help="消息间隔列表（秒），逗号分隔")
+    parser.add_argument('--auto-select', default='on,off', help="输入框选择模式列表: on/off")
+    parser.add_argument('--input-modes', default=INPUT_MODE_AUTO,
+                        help=f"输入方式列表: {'/'.join(INPUT_MODES)}")
+    parser.add_argument('--key-latency', type=float, default=0.002, help="模拟每次按键耗时（秒）")
+    parser.add_argument('--char-latency', type=float, default=0.002, help="模拟逐字输入每个字符耗时（秒）")
+    parser.add_argument('--paste-latency', type=float, default=0.005, help="模拟一次粘贴耗时（秒）")
+    parser.add_argument('--screenshot-latency', type=float, default=0.001, help="模拟一次截图耗时（秒）")
+    parser.add_argument('--pause', action='store_true', help="模拟pyautogui.PAUSE（每次操作后停顿0.5秒）")
+    parser.add_argument('--output', help="结果JSON文件路径（默认输出到标准输出）")
+    args = parser.parse_args()
+
+    latencies = dict(DEFAULT_LATENCIES, key=args.key_latency, char=args.char_latency,
+                     paste=args.paste_latency, screenshot=args.screenshot_latency)
+    cases = itertools.product(parse_list(args.counts, int), parse_list(args.lengths, int),
+                              parse_list(args.intervals, float), parse_bool_list(args.auto_select),
+                              parse_list(args.input_modes, str))
+
+    results = []
+    for count, length, interval, auto_select, input_mode in cases:
+        result = run_case(count, length, interval, auto_select, input_mode, latencies, args.pause)
+        results.append(result)
+        print(f"count={count} length={length} interval={interval} auto_select={auto_select} "
+              f"input_mode={input_mode}: {result['messages_per_second']:.1f} 条/秒, "
+              f"单条p50 {result['phases']['message']['p50'] * 1000:.1f}ms", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'latencies': latencies,
+            'simulate_pause': args.pause,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"结果已保存到: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动时间性能测试
+在新的Python进程中测量三个入口的冷启动耗时:
+- 导入耗时: qq_message_sender_web.py、qq_message_sender.py、quick_send.py 各自的import时间，
+  以及导入后是否已经加载了pyautogui等GUI自动化模块（这些模块应在第一次发送时才导入）
+- Web首次响应: 从启动 qq_message_sender_web.py 到 GET / 第一次返回200的时间
+结果输出为JSON
+
+使用方法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 测量导入耗时的入口模块
+ENTRY_MODULES = ('qq_message_sender_web', 'qq_message_sender', 'quick_send')
+
+# 启动时不应加载的GUI自动化模块（及其依赖）
+HEAVY_MODULES = ('pyautogui', 'pyscreeze', 'pymsgbox', 'pytweening', 'mouseinfo',
+                 'PIL', 'pyperclip', 'pywinauto', 'win32gui')
+
+# 在子进程中执行: 导入模块，输出耗时和已加载的重量级模块
+_IMPORT_PROBE = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'seconds': seconds, 'heavy_modules': heavy}}))
+'''
+
+
+def summarize(values):
+    """汇总一组耗时（秒）"""
+    return {
+        'count': len(values),
+        'min': min(values),
+        'p50': statistics.median(values),
+        'mean': statistics.mean(values),
+        'max': max(values),
+    }
+
+
+def measure_import(module, workdir):
+    """在新进程中导入模块，返回(导入耗时, 进程总耗时, 已加载的重量级模块)"""
+    code = _IMPORT_PROBE.format(root=ROOT, module=module, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], cwd=workdir, check=True,
+                            capture_output=True, text=True).stdout
+    total = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['seconds'], total, result['heavy_modules']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def measure_first_response(workdir, server, timeout=30):
+    """启动Web服务，返回从启动进程到 GET / 返回200的耗时（秒）"""
+    port = free_port()
+    url = f'http://127.0.0.1:{port}/'
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'qq_message_sender_web.py'),
+                                '--server', server, '--host', '127.0.0.1', '--port', str(port)],
+                               cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Web服务启动失败，退出码 {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.005)
+        raise RuntimeError(f"Web服务 {timeout} 秒内没有响应")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QQ消息发送器启动时间性能测试")
+    parser.add_argument('--runs', type=int, default=5, help="每项测量的次数")
+    parser.add_argument('--server', default='threaded', help="测量Web首次响应时使用的运行方式")
+    parser.add_argument('--output', help="结果JSON文件路径（默认输出到标准输出）")
+    args = parser.parse_args()
+
+    results = {}
+    # 在临时目录中运行，任务数据库等文件不写入项目目录
+    with tempfile.TemporaryDirectory() as workdir:
+        for module in ENTRY_MODULES:
+            imports, totals, heavy = [], [], set()
+            for _ in range(args.runs):
+                seconds, total, loaded = measure_import(module, workdir)
+                imports.append(seconds)
+                totals.append(total)
+                heavy.update(loaded)
+            results[module] = {
+                'import': summarize(imports),
+                'process': summarize(totals),
+                'heavy_modules': sorted(heavy),
+            }
+            print(f"{module}: 导入p50 {results[module]['import']['p50'] * 1000:.1f}ms, "
+                  f"重量级模块: {', '.join(sorted(heavy)) or '无'}", file=sys.stderr)
+
+        responses = [measure_first_response(workdir, args.server) for _ in range(args.runs)]
+        results['first_http_200'] = summarize(responses)
+        print(f"Web首次响应p50 {results['first_http_200']['p50'] * 1000:.1f}ms", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+            'server': args.server,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"结果已保存到: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
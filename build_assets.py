@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web页面资源构建脚本
+把 assets/ 下的页面源文件（index.html、app.css、app.js）构建到 static/:
+- CSS/JS文件名加上内容哈希（如 app.1a2b3c4d5e.css），可以长期缓存，内容变化后URL随之变化
+- index.html中的引用替换为带哈希的文件名
+- 每个文件预先压缩出 .gz 和 .br（需要安装brotli，未安装时跳过）
+- 生成 manifest.json，Web服务按它查找文件、ETag和可用的压缩格式
+
+修改 assets/ 下的文件后运行: python build_assets.py
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+from static_assets import MANIFEST_FILE, ENCODINGS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(ROOT, 'assets')
+OUTPUT_DIR = os.path.join(ROOT, 'static')
+
+# 页面入口（不加哈希，每次请求都用ETag验证）
+PAGE = 'index.html'
+# 页面引用的资源（加哈希，长期缓存）
+BUNDLES = ('app.css', 'app.js')
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+}
+
+# 之前构建生成的带哈希文件（及其压缩文件）
+_FINGERPRINTED = re.compile(r'^[\w-]+\.[0-9a-f]{10}\.\w+(\.gz|\.br)?$')
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def fingerprinted_name(name: str, digest: str) -> str:
+    """app.css -> app.1a2b3c4d5e.css"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'gzip':
+        # mtime固定为0，相同内容每次构建得到相同的文件
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"不支持的压缩格式: {encoding}")
+
+
+def write_asset(name: str, filename: str, data: bytes) -> dict:
+    """写入文件及其压缩版本，返回清单条目"""
+    digest = content_hash(data)
+    with open(os.path.join(OUTPUT_DIR, filename), 'wb') as f:
+        f.write(data)
+
+    encodings = []
+    for encoding, suffix in ENCODINGS:
+        if encoding == 'br' and brotli is None:
+            continue
+        compressed = compress(data, encoding)
+        # 压缩后没有变小就不提供该格式
+        if len(compressed) >= len(data):
+            continue
+        with open(os.path.join(OUTPUT_DIR, filename + suffix), 'wb') as f:
+            f.write(compressed)
+        encodings.append(encoding)
+
+    print(f"✅ {name} -> static/{filename} ({len(data)} 字节，预压缩: {', '.join(encodings) or '无'})")
+    return {
+        'file': filename,
+        'etag': digest,
+        'content_type': CONTENT_TYPES[os.path.splitext(name)[1]],
+        'encodings': encodings,
+    }
+
+
+def remove_stale(keep):
+    """删除之前构建的、已不再使用的带哈希文件"""
+    for filename in os.listdir(OUTPUT_DIR):
+        if _FINGERPRINTED.match(filename) and filename not in keep:
+            os.remove(os.path.join(OUTPUT_DIR, filename))
+            print(f"🧹 已删除旧文件: static/{filename}")
+
+
+def build() -> dict:
+    """
+    构建页面资源
+    返回: 清单 {源文件名: {file, etag, content_type, encodings}}
+    """
+    if brotli is None:
+        print("⚠️ 未安装brotli，只生成gzip压缩文件（pip install brotli）")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    manifest = {}
+    with open(os.path.join(SOURCE_DIR, PAGE), 'r', encoding='utf-8') as f:
+        page = f.read()
+
+    for name in BUNDLES:
+        with open(os.path.join(SOURCE_DIR, name), 'rb') as f:
+            data = f.read()
+        filename = fingerprinted_name(name, content_hash(data))
+        manifest[name] = write_asset(name, filename, data)
+        # 替换页面中的引用: href="app.css" -> href="/static/app.1a2b3c4d5e.css"
+        pattern = re.compile(r'''((?:href|src)=["'])%s(["'])''' % re.escape(name))
+        page, count = pattern.subn(lambda m: f"{m.group(1)}/static/{filename}{m.group(2)}", page)
+        if count == 0:
+            raise ValueError(f"{PAGE} 没有引用 {name}")
+
+    manifest[PAGE] = write_asset(PAGE, PAGE, page.encode('utf-8'))
+
+    keep = {entry['file'] + suffix for entry in manifest.values() for suffix in ('', '.gz', '.br')}
+    remove_stale(keep)
+
+    with open(os.path.join(OUTPUT_DIR, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"✅ 资源清单已生成: static/{MANIFEST_FILE}")
+    return manifest
+
+
+def main():
+    try:
+        build()
+    except (OSError, ValueError) as e:
+        print(f"❌ 构建页面资源失败: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
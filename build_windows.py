@@ -41,8 +41,7 @@ def clean_build():
         'build',
         'dist',
         '*.spec',
-        '__pycache__',
-        'templates/__pycache__'
+        '__pycache__'
     ]
     
     for item in cleanup_items:
@@ -64,10 +63,9 @@ def build_exe():
         "--windowed",                   # 无控制台窗口
         "--name=QQ消息发送器",          # 可执行文件名称
         "--icon=icon.ico",              # 图标文件（如果存在）
-        "--add-data=templates;templates",  # 包含模板文件
+        "--add-data=static;static",     # 包含构建好的页面资源
         "--hidden-import=flask",
         "--hidden-import=werkzeug",
-        "--hidden-import=jinja2",
         "qq_message_sender_web.py"      # 主脚本
     ]
     
@@ -176,6 +174,15 @@ def main():
     # 创建图标
     create_icon()
     
+    # 构建页面资源（static/）
+    import build_assets
+    try:
+        build_assets.build()
+    except (OSError, ValueError) as e:
+        print(f"❌ 构建页面资源失败: {e}")
+        input("按回车键退出...")
+        return
+    
     # 构建exe
     if build_exe():
         # 创建说明文件
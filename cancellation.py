@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送任务的取消
+发送流程中的等待都通过CancelToken.wait完成，停止发送时立即结束等待，
+不必等完当前的消息间隔；同时记录从请求停止到发送线程真正停下的耗时
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class Cancelled(Exception):
+    """发送已被取消"""
+
+
+class CancelToken:
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        # time.monotonic()时间
+        self.cancelled_at = None
+        self.finished_at = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """请求取消（重复调用时保留第一次的时间）"""
+        if not self._cancelled.is_set():
+            self.cancelled_at = time.monotonic()
+            self._cancelled.set()
+
+    def wait(self, seconds: float) -> bool:
+        """
+        等待seconds秒，期间被取消时立即返回
+        返回: 是否已取消
+        """
+        if seconds <= 0:
+            return self.cancelled
+        return self._cancelled.wait(seconds)
+
+    def check(self):
+        """已取消时抛出Cancelled"""
+        if self.cancelled:
+            raise Cancelled("发送已取消")
+
+    def finish(self):
+        """由执行方调用: 任务已结束，不会再有任何输入操作"""
+        if not self._finished.is_set():
+            self.finished_at = time.monotonic()
+            self._finished.set()
+
+    def stop_latency(self, timeout: float) -> Optional[float]:
+        """
+        等待执行方结束
+        返回: 从请求取消到任务结束的秒数；未取消或timeout秒内没有结束时返回None
+        """
+        if not self._finished.wait(timeout) or self.cancelled_at is None:
+            return None
+        return max(0.0, self.finished_at - self.cancelled_at)
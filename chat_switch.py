@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+切换聊天窗口
+打开QQ的搜索框，输入联系人名称后回车进入第一个搜索结果的聊天窗口，
+每一步等待界面变化（搜索结果出现、聊天窗口切换）代替固定延迟
+"""
+
+import platform
+from typing import Optional
+
+from input_backend import InputBackend
+from input_engine import InputEngine
+from waits import Waiter, Probe
+
+
+def switch_chat(contact: str, backend: InputBackend, waiter: Waiter, input_engine: InputEngine,
+                ready: Optional[Probe] = None, system: Optional[str] = None):
+    """
+    切换到联系人的聊天窗口
+
+    Args:
+        contact: 联系人名称
+        ready: QQ窗口在前台的探测函数
+        system: 操作系统名称，默认为当前系统（macOS使用Cmd+F）
+
+    Raises:
+        Exception: 任何一步失败时抛出，调用方不应继续发送，以免发到当前聊天窗口
+    """
+    system = system or platform.system()
+    # 使用快捷键打开搜索
+    if system == "Darwin":
+        backend.hotkey('cmd', 'f')
+    else:
+        backend.hotkey('ctrl', 'f')
+    waiter.wait_for(ready, timeout=1, fallback=0.5)
+
+    # 输入联系人名称，等待搜索结果出现
+    results_changed = waiter.region_changed_probe(waiter.window_region())
+    input_engine.input_text(contact)
+    waiter.wait_for(results_changed, timeout=2, fallback=1)
+
+    # 按回车选择第一个结果，等待聊天窗口切换
+    chat_changed = waiter.region_changed_probe(waiter.window_region())
+    backend.press('enter')
+    waiter.wait_for(chat_changed, timeout=2, fallback=1)
@@ -43,20 +43,17 @@ def check_environment():
     log("✅ 环境检查通过")
     return True
 
-def create_templates_directory():
-    """创建templates目录"""
-    log("检查templates目录...")
+def build_page_assets():
+    """构建页面资源（static/）"""
+    log("构建页面资源...")
     
-    if not os.path.exists('templates'):
-        log("创建templates目录...")
-        try:
-            os.makedirs('templates')
-            log("✅ templates目录创建成功")
-        except Exception as e:
-            log(f"❌ 创建templates目录失败: {e}", "ERROR")
-            return False
-    else:
-        log("✅ templates目录已存在")
+    try:
+        import build_assets
+        build_assets.build()
+        log("✅ 页面资源构建成功")
+    except Exception as e:
+        log(f"❌ 构建页面资源失败: {e}", "ERROR")
+        return False
     
     return True
 
@@ -79,7 +76,7 @@ def build_with_pyinstaller():
             '--name=QQ消息发送器',  # 生成的exe名称
             '--onefile',  # 打包成单个文件
             '--windowed',  # 使用窗口模式（不显示控制台）
-            f'--add-data=templates{separator}templates',  # 添加模板文件夹
+            f'--add-data=static{separator}static',  # 添加构建好的页面资源
             '--clean',  # 清理临时文件
             '--noconfirm',  # 不询问确认
             '--log-level=INFO',  # 设置日志级别
@@ -154,8 +151,8 @@ def main():
         if not check_environment():
             return
         
-        # 创建templates目录
-        if not create_templates_directory():
+        # 构建页面资源
+        if not build_page_assets():
             return
         
         # 打包
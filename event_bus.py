@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件广播
+将日志和状态变化推送给所有订阅者，用于Server-Sent Events（SSE）接口
+"""
+
+import json
+import queue
+import threading
+from typing import Dict, Iterator, Optional
+
+# 每个订阅者最多缓存的事件数，超过后断开该订阅者（客户端重连后重新同步）
+SUBSCRIBER_QUEUE_SIZE = 1000
+# 没有事件时发送心跳的间隔（秒），防止代理断开空闲连接
+HEARTBEAT_INTERVAL = 15
+
+# 订阅者被断开时放入队列的标记
+_DISCONNECTED = object()
+
+
+class EventBus:
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.subscribers = set()
+
+    def subscribe(self) -> queue.Queue:
+        """添加订阅者，返回其事件队列"""
+        subscriber = queue.Queue(self.queue_size)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        """移除订阅者"""
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: Dict, event_id: Optional[str] = None):
+        """向所有订阅者推送事件"""
+        message = (event, data, event_id)
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # 客户端跟不上，断开后让它重连并重新获取完整日志
+                self.unsubscribe(subscriber)
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    subscriber.put_nowait((_DISCONNECTED, None, None))
+                except queue.Full:
+                    pass
+
+    def stream(self, subscriber: queue.Queue, heartbeat: float = HEARTBEAT_INTERVAL) -> Iterator[str]:
+        """生成订阅者的SSE数据流，连接断开时自动取消订阅"""
+        try:
+            # 客户端断线后等待2秒再重连
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    event, data, event_id = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event is _DISCONNECTED:
+                    return
+                yield format_sse(event, data, event_id)
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def format_sse(event: str, data: Dict, event_id: Optional[str] = None) -> str:
+    """格式化为一条SSE消息"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
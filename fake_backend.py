@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟输入后端
+在内存中模拟一个QQ聊天窗口并记录所有操作，可配置每种操作的耗时，
+用于在没有显示器和QQ客户端的机器上测试、评估发送流程
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from input_backend import InputBackend, Region
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 各类操作的默认模拟耗时（秒）
+DEFAULT_LATENCIES = {
+    'key': 0.0,         # 单个按键/组合键
+    'char': 0.0,        # 逐字输入时每个字符
+    'paste': 0.0,       # 一次粘贴
+    'click': 0.0,       # 鼠标点击
+    'activate': 0.0,    # 激活窗口
+    'find': 0.0,        # 枚举窗口
+    'screenshot': 0.0,  # 截图
+}
+
+
+class FakeWindow:
+    """模拟的窗口"""
+
+    def __init__(self, backend: 'FakeBackend', title: str = "QQ", hwnd: int = 1,
+                 left: int = 100, top: int = 100, width: int = 800, height: int = 600):
+        self.backend = backend
+        self.title = title
+        self._hWnd = hwnd
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+
+    @property
+    def isActive(self) -> bool:
+        return self.backend.foreground is self
+
+    def activate(self):
+        self.backend.activate_window(self)
+
+
+class FakeBackend(InputBackend):
+    def __init__(self, latencies: Optional[Dict[str, float]] = None, simulate_pause: bool = False,
+                 foreground: bool = True, clipboard: bool = True, background: bool = False):
+        """
+        初始化模拟后端
+
+        Args:
+            latencies: 各类操作的模拟耗时，未指定的使用DEFAULT_LATENCIES
+            simulate_pause: 是否模拟pyautogui.PAUSE带来的每次操作后的停顿
+            foreground: QQ窗口初始时是否在前台
+            clipboard: 是否提供剪贴板
+            background: 是否模拟后台输入（不需要QQ在前台）
+        """
+        self.latencies = dict(DEFAULT_LATENCIES, **(latencies or {}))
+        self.simulate_pause = simulate_pause
+        self.has_clipboard = clipboard
+        self.background = background
+        self.failsafe = True
+        self.pause = 0.0
+        self.lock = threading.Lock()
+
+        self.window = FakeWindow(self)
+        self.windows = [self.window]
+        self.foreground = self.window if foreground else None
+
+        # 聊天窗口状态
+        self.input_box = ""
+        self.selected_all = False
+        self.searching = False
+        self.search_box = ""
+        self.current_contact = None
+        self.chat_switches = 0
+        self.clipboard = ""
+        # 已发送的消息: [(联系人, 消息), ...]
+        self.sent: List[Tuple[Optional[str], str]] = []
+        # 操作记录: [(操作, 参数), ...]
+        self.calls: List[Tuple[str, tuple]] = []
+        # locate返回的锚点区域（相对截图），None表示找不到
+        self.anchor_box: Optional[Region] = None
+
+    def configure(self, failsafe: bool = True, pause: float = 0.5):
+        self.failsafe = failsafe
+        self.pause = pause
+
+    def _record(self, action: str, *args, latency: float = 0.0, pause: bool = True):
+        with self.lock:
+            self.calls.append((action, args))
+        delay = latency + (self.pause if self.simulate_pause and pause else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _focused(self) -> bool:
+        # 后台输入直接送到QQ窗口
+        return self.background or self.foreground is self.window
+
+    def _insert(self, text: str):
+        """向当前获得焦点的输入框插入文本"""
+        if not self._focused():
+            return
+        if self.searching:
+            self.search_box += text
+        elif self.selected_all:
+            self.input_box = text
+        else:
+            self.input_box += text
+        self.selected_all = False
+
+    def press(self, key: str):
+        self._record('press', key, latency=self.latencies['key'])
+        if not self._focused():
+            return
+        if key == 'enter':
+            if self.searching:
+                # 选中第一个搜索结果，切换聊天窗口
+                self.current_contact = self.search_box
+                self.chat_switches += 1
+                self.searching = False
+                self.search_box = ""
+                self.input_box = ""
+            elif self.input_box:
+                self.sent.append((self.current_contact, self.input_box))
+                self.input_box = ""
+            self.selected_all = False
+        elif key == 'backspace':
+            if self.selected_all:
+                self.input_box = ""
+            else:
+                self.input_box = self.input_box[:-1]
+            self.selected_all = False
+        elif key in ('home', 'end', 'left', 'right', 'tab'):
+            self.selected_all = False
+
+    def hotkey(self, *keys: str):
+        self._record('hotkey', *keys, latency=self.latencies['key'])
+        if not self._focused():
+            return
+        modifier = keys[0] if len(keys) > 1 else None
+        key = keys[-1]
+        if modifier in ('ctrl', 'command', 'cmd'):
+            if key == 'a':
+                self.selected_all = True
+            elif key == 'v':
+                self._insert(self.clipboard)
+            elif key == 'f':
+                self.searching = True
+                self.search_box = ""
+            elif key == 'home' and 'shift' in keys:
+                self.selected_all = True
+            else:
+                self.selected_all = False
+
+    def write(self, text: str, pause: bool = True):
+        self._record('write', text, latency=self.latencies['char'] * len(text), pause=pause)
+        self._insert(text)
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        self._record('click', x, y, latency=self.latencies['click'])
+
+    def clipboard_available(self) -> bool:
+        return self.has_clipboard
+
+    def paste(self, text: str, restore_clipboard: bool = True, restore_delay: float = 0.1):
+        previous = self.clipboard
+        self.clipboard = text
+        self._record('paste', text, latency=self.latencies['paste'])
+        self._insert(text)
+        if restore_clipboard:
+            self.clipboard = previous
+
+    def copy(self, text: str):
+        self._record('copy', text)
+        self.clipboard = text
+
+    def read_clipboard(self) -> Optional[str]:
+        return self.clipboard if self.has_clipboard else None
+
+    def press_paste(self):
+        self._record('paste', self.clipboard, latency=self.latencies['paste'])
+        self._insert(self.clipboard)
+
+    def find_windows(self, title: str) -> List:
+        self._record('find_windows', title, latency=self.latencies['find'])
+        return [window for window in self.windows if title in window.title]
+
+    def get_active_window(self):
+        return self.window if self.background else self.foreground
+
+    def activate_window(self, window):
+        self._record('activate', window.title, latency=self.latencies['activate'])
+        self.foreground = window
+
+    def screenshot(self, region: Optional[Region] = None):
+        """
+        返回表示窗口状态的16x16小图像，不区分截图区域:
+        上部为输入框（有内容时为黑色），中部为搜索框（有内容时为黑色），
+        下部每切换一次聊天窗口黑白翻转一次
+        """
+        self._record('screenshot', region, latency=self.latencies['screenshot'])
+        if Image is None:
+            return None
+        image = Image.new('L', (16, 16), 255)
+        if self.input_box:
+            image.paste(0, (0, 0, 16, 6))
+        if self.search_box:
+            image.paste(0, (0, 6, 16, 11))
+        if self.chat_switches % 2:
+            image.paste(0, (0, 11, 16, 16))
+        return image
+
+    def locate(self, needle, haystack, confidence: Optional[float] = None) -> Optional[Region]:
+        self._record('locate', confidence, latency=self.latencies['screenshot'])
+        return self.anchor_box
+
+    def sent_messages(self, contact: Optional[str] = None) -> List[str]:
+        """已发送的消息内容（可按联系人过滤）"""
+        return [message for to, message in self.sent if contact is None or to == contact]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量导入
+逐行解析CSV/JSONL格式的(联系人, 消息, 可选的定时)列表，同一定时（包括不定时）的消息合并为
+一个发送任务提交，每条消息带有自己的联系人，出错的行单独报告，不影响其他行
+
+使用方法:
+    python importer.py campaign.csv                                   # 只校验，不提交
+    python importer.py campaign.jsonl --server http://localhost:5000 --interval 1
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import urllib.parse
+import urllib.request
+from typing import Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+from scheduler import parse_when
+
+# 支持的格式
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+# 单个任务最多包含的消息数，超过后拆分为多个任务
+MAX_JOB_MESSAGES = 1000
+
+# 报告中最多列出的错误行数和已提交任务数（总数另外统计）
+MAX_REPORTED_ERRORS = 100
+MAX_REPORTED_SUBMITTED = 100
+
+# 列名（也接受中文列名）
+_COLUMN_ALIASES = {
+    'contact': 'contact', '联系人': 'contact',
+    'message': 'message', '消息': 'message',
+    'schedule': 'schedule', '定时': 'schedule',
+}
+
+# 提交任务的函数: (消息列表, 每条消息的联系人, 定时) -> 提交结果（如任务ID），原样列在报告中
+SubmitFunc = Callable[[List[str], List[Optional[str]], Optional[str]], object]
+
+
+def detect_format(filename: Optional[str], default: str = FORMAT_CSV) -> str:
+    """根据文件扩展名判断格式"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return FORMAT_JSONL
+    if extension in ('.csv', '.txt'):
+        return FORMAT_CSV
+    return default
+
+
+def iter_records(stream: IO[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    逐行读取记录，不把整个文件读入内存
+    返回: (行号, 记录)，记录为字典；JSONL中无法解析的行以异常对象代替记录
+    """
+    if fmt == FORMAT_CSV:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == FORMAT_JSONL:
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, ValueError(f"JSON格式错误: {e}")
+    else:
+        raise ValueError(f"不支持的导入格式: {fmt}")
+
+
+def parse_record(record) -> Tuple[Optional[str], str, Optional[str]]:
+    """
+    校验一行记录
+    返回: (联系人, 消息, 定时)，联系人为None表示当前聊天窗口
+
+    Raises:
+        ValueError: 该行无效
+    """
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("每行应为一个对象")
+    fields = {}
+    for key, value in record.items():
+        name = _COLUMN_ALIASES.get(str(key).strip().lower()) if key is not None else None
+        if name and value is not None:
+            fields[name] = str(value).strip()
+
+    message = fields.get('message')
+    if not message:
+        raise ValueError("消息为空")
+    schedule = fields.get('schedule') or None
+    if schedule:
+        parse_when(schedule)
+    return fields.get('contact') or None, message, schedule
+
+
+def import_stream(stream: IO[str], fmt: str, submit: SubmitFunc,
+                  max_job_messages: int = MAX_JOB_MESSAGES) -> Dict:
+    """
+    导入一个文件
+    同一定时的行（不论是否相邻）合并为一个任务，消息保持文件中的顺序，每条消息带有自己的联系人；
+    每个任务最多max_job_messages条消息，任务按合并完成的先后提交
+
+    返回: 导入报告 {rows, imported, jobs, submitted, error_count, errors}，
+          文件本身无法继续读取（编码或CSV格式错误）时另有aborted，之前的行已提交
+    """
+    report = {'rows': 0, 'imported': 0, 'jobs': 0, 'submitted': [], 'error_count': 0, 'errors': []}
+    # 定时 -> [(联系人, 消息), ...]，None为不定时
+    groups: Dict[Optional[str], List[Tuple[Optional[str], str]]] = {}
+
+    def flush(schedule):
+        group = groups.pop(schedule, None)
+        if group:
+            result = submit([message for _, message in group], [contact for contact, _ in group], schedule)
+            report['imported'] += len(group)
+            report['jobs'] += 1
+            if len(report['submitted']) < MAX_REPORTED_SUBMITTED:
+                report['submitted'].append(result)
+
+    try:
+        for line_no, record in iter_records(stream, fmt):
+            report['rows'] += 1
+            try:
+                contact, message, schedule = parse_record(record)
+            except ValueError as e:
+                report['error_count'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line_no, 'error': str(e)})
+                continue
+
+            group = groups.setdefault(schedule, [])
+            group.append((contact, message))
+            if len(group) >= max_job_messages:
+                flush(schedule)
+    except (csv.Error, UnicodeDecodeError) as e:
+        report['aborted'] = f"第 {report['rows'] + 1} 行附近无法读取: {e}"
+    for schedule in list(groups):
+        flush(schedule)
+    return report
+
+
+def open_text(binary: IO[bytes]) -> IO[str]:
+    """把二进制流包装为文本流（UTF-8，自动去掉BOM）"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def upload(path: str, server: str, fmt: str, options: Dict) -> Dict:
+    """把文件流式上传到Web服务的/api/import"""
+    query = urllib.parse.urlencode(dict(options, format=fmt))
+    url = f"{server.rstrip('/')}/api/import?{query}"
+    content_type = 'text/csv' if fmt == FORMAT_CSV else 'application/x-ndjson'
+    with open(path, 'rb') as f:
+        request = urllib.request.Request(url, data=f, method='POST', headers={
+            'Content-Type': f'{content_type}; charset=utf-8',
+            'Content-Length': str(os.path.getsize(path)),
+        })
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导入QQ消息（CSV/JSONL）")
+    parser.add_argument('file', help="CSV（列: contact,message,schedule）或JSONL文件")
+    parser.add_argument('--format', choices=FORMATS, help="文件格式（默认按扩展名判断）")
+    parser.add_argument('--server', help="Web服务地址，如 http://localhost:5000；不指定时只校验文件")
+    parser.add_argument('--delay', type=int, default=3, help="每个任务开始前的延迟（秒）")
+    parser.add_argument('--interval', type=float, default=2, help="消息间隔（秒）")
+    parser.add_argument('--burst', type=int, default=1, help="最多连续发送的条数")
+    parser.add_argument('--manual-select', action='store_true', help="不自动选中输入框")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.file)
+    if args.server:
+        options = {'delay': args.delay, 'interval': args.interval, 'burst': args.burst,
+                   'auto_select': 'false' if args.manual_select else 'true'}
+        report = upload(args.file, args.server, fmt, options)
+    else:
+        # 只校验: 统计会生成的任务，不提交
+        def preview(messages, contacts, schedule):
+            return {'schedule': schedule, 'message_count': len(messages), 'contact_count': len(set(contacts))}
+        with open(args.file, 'rb') as f:
+            report = import_stream(open_text(f), fmt, preview)
+        report['dry_run'] = True
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report.get('success', True) and not report.get('error_count') else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
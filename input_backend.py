@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输入后端
+发送流程中所有键盘、鼠标、剪贴板、窗口和截图操作都通过InputBackend完成，
+默认使用pyautogui，无显示器的环境可以换成fake_backend.FakeBackend
+"""
+
+import platform
+import time
+from typing import List, Optional, Tuple
+
+# 屏幕区域: (left, top, width, height)
+Region = Tuple[int, int, int, int]
+
+
+class InputBackend:
+    """输入后端接口"""
+
+    # 输入是否直接送到QQ窗口、不需要QQ在前台（为True时跳过倒计时和选中输入框）
+    background = False
+
+    def configure(self, failsafe: bool = True, pause: float = 0.5):
+        """设置安全边界和每次操作后的停顿时间"""
+        raise NotImplementedError
+
+    def press(self, key: str):
+        """按下并释放一个按键"""
+        raise NotImplementedError
+
+    def hotkey(self, *keys: str):
+        """按下组合键"""
+        raise NotImplementedError
+
+    def write(self, text: str, pause: bool = True):
+        """逐字输入文本，pause为False时输入后不停顿（分段输入时使用）"""
+        raise NotImplementedError
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        """鼠标点击，不指定坐标时点击当前位置"""
+        raise NotImplementedError
+
+    def clipboard_available(self) -> bool:
+        """剪贴板是否可用"""
+        raise NotImplementedError
+
+    def paste(self, text: str, restore_clipboard: bool = True, restore_delay: float = 0.1):
+        """通过剪贴板粘贴文本，restore_clipboard为True时之后恢复原剪贴板内容"""
+        raise NotImplementedError
+
+    def copy(self, text: str):
+        """把文本放入剪贴板"""
+        raise NotImplementedError
+
+    def read_clipboard(self) -> Optional[str]:
+        """读取剪贴板中的文本，失败时返回None"""
+        raise NotImplementedError
+
+    def press_paste(self):
+        """按下粘贴快捷键（Ctrl+V，macOS为Cmd+V），粘贴剪贴板中已有的内容"""
+        raise NotImplementedError
+
+    def find_windows(self, title: str) -> List:
+        """查找标题包含title的窗口"""
+        raise NotImplementedError
+
+    def get_active_window(self):
+        """获取前台窗口，平台不支持时返回None"""
+        raise NotImplementedError
+
+    def activate_window(self, window):
+        """激活窗口"""
+        raise NotImplementedError
+
+    def screenshot(self, region: Optional[Region] = None):
+        """截取屏幕区域，返回PIL图像，不支持时返回None"""
+        raise NotImplementedError
+
+    def locate(self, needle, haystack, confidence: Optional[float] = None) -> Optional[Region]:
+        """
+        在图像haystack中查找灰度图像needle
+        confidence: 相似度，None表示精确匹配
+        返回: needle在haystack中的区域，找不到时返回None
+        """
+        raise NotImplementedError
+
+
+class PyAutoGUIBackend(InputBackend):
+    """基于pyautogui的真实输入后端，pyautogui在第一次操作时才导入"""
+
+    def __init__(self):
+        self.system = platform.system()
+        self.failsafe = True
+        self.pause = 0.5
+        self._pyautogui = None
+        self._pyperclip = None
+        # 平台是否支持获取前台窗口（首次调用时检测）
+        self._active_window_supported = None
+
+    @property
+    def pyautogui(self):
+        if self._pyautogui is None:
+            import pyautogui
+            pyautogui.FAILSAFE = self.failsafe
+            pyautogui.PAUSE = self.pause
+            self._pyautogui = pyautogui
+        return self._pyautogui
+
+    def configure(self, failsafe: bool = True, pause: float = 0.5):
+        self.failsafe = failsafe
+        self.pause = pause
+        if self._pyautogui is not None:
+            self._pyautogui.FAILSAFE = failsafe
+            self._pyautogui.PAUSE = pause
+
+    def press(self, key: str):
+        self.pyautogui.press(key)
+
+    def hotkey(self, *keys: str):
+        self.pyautogui.hotkey(*keys)
+
+    def write(self, text: str, pause: bool = True):
+        self.pyautogui.write(text, _pause=pause)
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        self.pyautogui.click(x, y)
+
+    def _clipboard(self):
+        if self._pyperclip is None:
+            try:
+                import pyperclip
+            except ImportError:
+                return None
+            self._pyperclip = pyperclip
+        return self._pyperclip
+
+    def clipboard_available(self) -> bool:
+        pyperclip = self._clipboard()
+        if pyperclip is None:
+            return False
+        try:
+            pyperclip.paste()
+            return True
+        except Exception:
+            return False
+
+    def paste(self, text: str, restore_clipboard: bool = True, restore_delay: float = 0.1):
+        previous = self.read_clipboard() if restore_clipboard else None
+
+        self.copy(text)
+        try:
+            self.press_paste()
+        finally:
+            if restore_clipboard and previous is not None:
+                # 等待目标程序读取剪贴板后再恢复，避免粘贴成旧内容
+                time.sleep(restore_delay)
+                self.copy(previous)
+
+    def copy(self, text: str):
+        self._clipboard().copy(text)
+
+    def read_clipboard(self) -> Optional[str]:
+        pyperclip = self._clipboard()
+        if pyperclip is None:
+            return None
+        try:
+            return pyperclip.paste()
+        except Exception:
+            return None
+
+    def press_paste(self):
+        if self.system == "Darwin":
+            self.hotkey('command', 'v')
+        else:
+            self.hotkey('ctrl', 'v')
+
+    def find_windows(self, title: str) -> List:
+        return self.pyautogui.getWindowsWithTitle(title)
+
+    def get_active_window(self):
+        if self._active_window_supported is False:
+            return None
+        try:
+            window = self.pyautogui.getActiveWindow()
+            self._active_window_supported = True
+            return window
+        except Exception:
+            # 非Windows平台上pyautogui没有窗口管理功能
+            if self._active_window_supported is None:
+                self._active_window_supported = False
+            return None
+
+    def activate_window(self, window):
+        window.activate()
+
+    def screenshot(self, region: Optional[Region] = None):
+        try:
+            return self.pyautogui.screenshot(region=region)
+        except Exception:
+            return None
+
+    def locate(self, needle, haystack, confidence: Optional[float] = None) -> Optional[Region]:
+        pyautogui = self.pyautogui
+        try:
+            if confidence is None:
+                box = pyautogui.locate(needle, haystack, grayscale=True)
+            else:
+                try:
+                    box = pyautogui.locate(needle, haystack, grayscale=True, confidence=confidence)
+                except NotImplementedError:
+                    # 按相似度匹配需要OpenCV，未安装时使用精确匹配
+                    box = pyautogui.locate(needle, haystack, grayscale=True)
+        except pyautogui.ImageNotFoundException:
+            return None
+        if box is None:
+            return None
+        return (box.left, box.top, box.width, box.height)
+
+
+# 默认输入后端
+_default_backend = None
+
+
+def get_backend() -> InputBackend:
+    """获取默认输入后端（首次调用时创建PyAutoGUIBackend）"""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = PyAutoGUIBackend()
+    return _default_backend
+
+
+def set_backend(backend: InputBackend):
+    """替换默认输入后端"""
+    global _default_backend
+    _default_backend = backend
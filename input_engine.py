@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+消息输入引擎
+支持逐字输入(type)和剪贴板粘贴(paste)两种输入方式
+"""
+
+from typing import Optional
+
+from cancellation import CancelToken
+from input_backend import InputBackend, get_backend
+
+# 输入方式
+INPUT_MODE_AUTO = 'auto'    # 根据消息长度和内容自动选择
+INPUT_MODE_TYPE = 'type'    # 逐字输入（pyautogui.write）
+INPUT_MODE_PASTE = 'paste'  # 剪贴板粘贴（一次Ctrl+V/Cmd+V）
+INPUT_MODES = (INPUT_MODE_AUTO, INPUT_MODE_TYPE, INPUT_MODE_PASTE)
+
+# 自动模式下，消息长度达到该值时改用粘贴
+DEFAULT_PASTE_THRESHOLD = 20
+
+# 可取消时逐字输入每段的字符数，每段之间检查是否已取消
+TYPE_CHUNK_SIZE = 8
+
+
+class InputEngine:
+    def __init__(self, mode: str = INPUT_MODE_AUTO, paste_threshold: int = DEFAULT_PASTE_THRESHOLD,
+                 restore_clipboard: bool = True, restore_delay: float = 0.1,
+                 backend: Optional[InputBackend] = None, cancel: Optional[CancelToken] = None):
+        """
+        初始化输入引擎
+
+        Args:
+            mode: 输入方式，auto/type/paste
+            paste_threshold: 自动模式下切换为粘贴的消息长度阈值
+            restore_clipboard: 粘贴后是否恢复用户原来的剪贴板内容
+            restore_delay: 按下粘贴快捷键后等待多久再恢复剪贴板（秒）
+            backend: 输入后端，默认使用pyautogui
+            cancel: 取消令牌，逐字输入长消息时分段输入，取消后不再输入剩余部分
+        """
+        if mode not in INPUT_MODES:
+            raise ValueError(f"不支持的输入方式: {mode}")
+        self.mode = mode
+        self.paste_threshold = max(0, int(paste_threshold))
+        self.restore_clipboard = restore_clipboard
+        self.restore_delay = restore_delay
+        self.backend = backend or get_backend()
+        self.cancel = cancel
+        # stage()放入剪贴板之前用户的剪贴板内容，finish()时恢复
+        self._saved_clipboard = None
+        self._staged = None
+
+    def clipboard_available(self) -> bool:
+        """剪贴板是否可用"""
+        return self.backend.clipboard_available()
+
+    def should_paste(self, message: str) -> bool:
+        """
+        判断该消息是否使用粘贴方式输入
+        自动模式下，长消息或包含非ASCII字符（如中文，pyautogui.write无法输入）时使用粘贴
+        """
+        if self.mode == INPUT_MODE_TYPE:
+            return False
+        if self.mode == INPUT_MODE_PASTE:
+            return True
+        return len(message) >= self.paste_threshold or not message.isascii()
+
+    def input_text(self, message: str) -> str:
+        """
+        输入消息内容
+        返回: 实际使用的输入方式（type或paste）
+        """
+        if self.should_paste(message) and self.clipboard_available():
+            self.backend.paste(message, self.restore_clipboard, self.restore_delay)
+            return INPUT_MODE_PASTE
+
+        self._write(message)
+        return INPUT_MODE_TYPE
+
+    def stage(self, message: str) -> str:
+        """
+        提前确定消息的输入方式，粘贴方式时先把消息放入剪贴板
+        之后由input_staged完成输入；
+        用户原来的剪贴板内容只在第一次放入时保存，finish()时恢复
+        返回: 输入方式（type或paste）
+        """
+        if not (self.should_paste(message) and self.clipboard_available()):
+            return INPUT_MODE_TYPE
+        if self.restore_clipboard and self._staged is None:
+            self._saved_clipboard = self.backend.read_clipboard()
+        self.backend.copy(message)
+        self._staged = message
+        return INPUT_MODE_PASTE
+
+    def input_staged(self, message: str, mode: str) -> str:
+        """
+        输入已由stage准备好的消息
+        返回: 实际使用的输入方式
+        """
+        if mode != INPUT_MODE_PASTE:
+            self._write(message)
+            return INPUT_MODE_TYPE
+        # 等待期间剪贴板可能被用户或其他程序修改，不一致时重新放入
+        if self.backend.read_clipboard() != message:
+            self.backend.copy(message)
+            self._staged = message
+        self.backend.press_paste()
+        return INPUT_MODE_PASTE
+
+    def finish(self):
+        """恢复stage之前用户的剪贴板内容（剪贴板已被用户改写时不恢复）"""
+        if self._staged is None:
+            return
+        if (self.restore_clipboard and self._saved_clipboard is not None
+                and self.backend.read_clipboard() == self._staged):
+            self.backend.copy(self._saved_clipboard)
+        self._saved_clipboard = None
+        self._staged = None
+
+    def _write(self, message: str):
+        """
+        逐字输入，可取消时分段输入并在每段之间检查
+
+        Raises:
+            Cancelled: 输入过程中被取消（已输入的部分留在输入框中，不会被发送，由调用方清空）
+        """
+        if self.cancel is None or len(message) <= TYPE_CHUNK_SIZE:
+            self.backend.write(message)
+            return
+        for start in range(0, len(message), TYPE_CHUNK_SIZE):
+            self.cancel.check()
+            end = start + TYPE_CHUNK_SIZE
+            # 只在最后一段之后停顿，分段不增加pyautogui.PAUSE的次数
+            self.backend.write(message[start:end], pause=end >= len(message))
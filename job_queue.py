@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送任务队列
+使用SQLite持久化保存发送任务，由单个发送线程按排队顺序依次执行（继续发送的任务排到队尾）
+每发送成功一条消息记录一次进度，程序中断后可从上次确认的位置继续发送
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 默认数据库文件
+DEFAULT_DB_FILE = 'send_jobs.db'
+
+# 任务状态
+JOB_QUEUED = 'queued'            # 排队中
+JOB_RUNNING = 'running'          # 发送中
+JOB_DONE = 'done'                # 已完成
+JOB_STOPPED = 'stopped'          # 被停止
+JOB_FAILED = 'failed'            # 失败
+JOB_CANCELLED = 'cancelled'      # 开始前被取消
+JOB_INTERRUPTED = 'interrupted'  # 发送过程中程序退出
+JOB_STATES = (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_STOPPED,
+              JOB_FAILED, JOB_CANCELLED, JOB_INTERRUPTED)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    state TEXT NOT NULL,
+    contact TEXT,
+    messages TEXT NOT NULL,
+    options TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    error TEXT,
+    progress INTEGER NOT NULL DEFAULT 0,
+    idempotency_key TEXT,
+    queue_seq INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, id);
+'''
+
+# 旧版本数据库缺少的列
+_MIGRATIONS = {
+    'progress': "ALTER TABLE jobs ADD COLUMN progress INTEGER NOT NULL DEFAULT 0",
+    'idempotency_key': "ALTER TABLE jobs ADD COLUMN idempotency_key TEXT",
+    'queue_seq': "ALTER TABLE jobs ADD COLUMN queue_seq INTEGER",
+}
+
+# 下一个排队序号: 添加任务和重新排队时分配，队列按它排序
+_NEXT_QUEUE_SEQ = "(SELECT COALESCE(MAX(queue_seq), 0) + 1 FROM jobs)"
+
+# 可以继续发送的任务状态
+RESUMABLE_STATES = (JOB_INTERRUPTED, JOB_STOPPED, JOB_FAILED)
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class JobQueue:
+    def __init__(self, db_file: str = DEFAULT_DB_FILE):
+        """
+        打开（或创建）任务队列数据库
+
+        Args:
+            db_file: SQLite数据库文件路径，":memory:"表示不持久化
+        """
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            # 每条消息都要记录进度，WAL模式下提交不必每次同步整个数据库文件
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            for column, statement in _MIGRATIONS.items():
+                if column not in columns:
+                    self.conn.execute(statement)
+            # 旧版本的任务按ID排队
+            self.conn.execute("UPDATE jobs SET queue_seq = id WHERE queue_seq IS NULL")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (state, queue_seq)")
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_idempotency_key "
+                              "ON jobs (idempotency_key) WHERE idempotency_key IS NOT NULL")
+            # 上次退出时仍在发送的任务标记为中断，之后可从记录的进度继续
+            self.conn.execute("UPDATE jobs SET state = ?, finished_at = ? WHERE state = ?",
+                              (JOB_INTERRUPTED, _now(), JOB_RUNNING))
+        self.wakeup = threading.Event()
+
+    def enqueue(self, messages: List[str], contact: Optional[str] = None,
+                options: Optional[Dict] = None, idempotency_key: Optional[str] = None) -> int:
+        """
+        添加发送任务
+        idempotency_key: 幂等键，相同的键只会添加一次，重复提交时返回已有任务的ID
+        返回: 任务ID
+        """
+        with self.lock, self.conn:
+            job_id, _ = self._insert(messages, contact, options, idempotency_key)
+        self.wakeup.set()
+        return job_id
+
+    def enqueue_many(self, jobs: List[Dict]) -> List[Tuple[int, bool]]:
+        """
+        在一个事务中添加多个发送任务，全部添加成功或全部不添加
+        jobs: [{messages, contact, options, idempotency_key}, ...]，后三项可省略
+        返回: 与jobs顺序相同的[(任务ID, 是否新添加), ...]，幂等键已存在的任务不新添加
+        """
+        with self.lock, self.conn:
+            results = [self._insert(job['messages'], job.get('contact'), job.get('options'),
+                                    job.get('idempotency_key'))
+                       for job in jobs]
+        if any(created for _, created in results):
+            self.wakeup.set()
+        return results
+
+    def _insert(self, messages: List[str], contact: Optional[str], options: Optional[Dict],
+                idempotency_key: Optional[str]) -> Tuple[int, bool]:
+        """插入一个排队任务（调用方持有锁并负责提交），返回(任务ID, 是否新添加)"""
+        if idempotency_key is not None:
+            row = self.conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?",
+                                    (idempotency_key,)).fetchone()
+            if row is not None:
+                return row['id'], False
+        cursor = self.conn.execute(
+            "INSERT INTO jobs (state, contact, messages, options, created_at, idempotency_key, queue_seq) "
+            f"VALUES (?, ?, ?, ?, ?, ?, {_NEXT_QUEUE_SEQ})",
+            (JOB_QUEUED, contact, json.dumps(messages, ensure_ascii=False),
+             json.dumps(options or {}, ensure_ascii=False), _now(), idempotency_key))
+        return cursor.lastrowid, True
+
+    def find_by_key(self, idempotency_key: str) -> Optional[int]:
+        """按幂等键查找任务ID"""
+        with self.lock:
+            row = self.conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?",
+                                    (idempotency_key,)).fetchone()
+        return row['id'] if row is not None else None
+
+    def checkpoint(self, job_id: int, progress: int):
+        """记录已确认发送的消息条数"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (progress, job_id))
+
+    def resume(self, job_id: int) -> bool:
+        """
+        将中断、停止或失败的任务重新排队（排到队尾），从已确认发送的位置继续
+        返回: 是否成功（任务不存在、未结束或已全部发送时返回False）
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row['state'] not in RESUMABLE_STATES:
+                return False
+            if row['progress'] >= len(json.loads(row['messages'])):
+                return False
+            with self.conn:
+                self.conn.execute("UPDATE jobs SET state = ?, finished_at = NULL, error = NULL, "
+                                  f"queue_seq = {_NEXT_QUEUE_SEQ} WHERE id = ?",
+                                  (JOB_QUEUED, job_id))
+        self.wakeup.set()
+        return True
+
+    def list_interrupted(self) -> List[Dict]:
+        """因程序退出而中断、尚未发送完的任务"""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM jobs WHERE state = ? ORDER BY id",
+                                     (JOB_INTERRUPTED,)).fetchall()
+        return [job for job in map(self._row_to_job, rows) if job['progress'] < job['message_count']]
+
+    def claim_next(self) -> Optional[Dict]:
+        """取出最早的排队任务并标记为发送中，没有任务时返回None"""
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE state = ? ORDER BY queue_seq LIMIT 1", (JOB_QUEUED,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE jobs SET state = ?, started_at = ? WHERE id = ?",
+                              (JOB_RUNNING, _now(), row['id']))
+        job = self._row_to_job(row, with_messages=True)
+        job['state'] = JOB_RUNNING
+        return job
+
+    def finish(self, job_id: int, state: str, error: Optional[str] = None):
+        """记录任务结束状态"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET state = ?, finished_at = ?, error = ? WHERE id = ?",
+                              (state, _now(), error, job_id))
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        取消排队中的任务
+        返回: 是否取消成功（任务已开始或不存在时返回False）
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute("UPDATE jobs SET state = ?, finished_at = ? WHERE id = ? AND state = ?",
+                                       (JOB_CANCELLED, _now(), job_id, JOB_QUEUED))
+            return cursor.rowcount > 0
+
+    def get(self, job_id: int, with_messages: bool = False) -> Optional[Dict]:
+        """获取任务信息，不存在时返回None"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = self._row_to_job(row, with_messages)
+            job['position'] = self._position(row)
+        return job
+
+    def list_jobs(self, limit: int = 50) -> List[Dict]:
+        """获取所有排队/发送中的任务以及最近结束的任务"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE state IN (?, ?) ORDER BY queue_seq", (JOB_RUNNING, JOB_QUEUED)).fetchall()
+            rows += self.conn.execute(
+                "SELECT * FROM jobs WHERE state NOT IN (?, ?) ORDER BY id DESC LIMIT ?",
+                (JOB_RUNNING, JOB_QUEUED, limit)).fetchall()
+            jobs = []
+            position = 0
+            for row in rows:
+                job = self._row_to_job(row)
+                if row['state'] == JOB_QUEUED:
+                    position += 1
+                    job['position'] = position
+                else:
+                    job['position'] = 0 if row['state'] == JOB_RUNNING else None
+                jobs.append(job)
+        return jobs
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        with self.lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {state: 0 for state in JOB_STATES}
+        counts.update({state: count for state, count in rows})
+        return counts
+
+    def _position(self, row) -> Optional[int]:
+        """任务在队列中的位置: 发送中为0，排队中从1开始，已结束为None"""
+        if row['state'] == JOB_RUNNING:
+            return 0
+        if row['state'] != JOB_QUEUED:
+            return None
+        ahead = self.conn.execute("SELECT COUNT(*) FROM jobs WHERE state = ? AND queue_seq < ?",
+                                  (JOB_QUEUED, row['queue_seq'])).fetchone()[0]
+        return ahead + 1
+
+    @staticmethod
+    def _row_to_job(row, with_messages: bool = False) -> Dict:
+        messages = json.loads(row['messages'])
+        job = {
+            'id': row['id'],
+            'state': row['state'],
+            'contact': row['contact'],
+            'message_count': len(messages),
+            'options': json.loads(row['options']),
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'error': row['error'],
+            'progress': row['progress'],
+        }
+        if with_messages:
+            job['messages'] = messages
+        return job
+
+
+class JobWorker:
+    def __init__(self, queue: JobQueue, handler: Callable[[Dict], str],
+                 on_finish: Optional[Callable[[Dict, str], None]] = None,
+                 on_claim: Optional[Callable[[Dict], None]] = None, lock=None):
+        """
+        单线程任务执行器
+
+        Args:
+            queue: 任务队列
+            handler: 执行单个任务的函数，返回任务结束状态
+            on_finish: 任务结束状态记录后的回调，参数为任务和结束状态
+            on_claim: 取出任务后、执行之前的回调（与取出任务在同一把锁内），参数为任务
+            lock: 取出任务、设置current_job_id时持有的锁，停止当前任务的一方持有同一把锁读取，
+                  不会在任务已取出、尚未开始时错过停止请求
+        """
+        self.queue = queue
+        self.handler = handler
+        self.on_finish = on_finish
+        self.on_claim = on_claim
+        self.lock = lock or threading.RLock()
+        self.current_job_id = None
+        self.thread = None
+
+    def start(self):
+        """启动执行线程（重复调用无效）"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name='send-worker')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            self.queue.wakeup.clear()
+            with self.lock:
+                job = self.queue.claim_next()
+                if job is not None:
+                    self.current_job_id = job['id']
+                    if self.on_claim:
+                        self.on_claim(job)
+            if job is None:
+                self.queue.wakeup.wait()
+                continue
+
+            try:
+                state = self.handler(job)
+                self.queue.finish(job['id'], state)
+            except Exception as e:
+                state = JOB_FAILED
+                self.queue.finish(job['id'], state, str(e))
+            finally:
+                with self.lock:
+                    self.current_job_id = None
+
+            if self.on_finish:
+                try:
+                    self.on_finish(job, state)
+                except Exception as e:
+                    print(f"任务结束回调出错: {e}")
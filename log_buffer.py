@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志环形缓冲区
+固定容量，每条日志带有单调递增的序号，客户端可以只获取某个序号之后的新日志
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+# 默认保留的日志条数
+DEFAULT_LOG_CAPACITY = 1000
+
+
+class LogBuffer:
+    def __init__(self, capacity: int = DEFAULT_LOG_CAPACITY):
+        self.capacity = capacity
+        self.entries = deque(maxlen=capacity)
+        self.last_seq = 0
+        self.lock = threading.Lock()
+
+    def append(self, entry: Dict) -> Dict:
+        """
+        添加日志，超出容量时自动丢弃最旧的日志
+        返回: 带序号(seq)的日志条目
+        """
+        with self.lock:
+            self.last_seq += 1
+            entry = dict(entry, seq=self.last_seq)
+            self.entries.append(entry)
+        return entry
+
+    def since(self, seq: Optional[int] = None) -> Dict:
+        """
+        获取序号大于seq的日志
+
+        Args:
+            seq: 客户端已收到的最后一条日志序号，为None时返回全部日志
+        返回: {'logs': 日志列表, 'last_seq': 最新序号, 'dropped': 因缓冲区已覆盖而无法返回的条数}
+        """
+        with self.lock:
+            if not self.entries:
+                return {'logs': [], 'last_seq': self.last_seq, 'dropped': 0}
+
+            first_seq = self.entries[0]['seq']
+            if seq is not None and seq > self.last_seq:
+                # 序号比服务器的还新（服务器已重启），返回全部日志
+                seq = None
+            if seq is None or seq < first_seq:
+                # 客户端落后太多，缺失的日志已被覆盖
+                dropped = 0 if seq is None else first_seq - seq - 1
+                logs = list(self.entries)
+            else:
+                dropped = 0
+                # 序号连续，可以直接计算起始下标
+                logs = [self.entries[i] for i in range(seq - first_seq + 1, len(self.entries))]
+            return {'logs': logs, 'last_seq': self.last_seq, 'dropped': dropped}
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送指标
+计数器、仪表和直方图，以Prometheus文本格式输出（/api/metrics），只依赖标准库
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 阶段耗时直方图的默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    type_name = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._label_values(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self.lock:
+            items = sorted(self.values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(Metric):
+    type_name = 'gauge'
+
+    def __init__(self, name: str, help_text: str, function: Optional[Callable[[], float]] = None):
+        """function: 每次输出时调用以获取当前值，不提供时使用set()设置的值"""
+        super().__init__(name, help_text)
+        self.function = function
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def _samples(self) -> List[str]:
+        value = self.value
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:
+                value = float('nan')
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # 每组标签: [各分桶计数(非累计), 总和, 总数]
+        self.series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._label_values(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self) -> List[str]:
+        with self.lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self.series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames + ('le',), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """输出Prometheus文本格式"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class SenderMetrics:
+    """发送器指标"""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.phase_seconds = self.registry.register(Histogram(
+            'qq_sender_phase_seconds', '发送流程各阶段耗时（秒）', ('phase',)))
+        self.messages_sent = self.registry.register(Counter(
+            'qq_sender_messages_sent_total', '发送成功的消息数'))
+        self.message_failures = self.registry.register(Counter(
+            'qq_sender_message_failures_total', '发送失败的消息数'))
+        self.bytes_typed = self.registry.register(Counter(
+            'qq_sender_bytes_typed_total', '输入的消息字节数（UTF-8）', ('mode',)))
+        self.jobs_finished = self.registry.register(Counter(
+            'qq_sender_jobs_finished_total', '结束的任务数', ('state',)))
+        self.stop_latency = self.registry.register(Histogram(
+            'qq_sender_stop_latency_seconds', '从请求停止到发送线程停下的耗时（秒）'))
+
+    def add_gauge(self, name: str, help_text: str, function: Callable[[], float]) -> Gauge:
+        """添加输出时才计算的仪表（如队列长度）"""
+        return self.registry.register(Gauge(name, help_text, function))
+
+    def observe_phase(self, phase: str, seconds: float):
+        self.phase_seconds.observe(seconds, phase=phase)
+
+    def message_sent(self, mode: str, message: str):
+        """记录一条发送成功的消息，mode为实际使用的输入方式"""
+        self.messages_sent.inc()
+        self.bytes_typed.inc(len(message.encode('utf-8')), mode=mode)
+
+    def message_failed(self):
+        self.message_failures.inc()
+
+    def job_finished(self, state: str):
+        self.jobs_finished.inc(state=state)
+
+    def stop_observed(self, seconds: float):
+        self.stop_latency.observe(seconds)
+
+    def render(self) -> str:
+        return self.registry.render()
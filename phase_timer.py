@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送阶段计时
+记录发送流程中每个阶段（倒计时、选中输入框、输入、回车、间隔等）的耗时
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# 发送流程的阶段
+PHASE_COUNTDOWN = 'countdown'            # 发送前倒计时
+PHASE_SWITCH_CHAT = 'switch_chat'        # 切换到联系人的聊天窗口
+PHASE_AUTO_SELECT = 'auto_select'        # 自动选中输入框
+PHASE_PREPARE = 'prepare'                # 准备下一条消息（在消息间隔内完成）
+PHASE_CLEAR = 'clear'                    # 清空输入框
+PHASE_INPUT = 'input'                    # 输入消息
+PHASE_ENTER = 'enter'                    # 回车发送
+PHASE_INTERVAL = 'interval'              # 消息间隔
+PHASE_MESSAGE = 'message'                # 单条消息从清空到回车的总耗时
+
+# 阶段回调: (阶段名, 耗时秒数)
+PhaseCallback = Callable[[str, float], None]
+
+
+class PhaseTimer:
+    def __init__(self, callback: Optional[PhaseCallback] = None):
+        """
+        Args:
+            callback: 每个阶段结束时调用，没有回调时不计时
+        """
+        self.callback = callback
+
+    @contextmanager
+    def phase(self, name: str):
+        """统计with块内的耗时（块内抛出异常时不记录）"""
+        if self.callback is None:
+            yield
+            return
+        start = time.perf_counter()
+        yield
+        self.callback(name, time.perf_counter() - start)
@@ -2,29 +2,44 @@
 # -*- coding: utf-8 -*-
 """
 QQ消息发送脚本 - 兼容Mac和Windows
-使用pyautogui实现跨平台自动化操作
+使用pyautogui实现跨平台自动化操作（通过input_backend，可替换为模拟后端）
 """
 
-import pyautogui
-import time
 import sys
 import os
 import platform
-from typing import Optional, List
+from typing import Optional, List, Tuple
+
+from input_backend import InputBackend, get_backend
+from input_engine import InputEngine
+from waits import Waiter
+from window_cache import WindowCache
+from chat_switch import switch_chat
+from batching import group_by_contact, count_switches
+from rate_limiter import RateLimiter, rate_from_interval
 
 class QQMessageSender:
-    def __init__(self):
-        """初始化QQ消息发送器"""
+    def __init__(self, backend: Optional[InputBackend] = None, interval: float = 2, burst: int = 1):
+        """
+        初始化QQ消息发送器
+        
+        Args:
+            backend: 输入后端（可选，默认使用pyautogui）
+            interval: 平均消息间隔（秒，可为小数）
+            burst: 最多可不等待连续发送的条数
+        """
         self.system = platform.system()
+        self.backend = backend or get_backend()
+        self.input_engine = InputEngine(backend=self.backend)
+        self.waiter = Waiter(self.backend)
+        self.window_cache = WindowCache("QQ", self.backend)
+        self.rate_limiter = RateLimiter(rate_from_interval(interval), burst)
         self.setup_pyautogui()
         
     def setup_pyautogui(self):
         """根据操作系统设置pyautogui"""
-        # 设置安全边界，防止鼠标移动到屏幕边缘
-        pyautogui.FAILSAFE = True
-        
-        # 设置操作间隔，避免操作过快
-        pyautogui.PAUSE = 0.5
+        # 设置安全边界（防止鼠标移动到屏幕边缘）和操作间隔（避免操作过快）
+        self.backend.configure(failsafe=True, pause=0.5)
         
         if self.system == "Darwin":  # macOS
             # macOS可能需要特殊权限
@@ -46,11 +61,12 @@ class QQMessageSender:
                 print("macOS系统：请手动确保QQ窗口处于活动状态")
                 return True
             else:
-                # Windows使用窗口标题搜索
+                # Windows使用窗口标题搜索，找到的窗口会被缓存，之后只检查句柄是否仍有效
                 try:
-                    qq_windows = pyautogui.getWindowsWithTitle("QQ")
-                    if qq_windows:
-                        qq_windows[0].activate()
+                    qq_window = self.window_cache.get()
+                    if qq_window:
+                        if not self.window_cache.is_foreground():
+                            self.backend.activate_window(qq_window)
                         return True
                 except AttributeError:
                     # 如果getWindowsWithTitle不存在，使用备用方法
@@ -79,8 +95,8 @@ class QQMessageSender:
                 print("请先打开QQ并确保窗口处于活动状态")
                 return False
             
-            # 等待一下确保窗口激活
-            time.sleep(1)
+            # 等待QQ窗口成为前台窗口
+            self.waiter.wait_for(self.waiter.foreground_probe(), timeout=2, fallback=1)
             
             # 如果需要指定联系人
             if contact_name:
@@ -100,37 +116,21 @@ class QQMessageSender:
             return False
     
     def _search_contact(self, contact_name: str):
-        """搜索联系人"""
-        try:
-            # 使用快捷键打开搜索
-            if self.system == "Darwin":
-                pyautogui.hotkey('cmd', 'f')
-            else:
-                pyautogui.hotkey('ctrl', 'f')
-            
-            time.sleep(0.5)
-            
-            # 输入联系人名称
-            pyautogui.write(contact_name)
-            time.sleep(1)
-            
-            # 按回车选择第一个结果
-            pyautogui.press('enter')
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"搜索联系人时出错: {e}")
+        """搜索联系人（失败时抛出异常，消息不会发到当前聊天窗口）"""
+        switch_chat(contact_name, self.backend, self.waiter, self.input_engine,
+                    self.waiter.foreground_probe(), self.system)
     
     def _type_message(self, message: str):
         """输入消息内容"""
         try:
             # 确保焦点在输入框
-            pyautogui.click()
-            time.sleep(0.5)
+            self.backend.click()
+            self.waiter.wait_for(self.waiter.foreground_probe(), timeout=1, fallback=0.5)
             
-            # 输入消息
-            pyautogui.write(message)
-            time.sleep(0.5)
+            # 输入消息（长消息或中文使用剪贴板粘贴），等待文字出现在输入框
+            typed = self.waiter.region_changed_probe(self.waiter.input_box_region())
+            self.input_engine.input_text(message)
+            self.waiter.wait_for(typed, timeout=1, fallback=0.5)
             
         except Exception as e:
             print(f"输入消息时出错: {e}")
@@ -139,34 +139,55 @@ class QQMessageSender:
         """发送消息"""
         try:
             # 按回车发送消息
-            pyautogui.press('enter')
+            self.backend.press('enter')
             
         except Exception as e:
             print(f"发送消息时出错: {e}")
     
-    def send_multiple_messages(self, messages: List[str], contact_name: Optional[str] = None):
+    def send_multiple_messages(self, messages: List[str], contact_name: Optional[str] = None) -> bool:
         """
         发送多条消息
         
         Args:
             messages: 消息列表
             contact_name: 联系人名称（可选）
+        返回: 是否全部发送成功
         """
         print(f"准备发送 {len(messages)} 条消息...")
         
         for i, message in enumerate(messages, 1):
+            # 限速：令牌不足时等待（联系人之间同样适用）
+            self.rate_limiter.acquire(contact_name)
             print(f"正在发送第 {i} 条消息...")
-            success = self.send_message(message, contact_name)
+            # 只在第一条消息前切换联系人，之后留在同一个聊天窗口
+            success = self.send_message(message, contact_name if i == 1 else None)
             
             if not success:
                 print(f"第 {i} 条消息发送失败")
-                break
-            
-            # 消息间隔
-            if i < len(messages):
-                time.sleep(2)
+                return False
         
         print("批量发送完成")
+        return True
+    
+    def send_batch(self, items: List[Tuple[Optional[str], str]]) -> bool:
+        """
+        向多个联系人批量发送消息
+        按联系人分组，每个联系人只切换一次聊天窗口，同一联系人的消息保持原顺序
+        
+        Args:
+            items: (联系人, 消息)列表，联系人为None表示当前聊天窗口
+        返回: 是否全部发送成功
+        """
+        groups = group_by_contact(items)
+        print(f"准备向 {len(groups)} 个联系人发送 {len(items)} 条消息"
+              f"（切换联系人 {len(groups)} 次，逐条发送需 {count_switches(items)} 次）...")
+        
+        for index, (contact, messages) in enumerate(groups, 1):
+            print(f"正在发送给第 {index}/{len(groups)} 个联系人: {contact or '当前聊天窗口'}")
+            if not self.send_multiple_messages(messages, contact):
+                return False
+        
+        return True
 
 def main():
     """主函数"""
@@ -182,9 +203,10 @@ def main():
         print("\n请选择操作:")
         print("1. 发送单条消息")
         print("2. 发送多条消息")
-        print("3. 退出")
+        print("3. 向多个联系人批量发送")
+        print("4. 退出")
         
-        choice = input("请输入选择 (1-3): ").strip()
+        choice = input("请输入选择 (1-4): ").strip()
         
         if choice == "1":
             message = input("请输入要发送的消息: ").strip()
@@ -212,6 +234,26 @@ def main():
                 print("没有输入任何消息")
         
         elif choice == "3":
+            items = []
+            print("请按 \"联系人:消息\" 的格式输入（输入空行结束）:")
+            while True:
+                line = input(f"第 {len(items) + 1} 条: ").strip()
+                if not line:
+                    break
+                contact, sep, msg = line.partition(':')
+                if not sep:
+                    contact, sep, msg = line.partition('：')
+                if not sep or not contact.strip() or not msg.strip():
+                    print("格式错误，应为 \"联系人:消息\"")
+                    continue
+                items.append((contact.strip(), msg.strip()))
+            
+            if items:
+                sender.send_batch(items)
+            else:
+                print("没有输入任何消息")
+        
+        elif choice == "4":
             print("退出程序")
             break
         
@@ -5,188 +5,479 @@ QQ消息发送脚本 - Web界面版本 (Windows专用)
 使用Flask创建Web界面, 支持Windows平台QQ消息自动发送
 """
 
-from flask import Flask, render_template, request, jsonify, session
-import pyautogui
-import time
+from flask import Flask, request, abort, jsonify, session, Response, stream_with_context
 import threading
 import json
 import os
+import argparse
+import uuid
 from datetime import datetime
 from typing import Optional, List
 
-app = Flask(__name__)
+from input_engine import InputEngine, INPUT_MODE_AUTO, INPUT_MODES, DEFAULT_PASTE_THRESHOLD
+from event_bus import EventBus
+from log_buffer import LogBuffer
+from job_queue import (JobQueue, JobWorker, DEFAULT_DB_FILE, JOB_QUEUED, JOB_RUNNING, JOB_DONE,
+                       JOB_STOPPED, JOB_FAILED)
+from input_backend import InputBackend, get_backend
+from phase_timer import (PhaseTimer, PHASE_COUNTDOWN, PHASE_SWITCH_CHAT, PHASE_AUTO_SELECT,
+                         PHASE_PREPARE, PHASE_CLEAR, PHASE_INPUT, PHASE_ENTER, PHASE_INTERVAL, PHASE_MESSAGE)
+from send_pipeline import SendPipeline
+from chat_switch import switch_chat
+from cancellation import CancelToken, Cancelled
+from action_plan import ActionPlan, compile_plan, press, hotkey, wait
+from uia_focus import UIAFocus
+from window_message_backend import WindowMessageBackend
+from anchor_locator import AnchorLocator, parse_offset, DEFAULT_OFFSET
+from waits import Waiter
+from metrics import SenderMetrics
+from rate_limiter import RateLimiter, rate_from_interval
+from scheduler import Scheduler, parse_run_at, parse_when
+from batching import ContactMessages
+from templating import MessageTemplate, RenderedMessages, parse_recipients, validate_recipients
+from serving import serve, SERVERS, SERVER_DEV, DEFAULT_THREADS, DEFAULT_TIMEOUT, DEFAULT_BACKLOG
+from importer import import_stream, open_text, detect_format, FORMATS, FORMAT_CSV, FORMAT_JSONL
+from static_assets import AssetStore, choose_encoding
+
+# 页面资源由build_assets.py预先构建到static/，不使用Flask默认的静态文件路由
+app = Flask(__name__, static_folder=None)
 app.secret_key = 'qq_message_sender_secret_key'
 
+# 定位输入框: 使用Tab键循环切换焦点（尝试5次）
+FIND_INPUT_BOX_ACTIONS = [action for _ in range(5) for action in (press('tab'), wait(0.5, 0.3))]
+
+# Windows下自动选中输入框
+AUTO_SELECT_ACTIONS = [
+    press('tab'), wait(0.5, 0.2),                     # Tab键切换到输入框
+    hotkey('ctrl', 'a'), wait(0.5, 0.2),              # Ctrl+A全选（如果已有内容）
+    press('home'), wait(0.5, 0.2),                    # Home键移动到开头
+    press('end'), wait(0.5, 0.2),                     # End键移动到末尾
+    hotkey('ctrl', 'end'), wait(0.5, 0.2),            # Ctrl+End移动到末尾
+    hotkey('ctrl', 'shift', 'home'), wait(0.5, 0.2),  # Ctrl+Shift+Home选中全部
+    wait(1, 0.5),                                     # 等待QQ处理完所有按键
+]
+
+# 每条消息输入前清空输入框
+CLEAR_INPUT_ACTIONS = [hotkey('ctrl', 'a'), wait(0.5, 0.2)]
+
+# 选中输入框的方式
+SELECT_UIA = 'uia'        # UI Automation直接聚焦缓存的输入框控件
+SELECT_ANCHOR = 'anchor'  # 按锚点图片找到输入框位置后点击（位置按窗口缓存）
+SELECT_KEYS = 'keys'      # 按键计划（Tab切换）
+
 class QQMessageSender:
-    def __init__(self):
+    def __init__(self, backend: Optional[InputBackend] = None, metrics: Optional[SenderMetrics] = None,
+                 contact_rate: Optional[float] = None, contact_burst: int = 1):
+        self.backend = backend or get_backend()
+        self.metrics = metrics
+        # 每个联系人的限速在任务之间共享
+        self.contact_limiter = RateLimiter(contact_rate=contact_rate, contact_burst=contact_burst)
         self.setup_pyautogui()
         self.sending = False
+        # 当前任务的取消令牌，停止发送时取消
+        self.cancel_token = CancelToken()
+        # 开始任务（换新令牌）和停止发送（读取并取消令牌）都持有这把锁，停止请求不会落到旧令牌上
+        self.lock = threading.RLock()
         self.current_task = None
+        self.waiter = Waiter(self.backend)
+        # 输入框控件按窗口缓存，在任务之间共享
+        self.uia_focus = UIAFocus(self.backend)
+        # 锚点图片定位（--anchor-image），为None时不使用
+        self.anchor_locator: Optional[AnchorLocator] = None
+        
+    def use_backend(self, backend: InputBackend):
+        """更换输入后端（如后台窗口消息），依赖后端的组件一并重建"""
+        self.backend = backend
+        self.setup_pyautogui()
+        self.waiter = Waiter(backend)
+        self.uia_focus = UIAFocus(backend)
+        if self.anchor_locator is not None:
+            self.anchor_locator.backend = backend
         
     def setup_pyautogui(self):
         """设置pyautogui"""
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.5
+        self.backend.configure(failsafe=True, pause=0.5)
         
-    def auto_select_input_box(self):
-        """Windows下自动选中输入框"""
+    def compile_plans(self):
+        """
+        编译选中输入框和清空输入框的动作计划
+        返回: (选中计划, 清空计划)
+        """
+        # 清空之后紧接着输入消息，输入的按键同样按顺序排队，不需要再等待
+        return (compile_plan(FIND_INPUT_BOX_ACTIONS + AUTO_SELECT_ACTIONS),
+                compile_plan(CLEAR_INPUT_ACTIONS, trailing_wait=False))
+    
+    def run_plan(self, plan: ActionPlan, ready) -> bool:
+        """执行动作计划，返回是否成功"""
         try:
-            # 方法1: 使用Tab键切换到输入框
-            pyautogui.press('tab')
-            time.sleep(0.2)
-            
-            # 方法2: 使用Ctrl+A全选（如果已有内容）
-            pyautogui.hotkey('ctrl', 'a')
-            time.sleep(0.2)
-            
-            # 方法3: 使用Home键移动到开头
-            pyautogui.press('home')
-            time.sleep(0.2)
-            
-            # 方法4: 使用End键移动到末尾
-            pyautogui.press('end')
-            time.sleep(0.2)
-            
-            # 方法5: 使用Ctrl+End移动到末尾，然后Ctrl+Shift+Home选中全部
-            pyautogui.hotkey('ctrl', 'end')
-            time.sleep(0.2)
-            pyautogui.hotkey('ctrl', 'shift', 'home')
-            time.sleep(0.2)
-            
+            plan.run(self.backend, self.waiter, ready)
             return True
-            
         except Exception as e:
-            print(f"自动选中输入框失败: {e}")
+            print(f"执行动作计划失败: {e}")
             return False
     
-    def find_and_click_input_box(self):
-        """查找并点击输入框"""
+    def qq_window(self):
+        """前台窗口是QQ时返回该窗口，否则返回None"""
+        window = self.backend.get_active_window()
+        if window is not None and 'QQ' in (window.title or ''):
+            return window
+        return None
+    
+    def select_input_box(self, select_plan: ActionPlan, clear_plan: ActionPlan, ready,
+                         callback=None) -> Optional[str]:
+        """
+        定位并选中输入框，依次尝试: UI Automation聚焦缓存的输入框控件、按锚点图片点击输入框、按键计划
+        聚焦或点击后全选输入框中已有的内容，之后输入的消息会替换它
+        返回: 使用的方式（SELECT_UIA/SELECT_ANCHOR/SELECT_KEYS），失败时返回None
+        """
+        if self.uia_focus.available() or self.anchor_locator is not None:
+            self.waiter.wait_for(ready, timeout=1, fallback=0)
+            window = self.qq_window()
+            hwnd = getattr(window, '_hWnd', None) if window is not None else None
+            if self.uia_focus.available() and self.uia_focus.focus(hwnd):
+                if self.run_plan(clear_plan, ready):
+                    return SELECT_UIA
+                # 聚焦的控件可能已不是输入框，下次重新查找
+                self.uia_focus.invalidate(hwnd)
+            if self.anchor_locator is not None and self.anchor_locator.click(window):
+                if self.run_plan(clear_plan, ready):
+                    return SELECT_ANCHOR
+                # 点击的位置可能已不是输入框，下次重新匹配
+                self.anchor_locator.invalidate(hwnd)
+        
+        if callback:
+            pause = getattr(self.backend, 'pause', 0.0)
+            callback(f"使用按键选中输入框（{select_plan.key_count} 次按键，"
+                     f"预计 {select_plan.estimate(pause):.1f} 秒）...")
+        return SELECT_KEYS if self.run_plan(select_plan, ready) else None
+        
+    def invalidate_input_box(self):
+        """发送失败时清空QQ窗口的输入框缓存（缓存的控件或点击位置可能已失效），下一个任务重新查找"""
+        window = self.qq_window()
+        hwnd = getattr(window, '_hWnd', None) if window is not None else None
+        # 找不到QQ窗口时不知道是哪个窗口，清空全部
+        self.uia_focus.invalidate(hwnd)
+        if self.anchor_locator is not None:
+            self.anchor_locator.invalidate(hwnd)
+        
+    def switch_chat(self, contact: str, input_engine: InputEngine, ready, timer: PhaseTimer, callback=None):
+        """切换到联系人的聊天窗口，失败时抛出异常，消息不会发到当前聊天窗口"""
+        if callback:
+            callback(f"正在切换到联系人: {contact}")
         try:
-            # 使用Tab键循环切换焦点
-            for _ in range(5):  # 尝试5次
-                pyautogui.press('tab')
-                time.sleep(0.3)
-                
-            return True
-            
+            with timer.phase(PHASE_SWITCH_CHAT):
+                switch_chat(contact, self.backend, self.waiter, input_engine, ready)
+        except Cancelled:
+            raise
         except Exception as e:
-            print(f"查找输入框失败: {e}")
-            return False
-        
-    def send_messages(self, messages: List[str], contact: Optional[str] = None, 
-                     delay: int = 3, interval: int = 2, callback=None, auto_select: bool = True):
-        """发送消息"""
-        if self.sending:
-            return False
-            
-        self.sending = True
+            raise RuntimeError(f"切换到联系人 {contact} 失败: {e}")
         
-        def send_thread():
+    def clear_input_box(self, message: str):
+        """
+        清空停止时留在输入框中的未发送内容（Ctrl+A后删除）
+        后台输入不支持组合键，按消息长度逐字删除（按UTF-16编码单元，与后台输入一致）
+        """
+        try:
             try:
-                if callback:
-                    callback(f"准备发送 {len(messages)} 条消息...")
-                    if contact:
-                        callback(f"目标联系人: {contact}")
-                    if auto_select:
-                        callback(f"请在 {delay} 秒内切换到QQ窗口，将自动选中输入框")
-                    else:
-                        callback(f"请在 {delay} 秒内切换到QQ窗口并确保光标在输入框中")
-                
-                # 倒计时
+                self.backend.hotkey('ctrl', 'a')
+                self.backend.press('backspace')
+            except NotImplementedError:
+                for _ in range(len(message.encode('utf-16-le')) // 2):
+                    self.backend.press('backspace')
+        except Exception as e:
+            print(f"清空输入框失败: {e}")
+        
+    def begin_job(self) -> CancelToken:
+        """开始一个任务: 创建并返回它的取消令牌，标记为发送中"""
+        with self.lock:
+            token = CancelToken()
+            self.cancel_token = token
+            self.sending = True
+            return token
+        
+    def run_job(self, messages: List[str], contact: Optional[str] = None,
+                delay: int = 3, interval: float = 2, callback=None, auto_select: bool = True,
+                input_mode: str = INPUT_MODE_AUTO, paste_threshold: int = DEFAULT_PASTE_THRESHOLD,
+                on_phase=None, burst: int = 1, start_index: int = 0, on_progress=None,
+                token: Optional[CancelToken] = None) -> str:
+        """
+        在当前线程中执行一个发送任务
+        interval: 平均消息间隔（秒，可为小数），即持续速率为每秒 1/interval 条
+        burst: 最多可不等待连续发送的条数
+        on_phase: 每个发送阶段结束时的回调，参数为(阶段名, 耗时秒数)
+        start_index: 从第几条消息开始发送（之前的已确认发送过），用于继续中断的任务
+        on_progress: 每条消息按下回车后的回调，参数为已发送的条数（含start_index之前的）
+        token: begin_job()返回的取消令牌，为None时在这里开始任务；
+               之前已被停止时（令牌已取消）任务直接结束
+        返回: 任务结束状态（done/stopped/failed）
+        """
+        # 本任务的所有等待和分段输入都可以被立即取消
+        if token is None:
+            token = self.begin_job()
+        self.waiter.cancel = token
+        input_engine = InputEngine(input_mode, paste_threshold, backend=self.backend, cancel=token)
+        timer = PhaseTimer(self._phase_callback(on_phase))
+        job_limiter = RateLimiter(rate_from_interval(interval), burst)
+        still_sending = lambda: self.sending
+        # 后台输入直接送到QQ窗口: 不需要倒计时切换窗口，也不需要选中输入框（组合键不可用）
+        background = self.backend.background
+        if background:
+            delay, auto_select = 0, False
+        # 无法截图确认文字已出现时的固定等待，后台投递的消息按顺序处理，不需要等待
+        typed_fallback = 0 if background else 0.5
+        # 等待文字出现的最长时间: 很短的消息（如一个字）变化的像素可能不够判断，不能按满1秒等待
+        typed_timeout = 0.5
+        
+        try:
+            if callback:
+                callback(f"准备发送 {len(messages)} 条消息...")
+                if start_index:
+                    callback(f"前 {start_index} 条已发送，从第 {start_index + 1} 条继续")
+                if contact:
+                    callback(f"目标联系人: {contact}")
+                if background:
+                    callback("后台发送到QQ窗口，不需要切换窗口")
+                elif auto_select:
+                    callback(f"请在 {delay} 秒内切换到QQ窗口，将自动选中输入框")
+                else:
+                    callback(f"请在 {delay} 秒内切换到QQ窗口并确保光标在输入框中")
+            
+            # 倒计时
+            with timer.phase(PHASE_COUNTDOWN):
                 for i in range(delay, 0, -1):
                     if not self.sending:
                         break
                     if callback:
                         callback(f"倒计时: {i} 秒...")
-                    time.sleep(1)
-                    
-                if not self.sending:
-                    if callback:
-                        callback("发送已取消")
-                    return
+                    if token.wait(1):
+                        break
+                
+            if not self.sending:
+                if callback:
+                    callback("发送已取消")
+                return JOB_STOPPED
+            
+            # 等待QQ成为前台窗口（后台输入不需要）
+            ready = None if background else self.waiter.foreground_probe()
+            
+            # 本任务使用的动作计划（每个任务编译一次）
+            select_plan, clear_plan = self.compile_plans()
+            
+            # 每条消息的联系人: 模板任务为各收件人的联系人，其他任务为任务的联系人
+            contact_at = getattr(messages, 'contact_at', None)
+            target_of = (lambda i: contact_at(i - 1)) if contact_at is not None else (lambda i: contact)
+            
+            # 切换到第一条消息的联系人（每个任务都切换一次，倒计时期间用户可能打开了别的聊天）
+            current_chat = target_of(start_index + 1) if start_index < len(messages) else None
+            if current_chat:
+                self.switch_chat(current_chat, input_engine, ready, timer, callback)
+            
+            # 自动选中输入框（定位输入框并选中其中的内容）
+            selected = None
+            if auto_select:
+                if callback:
+                    callback("正在自动选中输入框...")
                 
-                # 自动选中输入框
-                if auto_select:
+                with timer.phase(PHASE_AUTO_SELECT):
+                    selected = self.select_input_box(select_plan, clear_plan, ready, callback)
+                if selected == SELECT_UIA:
                     if callback:
-                        callback("正在自动选中输入框...")
-                    
-                    # 尝试查找并点击输入框
-                    if not self.find_and_click_input_box():
-                        if callback:
-                            callback("无法自动定位输入框，请手动点击输入框")
-                    
-                    # 自动选中输入框内容
-                    if self.auto_select_input_box():
-                        if callback:
-                            callback("输入框已自动选中")
-                    else:
-                        if callback:
-                            callback("自动选中失败，请手动选中输入框")
+                        callback("输入框已通过UI Automation聚焦并选中")
+                elif selected == SELECT_ANCHOR:
+                    if callback:
+                        callback("输入框已按锚点图片定位并选中")
+                elif selected == SELECT_KEYS:
+                    if callback:
+                        callback("输入框已自动选中")
+                else:
+                    if callback:
+                        callback("自动选中失败，请手动选中输入框")
+                
+            # 发送消息: 每条消息在前一条回车后立即准备，准备时间计入限速等待
+            pipeline = SendPipeline(messages, input_engine, self.waiter, ready)
+            for i in range(start_index + 1, len(messages) + 1):
+                if not self.sending:
+                    break
+                
+                # 在限速等待之前准备这一条消息，准备期间令牌照常恢复
+                with timer.phase(PHASE_PREPARE):
+                    prepared = pipeline.prepare(i)
+                
+                # 限速：令牌不足时等待（代替固定的消息间隔）
+                target = target_of(i)
+                with timer.phase(PHASE_INTERVAL):
+                    allowed = (job_limiter.acquire(target, still_sending, cancel=token)
+                               and self.contact_limiter.acquire(target, still_sending, cancel=token))
+                if not allowed:
+                    break
+                
+                # 消息是否已开始输入（停止时需要清空输入框）
+                input_started = False
+                try:
+                    if prepared.error is not None:
+                        raise prepared.error
+                    message = prepared.text
                     
-                    time.sleep(0.5)
+                    # 联系人变化时先切换聊天窗口，并重新截取新聊天的输入框
+                    if target and target != current_chat:
+                        self.switch_chat(target, input_engine, ready, timer, callback)
+                        current_chat = target
+                        pipeline.capture(prepared)
                     
-                # 发送消息
-                for i, message in enumerate(messages, 1):
-                    if not self.sending:
-                        break
-                        
                     if callback:
                         callback(f"正在发送第 {i}/{len(messages)} 条消息: {message[:30]}...")
                     
-                    try:
-                        # 如果不是第一条消息，需要重新选中输入框
-                        if i > 1 and auto_select:
-                            # 清空输入框
-                            pyautogui.hotkey('ctrl', 'a')
-                            time.sleep(0.2)
+                    with timer.phase(PHASE_MESSAGE):
+                        # 准备时QQ不在前台，先等待QQ回到前台
+                        if not prepared.focused:
+                            self.waiter.wait_for(ready, timeout=1, fallback=0)
                         
-                        # 输入消息
-                        pyautogui.write(message)
-                        time.sleep(0.5)
+                        # 如果不是本次发送的第一条消息，需要重新选中输入框
+                        if i > start_index + 1 and auto_select:
+                            # 清空输入框
+                            with timer.phase(PHASE_CLEAR):
+                                # 按锚点定位时直接点击缓存的位置（窗口大小变化时才重新匹配）
+                                if selected == SELECT_ANCHOR:
+                                    self.anchor_locator.click(self.qq_window())
+                                clear_plan.run(self.backend, self.waiter, ready)
                         
-                        # 发送消息
-                        pyautogui.press('enter')
+                        box_region, empty_box = prepared.box_region, prepared.empty_box
                         
-                        if callback:
-                            callback(f"第 {i} 条消息发送成功")
+                        # 输入消息（长消息或中文使用剪贴板粘贴，这时才放入剪贴板）
+                        with timer.phase(PHASE_INPUT):
+                            input_started = True
+                            used_mode = pipeline.input(prepared)
+                            self.waiter.wait_for(self.waiter.region_changed_probe(box_region, empty_box),
+                                                 timeout=typed_timeout, fallback=typed_fallback)
                         
-                        # 消息间隔
-                        if i < len(messages) and self.sending:
-                            time.sleep(interval)
-                            
-                    except Exception as e:
-                        if callback:
-                            callback(f"第 {i} 条消息发送失败: {e}")
-                        break
+                        # 发送消息（停止后不再按回车）
+                        token.check()
+                        with timer.phase(PHASE_ENTER):
+                            self.backend.press('enter')
+                            self.waiter.wait_for(self.waiter.region_restored_probe(box_region, empty_box),
+                                                 timeout=1, fallback=0)
+                    
+                    if on_progress:
+                        on_progress(i)
+                    if self.metrics:
+                        self.metrics.message_sent(used_mode, message)
+                    if callback:
+                        callback(f"第 {i} 条消息发送成功")
                         
-                if self.sending:
+                except Cancelled:
+                    # 已输入的部分不能留在输入框中（用户之后按回车会发出半条消息），清空并恢复剪贴板
+                    if input_started:
+                        self.clear_input_box(message)
+                        input_engine.finish()
                     if callback:
-                        callback("所有消息发送完成")
-                else:
+                        callback(f"第 {i} 条消息未发送（已停止）")
+                    break
+                except Exception as e:
+                    if selected in (SELECT_UIA, SELECT_ANCHOR):
+                        self.invalidate_input_box()
+                    if self.metrics:
+                        self.metrics.message_failed()
                     if callback:
-                        callback("发送已停止")
+                        callback(f"第 {i} 条消息发送失败: {e}")
+                    return JOB_FAILED
                     
-            except Exception as e:
+            if self.sending:
+                if callback:
+                    callback("所有消息发送完成")
+                return JOB_DONE
+            else:
                 if callback:
-                    callback(f"发送过程中出错: {e}")
-            finally:
-                self.sending = False
+                    callback("发送已停止")
+                return JOB_STOPPED
                 
+        except Cancelled:
+            if callback:
+                callback("发送已停止")
+            return JOB_STOPPED
+        except Exception as e:
+            if callback:
+                callback(f"发送过程中出错: {e}")
+            return JOB_FAILED
+        finally:
+            # 恢复用户原来的剪贴板内容
+            input_engine.finish()
+            self.sending = False
+            token.finish()
+        
+    def _phase_callback(self, on_phase):
+        """阶段耗时同时记入指标和调用方的回调，两者都没有时不计时"""
+        if self.metrics is None:
+            return on_phase
+        
+        def report(name, seconds):
+            self.metrics.observe_phase(name, seconds)
+            if on_phase:
+                on_phase(name, seconds)
+        return report
+        
+    def send_messages(self, messages: List[str], contact: Optional[str] = None, 
+                     delay: int = 3, interval: float = 2, callback=None, auto_select: bool = True,
+                     input_mode: str = INPUT_MODE_AUTO, paste_threshold: int = DEFAULT_PASTE_THRESHOLD,
+                     on_phase=None, burst: int = 1):
+        """在后台线程中立即发送消息（不经过任务队列），发送器忙时返回False"""
+        with self.lock:
+            if self.sending:
+                return False
+            token = self.begin_job()
+        
         # 启动发送线程
-        thread = threading.Thread(target=send_thread)
+        thread = threading.Thread(target=self.run_job,
+                                  args=(messages, contact, delay, interval, callback, auto_select,
+                                        input_mode, paste_threshold, on_phase, burst),
+                                  kwargs={'token': token})
         thread.daemon = True
         thread.start()
         return True
         
-    def stop_sending(self):
-        """停止发送"""
-        self.sending = False
+    def stop_sending(self, wait: float = 0) -> Optional[float]:
+        """
+        停止发送，正在进行的等待和分段输入立即中断
+        wait: 最多等待发送线程停下的秒数
+        返回: 从请求停止到发送线程停下的秒数，未在发送或wait秒内没有停下时返回None
+        """
+        with self.lock:
+            was_sending = self.sending
+            self.sending = False
+            token = self.cancel_token
+            token.cancel()
+        if not was_sending or wait <= 0:
+            return None
+        return token.stop_latency(wait)
+
+# 发送指标（/api/metrics）
+metrics = SenderMetrics()
 
 # 创建全局发送器实例
-sender = QQMessageSender()
+sender = QQMessageSender(metrics=metrics)
+
+# 存储日志的环形缓冲区
+message_logs = LogBuffer()
+log_lock = threading.Lock()
+
+# 日志和状态变化的推送通道（/api/events）
+event_bus = EventBus()
 
-# 存储日志的全局变量
-message_logs = []
+# 本次启动的标识: 日志序号在重启后从1开始，事件ID带上它，客户端据此判断服务器是否已重启
+BOOT_ID = uuid.uuid4().hex[:8]
+
+def log_event_id(seq: int) -> str:
+    """日志事件的ID: 启动标识-日志序号"""
+    return f"{BOOT_ID}-{seq}"
+
+def parse_log_event_id(event_id: str) -> int:
+    """
+    解析客户端最后收到的事件ID
+    返回: 日志序号，ID来自上一次启动（或无法解析）时返回0，即补发全部日志
+    """
+    boot_id, _, seq = event_id.rpartition('-')
+    if boot_id != BOOT_ID or not seq.isdigit():
+        return 0
+    return int(seq)
 
 def add_log(message):
     """添加日志"""
@@ -196,663 +487,629 @@ def add_log(message):
         'message': message,
         'type': 'info'
     }
-    message_logs.append(log_entry)
-    # 保持日志数量在合理范围内
-    if len(message_logs) > 100:
-        message_logs.pop(0)
+    # 加锁保证推送顺序与日志序号一致
+    with log_lock:
+        log_entry = message_logs.append(log_entry)
+        event_bus.publish('log', log_entry, log_event_id(log_entry['seq']))
+
+def run_queued_job(job):
+    """发送线程执行队列中的任务"""
+    job_id = job['id']
+    
+    def job_log(message):
+        add_log(f"[任务#{job_id}] {message}")
+    
+    options = dict(job['options'])
+    messages = job['messages']
+    # 模板任务保存的是收件人表，发送时逐条生成消息
+    template = options.pop('template', None)
+    if template is not None:
+        messages = RenderedMessages(MessageTemplate(template), messages)
+    # 批量导入的任务逐条保存联系人
+    contacts = options.pop('contacts', None)
+    if contacts is not None:
+        messages = ContactMessages(messages, contacts)
+    
+    def checkpoint(sent):
+        job_queue.checkpoint(job_id, sent)
+    
+    publish_status()
+    # 取出任务时已开始（on_claim），这期间的停止请求已取消了这个令牌
+    return sender.run_job(messages, job['contact'], callback=job_log, start_index=job['progress'],
+                          on_progress=checkpoint, token=sender.cancel_token, **options)
+
+def on_job_finished(job, state):
+    """任务结束后记录指标并推送状态变化"""
+    metrics.job_finished(state)
+    publish_status()
+
+def on_schedule_fired(schedule):
+    """定时任务到期，把消息加入发送队列"""
+    # 同一次触发只入队一次（入队后、记录触发前程序退出时，重启后会再次触发）
+    key = f"schedule-{schedule['id']}-{schedule['fire_count'] + 1}"
+    job_id = job_queue.enqueue(schedule['messages'], schedule['contact'], schedule['options'], key)
+    job_worker.start()
+    add_log(f"[定时#{schedule['id']}] 已加入发送队列（任务#{job_id}）")
+    publish_status()
+    return job_id
+
+# 持久化任务队列、唯一的发送线程和定时任务（一次性/cron重复，由单个线程等待最早的触发时间），
+# 由init_services()创建: 导入本模块（如性能测试）时不打开数据库，也不会把其他进程正在发送的任务标记为中断
+job_queue: Optional[JobQueue] = None
+job_worker: Optional[JobWorker] = None
+scheduler: Optional[Scheduler] = None
+
+def init_services(db_file: str = DEFAULT_DB_FILE):
+    """打开任务队列和定时任务数据库（线程由start()启动）"""
+    global job_queue, job_worker, scheduler
+    job_queue = JobQueue(db_file)
+    job_worker = JobWorker(job_queue, run_queued_job, on_job_finished,
+                           on_claim=lambda job: sender.begin_job(), lock=sender.lock)
+    scheduler = Scheduler(on_schedule_fired, db_file)
+
+metrics.add_gauge('qq_sender_queue_depth', '排队中的任务数', lambda: job_queue.counts()[JOB_QUEUED])
+metrics.add_gauge('qq_sender_sending', '是否正在发送（1/0）', lambda: int(sender.sending))
+metrics.add_gauge('qq_sender_schedules_pending', '等待触发的定时任务数', lambda: scheduler.count_pending())
+
+def current_status():
+    """当前发送状态"""
+    counts = job_queue.counts()
+    return {
+        'sending': sender.sending,
+        'queued': counts[JOB_QUEUED],
+        'running': counts[JOB_RUNNING],
+        'current_job_id': job_worker.current_job_id,
+        'interrupted_jobs': [job['id'] for job in job_queue.list_interrupted()],
+        'system': 'Windows'
+    }
+
+def publish_status():
+    """推送状态变化"""
+    event_bus.publish('status', current_status())
+
+def parse_send_options(data):
+    """
+    解析发送设置（延迟、间隔、输入方式等），表单提交的字符串参数同样适用
+    返回: options，参数错误时抛出ValueError
+    """
+    delay = int(data.get('delay', 3))
+    interval = float(data.get('interval', 2))
+    burst = int(data.get('burst', 1))
+    auto_select = data.get('auto_select', True)  # 自动选中选项
+    if isinstance(auto_select, str):
+        auto_select = auto_select.strip().lower() not in ('0', 'false', 'off', 'no', 'manual')
+    input_mode = data.get('input_mode', INPUT_MODE_AUTO)  # 输入方式
+    paste_threshold = int(data.get('paste_threshold', DEFAULT_PASTE_THRESHOLD))
+    if input_mode not in INPUT_MODES:
+        raise ValueError(f'不支持的输入方式: {input_mode}')
+    if interval < 0:
+        raise ValueError('消息间隔不能小于0')
+    if burst < 1:
+        raise ValueError('突发条数不能小于1')
+    
+    return {
+        'delay': delay,
+        'interval': interval,
+        'burst': burst,
+        'auto_select': auto_select,
+        'input_mode': input_mode,
+        'paste_threshold': paste_threshold,
+    }
+
+def require_chat_switch(feature: str):
+    """
+    需要切换聊天窗口的功能（联系人、模板群发、批量发送、批量导入）在后台发送时不可用:
+    后台输入没有组合键，无法打开搜索框，提交时就拒绝，不要等到发送时才失败
+
+    Raises:
+        ValueError: 当前为后台发送
+    """
+    if sender.backend.background:
+        raise ValueError(f'后台发送无法切换聊天窗口，不支持{feature}；消息只能发到目标窗口当前打开的聊天')
+
+def parse_send_request(data):
+    """
+    解析发送请求参数
+    message_type为template时，messages为收件人表，模板保存在options['template']中
+    返回: (messages, contact, options)，参数错误时抛出ValueError
+    """
+    if not data:
+        raise ValueError('请求参数为空')
+    
+    # 获取参数
+    message_type = data.get('message_type', 'single')
+    contact = data.get('contact', '').strip() or None
+    options = parse_send_options(data)
+    
+    if contact:
+        require_chat_switch('指定联系人')
+    
+    # 获取消息
+    messages = []
+    if message_type == 'template':
+        require_chat_switch('模板群发')
+        # 模板群发: 保存收件人表，模板放在发送设置中，发送时再生成消息并发到各收件人的联系人
+        if contact:
+            raise ValueError('模板群发的联系人请写在收件人表的contact列中')
+        template = MessageTemplate(data.get('template', ''))
+        messages = parse_recipients(data.get('recipients'))
+        validate_recipients(template, messages)
+        options['template'] = template.text
+    elif isinstance(data.get('messages'), list):
+        # API直接提交的消息列表
+        messages = [str(message).strip() for message in data['messages'] if str(message).strip()]
+        if not messages:
+            raise ValueError('请输入要发送的消息')
+    elif message_type == 'single':
+        message = data.get('single_message', '').strip()
+        if not message:
+            raise ValueError('请输入要发送的消息')
+        messages = [message]
+    else:
+        multiple_messages = data.get('multiple_messages', '').strip()
+        if not multiple_messages:
+            raise ValueError('请输入要发送的消息')
+        messages = [line.strip() for line in multiple_messages.split('\n') if line.strip()]
+    
+    return messages, contact, options
+
+def request_idempotency_key(data):
+    """请求的幂等键: Idempotency-Key请求头或idempotency_key参数"""
+    key = request.headers.get('Idempotency-Key') or (data or {}).get('idempotency_key')
+    if not key:
+        return None
+    return str(key).strip() or None
+
+def submit_job(data, idempotency_key=None):
+    """校验参数并将任务加入队列，返回API响应；幂等键相同的重复提交返回已有的任务"""
+    if idempotency_key:
+        existing_id = job_queue.find_by_key(idempotency_key)
+        if existing_id is not None:
+            job = job_queue.get(existing_id)
+            return jsonify({'success': True, 'message': f'任务#{existing_id}已提交过，不再重复添加',
+                            'job_id': existing_id, 'position': job['position'], 'duplicate': True})
+    
+    try:
+        messages, contact, options = parse_send_request(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    
+    job_id = job_queue.enqueue(messages, contact, options, idempotency_key)
+    job_worker.start()
+    job = job_queue.get(job_id)
+    publish_status()
+    
+    auto_select_text = "自动选中" if options['auto_select'] else "手动选中"
+    position = job['position']
+    if position and (position > 1 or job_worker.current_job_id is not None):
+        message = f'任务#{job_id}已加入队列，排在第 {position} 位（{auto_select_text}模式）'
+    else:
+        message = f'开始发送消息（{auto_select_text}模式）'
+    return jsonify({'success': True, 'message': message, 'job_id': job_id, 'position': position})
+
+# 一次批量提交最多包含的任务数
+MAX_BATCH_JOBS = 1000
+
+def submit_batch(data, idempotency_key=None):
+    """
+    批量提交任务: 先校验全部任务，有任何一个出错时都不添加；全部有效时在一个事务中加入队列
+    data: {jobs: [与/api/send相同的参数, ...], defaults: 各任务共用的参数（可选）}
+    idempotency_key: 整批的幂等键，第i个任务使用"键-i"；任务自己的idempotency_key优先
+    """
+    if not data or not isinstance(data.get('jobs'), list) or not data['jobs']:
+        return jsonify({'success': False, 'message': 'jobs应为非空的任务列表'})
+    if len(data['jobs']) > MAX_BATCH_JOBS:
+        return jsonify({'success': False, 'message': f'一次最多提交 {MAX_BATCH_JOBS} 个任务'})
+    try:
+        require_chat_switch('批量发送')
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    defaults = data.get('defaults') or {}
+    if not isinstance(defaults, dict):
+        return jsonify({'success': False, 'message': 'defaults应为对象'})
+    
+    jobs = []
+    errors = []
+    for index, item in enumerate(data['jobs']):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'message': '任务应为对象'})
+            continue
+        item = dict(defaults, **item)
+        try:
+            messages, contact, options = parse_send_request(item)
+        except ValueError as e:
+            errors.append({'index': index, 'message': str(e)})
+            continue
+        key = item.get('idempotency_key') or (f'{idempotency_key}-{index}' if idempotency_key else None)
+        jobs.append({'messages': messages, 'contact': contact, 'options': options,
+                     'idempotency_key': str(key) if key else None})
+    if errors:
+        return jsonify({'success': False, 'message': f'{len(errors)} 个任务参数错误，全部未提交',
+                        'errors': errors})
+    
+    results = job_queue.enqueue_many(jobs)
+    job_worker.start()
+    publish_status()
+    
+    submitted = []
+    for index, (job_id, created) in enumerate(results):
+        job = job_queue.get(job_id)
+        submitted.append({'index': index, 'job_id': job_id, 'position': job['position'],
+                          'duplicate': not created})
+    created_count = sum(1 for _, created in results if created)
+    message = f'已加入 {created_count} 个任务'
+    if created_count < len(results):
+        message += f'，{len(results) - created_count} 个已提交过'
+    return jsonify({'success': True, 'message': message, 'jobs': submitted})
+
+def submit_schedule(data):
+    """校验参数并添加定时任务，返回API响应"""
+    try:
+        messages, contact, options = parse_send_request(data)
+        run_at = data.get('run_at')
+        cron = (data.get('cron') or '').strip() or None
+        if run_at in (None, ''):
+            run_at = None
+        else:
+            run_at = parse_run_at(run_at)
+        schedule_id = scheduler.add(messages, contact, options, run_at=run_at, cron=cron)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    
+    scheduler.start()
+    schedule = scheduler.get(schedule_id)
+    return jsonify({'success': True, 'message': f"定时任务#{schedule_id}已添加，将于 {schedule['next_run']} 发送",
+                    'schedule_id': schedule_id, 'next_run': schedule['next_run']})
+
+def import_job_options(contacts, options):
+    """
+    导入的一组消息的联系人和发送设置
+    联系人都相同时作为任务的联系人，否则逐条保存在options['contacts']中，发送时联系人变化才切换聊天
+    返回: (contact, options)
+    """
+    if len(set(contacts)) == 1:
+        return contacts[0], options
+    return None, dict(options, contacts=list(contacts))
+
+def import_submitter(options, pending):
+    """
+    导入时提交任务: 有定时的加入定时任务；不定时的先放入pending，
+    导入结束后由enqueue_imported()在一个事务中加入发送队列
+    """
+    def submit(messages, contacts, schedule):
+        contact, job_options = import_job_options(contacts, options)
+        if schedule:
+            run_at, cron = parse_when(schedule)
+            return {'schedule_id': scheduler.add(messages, contact, job_options, run_at=run_at, cron=cron)}
+        if pending:
+            # 接着上一个任务发送，不需要再倒计时切换窗口
+            job_options = dict(job_options, delay=0)
+        result = {}
+        pending.append(({'messages': messages, 'contact': contact, 'options': job_options}, result))
+        return result
+    return submit
+
+def enqueue_imported(pending):
+    """把导入的不定时任务一起加入发送队列，并在报告中填入任务ID"""
+    if not pending:
+        return
+    results = job_queue.enqueue_many([job for job, _ in pending])
+    for (_, result), (job_id, _) in zip(pending, results):
+        result['job_id'] = job_id
+
+# 页面资源（第一次请求时才读取）
+assets = AssetStore(os.path.join(app.root_path, 'static'))
+
+# 带哈希的资源内容不会变化，可以长期缓存；页面每次都用ETag验证，内容未变时返回304
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDATE = 'no-cache'
+
+def asset_response(entry, cache_control: str):
+    """返回资源文件，按Accept-Encoding选择预压缩的版本"""
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'), entry['encodings'])
+    # 不同压缩格式的内容不同，ETag也要区分
+    etag = entry['etag'] + (f'-{encoding}' if encoding else '')
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(assets.read(entry, encoding), content_type=entry['content_type'])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @app.route('/')
 def index():
     """主页"""
-    return render_template('index.html')
+    return asset_response(assets.get('index.html'), CACHE_REVALIDATE)
+
+@app.route('/static/<path:filename>')
+def static_file(filename):
+    """带哈希的页面资源（CSS/JS）"""
+    entry = assets.find(filename)
+    if entry is None or filename == 'index.html':
+        abort(404)
+    return asset_response(entry, CACHE_IMMUTABLE)
 
 @app.route('/api/send', methods=['POST'])
 def send_messages():
-    """发送消息API"""
+    """发送消息API（加入任务队列，发送器忙时排队等待）"""
     try:
         data = request.get_json()
-        
-        # 获取参数
-        message_type = data.get('message_type', 'single')
-        contact = data.get('contact', '').strip() or None
-        delay = int(data.get('delay', 3))
-        interval = int(data.get('interval', 2))
-        auto_select = data.get('auto_select', True)  # 自动选中选项
-        
-        # 获取消息
-        messages = []
-        if message_type == 'single':
-            message = data.get('single_message', '').strip()
-            if not message:
-                return jsonify({'success': False, 'message': '请输入要发送的消息'})
-            messages = [message]
-        else:
-            multiple_messages = data.get('multiple_messages', '').strip()
-            if not multiple_messages:
-                return jsonify({'success': False, 'message': '请输入要发送的消息'})
-            messages = [line.strip() for line in multiple_messages.split('\n') if line.strip()]
-        
-        # 清空日志
-        message_logs.clear()
-        
-        # 开始发送
-        success = sender.send_messages(messages, contact, delay, interval, add_log, auto_select)
-        
-        if success:
-            auto_select_text = "自动选中" if auto_select else "手动选中"
-            return jsonify({'success': True, 'message': f'开始发送消息（{auto_select_text}模式）'})
-        else:
-            return jsonify({'success': False, 'message': '发送器正在运行中'})
+        return submit_job(data, request_idempotency_key(data))
             
     except Exception as e:
         return jsonify({'success': False, 'message': f'发送失败: {e}'})
 
+@app.route('/api/send/batch', methods=['POST'])
+def send_batch():
+    """批量发送API（一次提交多个任务，全部校验通过后一起加入队列）"""
+    try:
+        data = request.get_json()
+        return submit_batch(data, request_idempotency_key(data))
+            
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'提交失败: {e}'})
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """任务列表API"""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'jobs': job_queue.list_jobs(limit), 'current_job_id': job_worker.current_job_id})
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """提交任务API"""
+    try:
+        data = request.get_json()
+        return submit_job(data, request_idempotency_key(data))
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'提交失败: {e}'})
+
+@app.route('/api/jobs/<int:job_id>')
+def get_job(job_id):
+    """任务详情API"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'任务#{job_id}不存在'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消任务API: 排队中的任务直接取消，发送中的任务停止发送"""
+    with sender.lock:
+        running = job_worker.current_job_id == job_id
+        if running:
+            sender.stop_sending()
+    if running:
+        add_log(f"[任务#{job_id}] 正在停止发送...")
+        return jsonify({'success': True, 'message': f'正在停止任务#{job_id}'})
+    if job_queue.cancel(job_id):
+        add_log(f"[任务#{job_id}] 已取消")
+        publish_status()
+        return jsonify({'success': True, 'message': f'任务#{job_id}已取消'})
+    return jsonify({'success': False, 'message': f'任务#{job_id}不存在或已结束'})
+
+@app.route('/api/import', methods=['POST'])
+def import_messages():
+    """
+    批量导入API: 上传CSV/JSONL文件（表单字段file），或直接以请求体发送文件内容
+    发送设置（delay、interval等）通过表单字段或查询参数传入，出错的行在报告中列出
+    """
+    try:
+        require_chat_switch('批量导入')
+        options = parse_send_options(request.values)
+        upload = request.files.get('file')
+        if upload is not None:
+            fmt = request.values.get('format') or detect_format(upload.filename)
+            stream = upload.stream
+        else:
+            default = FORMAT_JSONL if 'json' in request.mimetype else FORMAT_CSV
+            fmt = request.values.get('format') or default
+            stream = request.stream
+        if fmt not in FORMATS:
+            raise ValueError(f'不支持的导入格式: {fmt}')
+        pending = []
+        report = import_stream(open_text(stream), fmt, import_submitter(options, pending))
+        enqueue_imported(pending)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'导入失败: {e}'})
+    
+    if report['jobs']:
+        job_worker.start()
+        scheduler.start()
+        publish_status()
+    message = f"导入 {report['imported']} 条消息，共 {report['jobs']} 个任务，{report['error_count']} 行出错"
+    if 'aborted' in report:
+        message += f"，{report['aborted']}"
+    add_log(message)
+    return jsonify(dict(report, success=True, message=message))
+
+@app.route('/api/schedule', methods=['GET'])
+def list_schedules():
+    """定时任务列表API"""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'schedules': scheduler.list_schedules(limit)})
+
+@app.route('/api/schedule', methods=['POST'])
+def create_schedule():
+    """添加定时任务API（run_at为一次性发送时间，cron为重复规则，二选一）"""
+    try:
+        return submit_schedule(request.get_json())
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'添加失败: {e}'})
+
+@app.route('/api/schedule/<int:schedule_id>')
+def get_schedule(schedule_id):
+    """定时任务详情API"""
+    schedule = scheduler.get(schedule_id)
+    if schedule is None:
+        return jsonify({'success': False, 'message': f'定时任务#{schedule_id}不存在'}), 404
+    return jsonify({'success': True, 'schedule': schedule})
+
+@app.route('/api/schedule/<int:schedule_id>', methods=['DELETE'])
+@app.route('/api/schedule/<int:schedule_id>/cancel', methods=['POST'])
+def cancel_schedule(schedule_id):
+    """取消定时任务API"""
+    if scheduler.cancel(schedule_id):
+        return jsonify({'success': True, 'message': f'定时任务#{schedule_id}已取消'})
+    return jsonify({'success': False, 'message': f'定时任务#{schedule_id}不存在或已结束'})
+
+@app.route('/api/jobs/<int:job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """继续中断（或停止、失败）的任务，从最后确认发送的消息之后开始"""
+    if not job_queue.resume(job_id):
+        return jsonify({'success': False, 'message': f'任务#{job_id}不存在、未结束或已全部发送'})
+    job_worker.start()
+    job = job_queue.get(job_id)
+    add_log(f"[任务#{job_id}] 重新排队，将从第 {job['progress'] + 1}/{job['message_count']} 条继续")
+    publish_status()
+    return jsonify({'success': True, 'message': f'任务#{job_id}已重新排队', 'job_id': job_id,
+                    'position': job['position'], 'progress': job['progress']})
+
+@app.route('/api/plan')
+def action_plans():
+    """查看编译后的输入框选择/清空动作计划及预计耗时（按当前的pyautogui.PAUSE估算）"""
+    select_plan, clear_plan = sender.compile_plans()
+    pause = getattr(sender.backend, 'pause', 0.0)
+    return jsonify({'success': True, 'pause': pause, 'uia': sender.uia_focus.available(),
+                    'anchor': sender.anchor_locator is not None,
+                    'select': select_plan.to_dict(pause), 'clear': clear_plan.to_dict(pause)})
+
+# 停止发送时最多等待发送线程停下的秒数
+STOP_WAIT_TIMEOUT = 5
+
 @app.route('/api/stop', methods=['POST'])
 def stop_sending():
-    """停止发送API"""
+    """停止发送API（停止当前任务，排队中的任务继续执行）"""
     try:
-        sender.stop_sending()
         add_log("正在停止发送...")
-        return jsonify({'success': True, 'message': '已停止发送'})
+        latency = sender.stop_sending(wait=STOP_WAIT_TIMEOUT)
+        publish_status()
+        if latency is None:
+            return jsonify({'success': True, 'message': '已停止发送', 'stop_latency_ms': None})
+        metrics.stop_observed(latency)
+        latency_ms = round(latency * 1000, 1)
+        add_log(f"发送已停止，用时 {latency_ms} 毫秒")
+        return jsonify({'success': True, 'message': f'已停止发送（用时 {latency_ms} 毫秒）',
+                        'stop_latency_ms': latency_ms})
     except Exception as e:
         return jsonify({'success': False, 'message': f'停止失败: {e}'})
 
+@app.route('/api/rate_limit', methods=['GET', 'POST'])
+def rate_limit():
+    """查看或修改每个联系人的限速（条/秒、突发条数），rate为空表示不限制"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            contact_rate = data.get('contact_rate')
+            contact_rate = float(contact_rate) if contact_rate else None
+            contact_burst = int(data.get('contact_burst', 1))
+            if (contact_rate is not None and contact_rate <= 0) or contact_burst < 1:
+                raise ValueError('速率必须大于0，突发条数不能小于1')
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'message': f'限速参数错误: {e}'})
+        sender.contact_limiter.configure(contact_rate=contact_rate, contact_burst=contact_burst)
+    settings = sender.contact_limiter.settings()
+    return jsonify({'success': True, 'contact_rate': settings['contact_rate'],
+                    'contact_burst': settings['contact_burst']})
+
 @app.route('/api/logs')
 def get_logs():
-    """获取日志API"""
-    return jsonify({'logs': message_logs})
+    """获取日志API，带since参数时只返回该序号之后的新日志"""
+    since = request.args.get('since', type=int)
+    return jsonify(message_logs.since(since))
 
 @app.route('/api/status')
 def get_status():
     """获取状态API"""
-    return jsonify({
-        'sending': sender.sending,
-        'system': 'Windows'
-    })
+    return jsonify(current_status())
 
-def create_templates():
-    """创建模板目录和文件"""
-    templates_dir = 'templates'
-    if not os.path.exists(templates_dir):
-        os.makedirs(templates_dir)
-    
-    # 创建HTML模板
-    html_template = '''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>QQ消息发送器 - Windows版本</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 15px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }
-        
-        .header {
-            background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-        }
-        
-        .header h1 {
-            font-size: 2.5em;
-            margin-bottom: 10px;
-        }
-        
-        .header p {
-            opacity: 0.8;
-            font-size: 1.1em;
-        }
-        
-        .content {
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 30px;
-            padding: 30px;
-        }
-        
-        .panel {
-            background: #f8f9fa;
-            border-radius: 10px;
-            padding: 25px;
-        }
-        
-        .panel h3 {
-            color: #2c3e50;
-            margin-bottom: 20px;
-            font-size: 1.3em;
-        }
-        
-        .form-group {
-            margin-bottom: 20px;
-        }
-        
-        .form-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #2c3e50;
-        }
-        
-        .form-control {
-            width: 100%;
-            padding: 12px;
-            border: 2px solid #e9ecef;
-            border-radius: 8px;
-            font-size: 14px;
-            transition: border-color 0.3s;
-        }
-        
-        .form-control:focus {
-            outline: none;
-            border-color: #3498db;
-        }
-        
-        .radio-group {
-            display: flex;
-            gap: 20px;
-            margin-bottom: 20px;
-        }
-        
-        .radio-item {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }
-        
-        .radio-item input[type="radio"] {
-            transform: scale(1.2);
-        }
-        
-        .btn {
-            padding: 12px 24px;
-            border: none;
-            border-radius: 8px;
-            font-size: 14px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s;
-            margin-right: 10px;
-        }
-        
-        .btn-primary {
-            background: #3498db;
-            color: white;
-        }
-        
-        .btn-primary:hover {
-            background: #2980b9;
-        }
-        
-        .btn-danger {
-            background: #e74c3c;
-            color: white;
-        }
-        
-        .btn-danger:hover {
-            background: #c0392b;
-        }
-        
-        .btn-secondary {
-            background: #95a5a6;
-            color: white;
-        }
-        
-        .btn-secondary:hover {
-            background: #7f8c8d;
-        }
-        
-        .btn:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-        }
-        
-        .settings-grid {
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 15px;
-        }
-        
-        .log-container {
-            background: #2c3e50;
-            color: #ecf0f1;
-            border-radius: 8px;
-            padding: 15px;
-            height: 300px;
-            overflow-y: auto;
-            font-family: 'Courier New', monospace;
-            font-size: 12px;
-            line-height: 1.4;
-        }
-        
-        .log-entry {
-            margin-bottom: 5px;
-            padding: 2px 0;
-        }
-        
-        .log-timestamp {
-            color: #3498db;
-        }
-        
-        .progress-bar {
-            width: 100%;
-            height: 8px;
-            background: #e9ecef;
-            border-radius: 4px;
-            overflow: hidden;
-            margin-top: 15px;
-        }
-        
-        .progress-fill {
-            height: 100%;
-            background: #3498db;
-            width: 0%;
-            transition: width 0.3s;
-        }
-        
-        .status-indicator {
-            display: inline-block;
-            width: 12px;
-            height: 12px;
-            border-radius: 50%;
-            margin-right: 8px;
-        }
-        
-        .status-idle {
-            background: #95a5a6;
-        }
-        
-        .status-sending {
-            background: #f39c12;
-            animation: pulse 1s infinite;
-        }
-        
-        @keyframes pulse {
-            0% { opacity: 1; }
-            50% { opacity: 0.5; }
-            100% { opacity: 1; }
-        }
-        
-        .hidden {
-            display: none;
-        }
-        
-        @media (max-width: 768px) {
-            .content {
-                grid-template-columns: 1fr;
-                gap: 20px;
-                padding: 20px;
-            }
-            
-            .settings-grid {
-                grid-template-columns: 1fr;
-            }
-            
-            .header h1 {
-                font-size: 2em;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🚀 QQ消息发送器</h1>
-            <p>Windows平台QQ消息自动发送工具 - Web版本</p>
-        </div>
-        
-        <div class="content">
-            <!-- 左侧面板 -->
-            <div class="panel">
-                <h3>📝 消息设置</h3>
-                
-                <!-- 联系人设置 -->
-                <div class="form-group">
-                    <label for="contact">联系人名称 (可选):</label>
-                    <input type="text" id="contact" class="form-control" placeholder="输入联系人名称，留空则发送给当前聊天窗口">
-                    <small style="color: #7f8c8d; margin-top: 5px; display: block;">
-                        💡 留空则发送给当前聊天窗口
-                    </small>
-                </div>
-                
-                <!-- 消息类型选择 -->
-                <div class="form-group">
-                    <label>消息类型:</label>
-                    <div class="radio-group">
-                        <div class="radio-item">
-                            <input type="radio" id="single" name="messageType" value="single" checked>
-                            <label for="single">单条消息</label>
-                        </div>
-                        <div class="radio-item">
-                            <input type="radio" id="multiple" name="messageType" value="multiple">
-                            <label for="multiple">多条消息</label>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- 单条消息输入 -->
-                <div class="form-group" id="singleMessageGroup">
-                    <label for="singleMessage">消息内容:</label>
-                    <input type="text" id="singleMessage" class="form-control" placeholder="输入要发送的消息">
-                </div>
-                
-                <!-- 多条消息输入 -->
-                <div class="form-group hidden" id="multipleMessageGroup">
-                    <label for="multipleMessage">多条消息 (每行一条):</label>
-                    <textarea id="multipleMessage" class="form-control" rows="6" placeholder="输入多条消息，每行一条"></textarea>
-                </div>
-                
-                <!-- 发送设置 -->
-                <div class="form-group">
-                    <label>发送设置:</label>
-                    <div class="settings-grid">
-                        <div>
-                            <label for="delay">延迟时间 (秒):</label>
-                            <input type="number" id="delay" class="form-control" value="3" min="1" max="60">
-                        </div>
-                        <div>
-                            <label for="interval">消息间隔 (秒):</label>
-                            <input type="number" id="interval" class="form-control" value="2" min="1" max="60">
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- 自动选中选项 -->
-                <div class="form-group">
-                    <label>输入框选择:</label>
-                    <div class="radio-group">
-                        <div class="radio-item">
-                            <input type="radio" id="autoSelect" name="selectMode" value="auto" checked>
-                            <label for="autoSelect">自动选中输入框 (推荐)</label>
-                        </div>
-                        <div class="radio-item">
-                            <input type="radio" id="manualSelect" name="selectMode" value="manual">
-                            <label for="manualSelect">手动选中输入框</label>
-                        </div>
-                    </div>
-                    <small style="color: #7f8c8d; margin-top: 5px; display: block;">
-                        💡 自动选中模式会尝试自动定位和选中QQ输入框，无需手动操作
-                    </small>
-                </div>
-                
-                <!-- 控制按钮 -->
-                <div class="form-group">
-                    <button id="sendBtn" class="btn btn-primary">🚀 发送消息</button>
-                    <button id="stopBtn" class="btn btn-danger" disabled>⏹️ 停止发送</button>
-                    <button id="clearBtn" class="btn btn-secondary">🗑️ 清空内容</button>
-                </div>
-            </div>
-            
-            <!-- 右侧面板 -->
-            <div class="panel">
-                <h3>📊 状态信息</h3>
-                
-                <!-- 状态指示器 -->
-                <div class="form-group">
-                    <div>
-                        <span class="status-indicator status-idle" id="statusIndicator"></span>
-                        <span id="statusText">系统就绪</span>
-                    </div>
-                </div>
-                
-                <!-- 进度条 -->
-                <div class="progress-bar">
-                    <div class="progress-fill" id="progressFill"></div>
-                </div>
-                
-                <!-- 日志显示 -->
-                <div class="form-group">
-                    <label>操作日志:</label>
-                    <div class="log-container" id="logContainer">
-                        <div class="log-entry">
-                            <span class="log-timestamp">[系统]</span> Web界面已启动，请确保QQ窗口处于活动状态
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        // 全局变量
-        let isSending = false;
-        let logUpdateInterval;
-        
-        // DOM元素
-        const sendBtn = document.getElementById('sendBtn');
-        const stopBtn = document.getElementById('stopBtn');
-        const clearBtn = document.getElementById('clearBtn');
-        const statusIndicator = document.getElementById('statusIndicator');
-        const statusText = document.getElementById('statusText');
-        const logContainer = document.getElementById('logContainer');
-        const progressFill = document.getElementById('progressFill');
-        
-        // 消息类型切换
-        document.querySelectorAll('input[name="messageType"]').forEach(radio => {
-            radio.addEventListener('change', function() {
-                const singleGroup = document.getElementById('singleMessageGroup');
-                const multipleGroup = document.getElementById('multipleMessageGroup');
-                
-                if (this.value === 'single') {
-                    singleGroup.classList.remove('hidden');
-                    multipleGroup.classList.add('hidden');
-                } else {
-                    singleGroup.classList.add('hidden');
-                    multipleGroup.classList.remove('hidden');
-                }
-            });
-        });
-        
-        // 发送消息
-        sendBtn.addEventListener('click', async function() {
-            if (isSending) return;
-            
-            const messageType = document.querySelector('input[name="messageType"]:checked').value;
-            const contact = document.getElementById('contact').value;
-            const delay = parseInt(document.getElementById('delay').value);
-            const interval = parseInt(document.getElementById('interval').value);
-            const autoSelect = document.querySelector('input[name="selectMode"]:checked').value === 'auto';
-            
-            let messages = [];
-            if (messageType === 'single') {
-                const message = document.getElementById('singleMessage').value.trim();
-                if (!message) {
-                    alert('请输入要发送的消息');
-                    return;
-                }
-                messages = [message];
-            } else {
-                const text = document.getElementById('multipleMessage').value.trim();
-                if (!text) {
-                    alert('请输入要发送的消息');
-                    return;
-                }
-                messages = text.split('\\n').filter(line => line.trim());
-            }
-            
-            const data = {
-                message_type: messageType,
-                contact: contact,
-                delay: delay,
-                interval: interval,
-                auto_select: autoSelect,
-                single_message: document.getElementById('singleMessage').value,
-                multiple_messages: document.getElementById('multipleMessage').value
-            };
-            
-            try {
-                const response = await fetch('/api/send', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify(data)
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    setSendingState(true);
-                    startLogUpdates();
-                } else {
-                    alert(result.message);
-                }
-            } catch (error) {
-                alert('发送失败: ' + error.message);
-            }
-        });
-        
-        // 停止发送
-        stopBtn.addEventListener('click', async function() {
-            try {
-                const response = await fetch('/api/stop', {
-                    method: 'POST'
-                });
-                
-                const result = await response.json();
-                if (result.success) {
-                    setSendingState(false);
-                    stopLogUpdates();
-                }
-            } catch (error) {
-                alert('停止失败: ' + error.message);
-            }
-        });
-        
-        // 清空内容
-        clearBtn.addEventListener('click', function() {
-            document.getElementById('contact').value = '';
-            document.getElementById('singleMessage').value = '';
-            document.getElementById('multipleMessage').value = '';
-            document.getElementById('delay').value = '3';
-            document.getElementById('interval').value = '2';
-            addLog('内容已清空', 'system');
-        });
-        
-        // 设置发送状态
-        function setSendingState(sending) {
-            isSending = sending;
-            sendBtn.disabled = sending;
-            stopBtn.disabled = !sending;
-            
-            if (sending) {
-                statusIndicator.className = 'status-indicator status-sending';
-                statusText.textContent = '正在发送消息...';
-            } else {
-                statusIndicator.className = 'status-indicator status-idle';
-                statusText.textContent = '系统就绪';
-            }
-        }
-        
-        // 添加日志
-        function addLog(message, type = 'info') {
-            const timestamp = new Date().toLocaleTimeString();
-            const logEntry = document.createElement('div');
-            logEntry.className = 'log-entry';
-            logEntry.innerHTML = `<span class="log-timestamp">[${timestamp}]</span> ${message}`;
-            logContainer.appendChild(logEntry);
-            logContainer.scrollTop = logContainer.scrollHeight;
-        }
-        
-        // 开始日志更新
-        function startLogUpdates() {
-            logUpdateInterval = setInterval(updateLogs, 1000);
-        }
-        
-        // 停止日志更新
-        function stopLogUpdates() {
-            if (logUpdateInterval) {
-                clearInterval(logUpdateInterval);
-                logUpdateInterval = null;
-            }
-        }
-        
-        // 更新日志
-        async function updateLogs() {
-            try {
-                const response = await fetch('/api/logs');
-                const data = await response.json();
-                
-                // 清空日志容器
-                logContainer.innerHTML = '';
-                
-                // 添加日志条目
-                data.logs.forEach(log => {
-                    const logEntry = document.createElement('div');
-                    logEntry.className = 'log-entry';
-                    logEntry.innerHTML = `<span class="log-timestamp">[${log.timestamp}]</span> ${log.message}`;
-                    logContainer.appendChild(logEntry);
-                });
-                
-                logContainer.scrollTop = logContainer.scrollHeight;
-                
-                // 检查发送状态
-                const statusResponse = await fetch('/api/status');
-                const statusData = await statusResponse.json();
-                
-                if (!statusData.sending && isSending) {
-                    setSendingState(false);
-                    stopLogUpdates();
-                }
-                
-            } catch (error) {
-                console.error('更新日志失败:', error);
-            }
-        }
-        
-        // 页面加载时检查状态
-        window.addEventListener('load', async function() {
-            try {
-                const response = await fetch('/api/status');
-                const data = await response.json();
-                
-                if (data.sending) {
-                    setSendingState(true);
-                    startLogUpdates();
-                }
-            } catch (error) {
-                console.error('检查状态失败:', error);
-            }
-        });
-    </script>
-</body>
-</html>'''
-    
-    # 写入HTML文件
-    html_file = os.path.join(templates_dir, 'index.html')
-    with open(html_file, 'w', encoding='utf-8') as f:
-        f.write(html_template)
-    
-    print(f"✅ 模板文件已创建: {html_file}")
+@app.route('/api/metrics')
+def get_metrics():
+    """指标API（Prometheus文本格式）"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/events')
+def stream_events():
+    """
+    事件推送API（SSE）: 实时推送日志(log)、日志缺失(dropped)和状态变化(status)
+    启动标识和日志序号作为事件ID，连接建立时先推送启动标识和最新序号(sync)
+    """
+    # 断线重连时浏览器会带上最后收到的事件ID，首次连接可用since参数，先补发缺失的日志
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id:
+        since = parse_log_event_id(last_event_id)
+    else:
+        since = request.args.get('since', type=int)
+    with log_lock:
+        subscriber = event_bus.subscribe()
+        # 客户端在补发的日志之前收到，服务器已重启时先重置已收到的序号
+        subscriber.put_nowait(('sync', {'boot_id': BOOT_ID, 'last_seq': message_logs.last_seq}, None))
+        missed = message_logs.since(since) if since is not None else None
+    if missed is not None:
+        # 补发的日志最多占用订阅队列的一半
+        keep = event_bus.queue_size // 2
+        logs = missed['logs']
+        dropped = missed['dropped'] + max(0, len(logs) - keep)
+        if dropped:
+            subscriber.put_nowait(('dropped', {'dropped': dropped}, None))
+        for log_entry in logs[-keep:]:
+            subscriber.put_nowait(('log', log_entry, log_event_id(log_entry['seq'])))
+    # 连接建立时先推送一次当前状态
+    subscriber.put_nowait(('status', current_status(), None))
+    response = Response(stream_with_context(event_bus.stream(subscriber)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def parse_args():
+    """命令行参数"""
+    parser = argparse.ArgumentParser(description="QQ消息发送器 - Web界面")
+    parser.add_argument('--server', choices=SERVERS, default=SERVER_DEV,
+                        help="运行方式: dev(开发服务器) / threaded(固定线程池) / waitress")
+    parser.add_argument('--host', default='0.0.0.0', help="监听地址")
+    parser.add_argument('--port', type=int, default=5000, help="监听端口")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help="HTTP线程数（threaded/waitress）")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help="连接超时秒数，包括keep-alive空闲时间（threaded/waitress）")
+    parser.add_argument('--backlog', type=int, default=DEFAULT_BACKLOG,
+                        help="线程都忙时最多排队的连接数（threaded/waitress）")
+    parser.add_argument('--background', action='store_true',
+                        help="后台发送（仅Windows）: 把文字和回车直接投递到QQ窗口，QQ不需要在前台，跳过倒计时")
+    parser.add_argument('--window-title', default='QQ', help="后台发送的目标窗口标题关键字")
+    parser.add_argument('--anchor-image', help="锚点图片: 从QQ聊天窗口截取的一小块（如输入框上方的工具栏），"
+                                               "UI Automation不可用时按它定位输入框")
+    parser.add_argument('--anchor-offset', type=parse_offset, default=DEFAULT_OFFSET,
+                        help="输入框点击位置相对锚点中心的偏移，格式 dx,dy（默认 %(default)s）")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    # 创建模板
-    create_templates()
+    args = parse_args()
     
     print("🚀 QQ消息发送器 - Windows版本")
     print("=" * 50)
-    print("正在启动Web服务器...")
-    print("启动后请在浏览器中访问: http://localhost:5000")
+    print(f"正在启动Web服务器（{args.server}）...")
+    print(f"启动后请在浏览器中访问: http://localhost:{args.port}")
     print("=" * 50)
     
-    # 启动Flask应用
-    app.run(host='0.0.0.0', port=5000, debug=False) 
\ No newline at end of file
+    if args.background:
+        sender.use_backend(WindowMessageBackend(args.window_title))
+    if args.anchor_image:
+        sender.anchor_locator = AnchorLocator(args.anchor_image, args.anchor_offset, sender.backend)
+    init_services()
+    
+    # 上次退出时正在发送的任务不会自动继续，提示可以从断点继续
+    for job in job_queue.list_interrupted():
+        add_log(f"[任务#{job['id']}] 上次在发送 {job['progress']}/{job['message_count']} 条后中断，"
+                f"可在页面上或通过 POST /api/jobs/{job['id']}/resume 继续")
+    
+    # 启动发送线程（继续执行上次未开始的排队任务）和定时线程
+    job_worker.start()
+    scheduler.start()
+    
+    # 启动Web服务（HTTP线程只处理请求，发送始终由上面的单个发送线程完成）
+    serve(app, args.server, args.host, args.port, args.threads, args.timeout, args.backlog) 
\ No newline at end of file
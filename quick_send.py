@@ -4,11 +4,15 @@
 QQ快速发送脚本 - 简化版本
 """
 
-import pyautogui
 import time
 import sys
 import platform
 
+from input_backend import get_backend, set_backend
+from input_engine import InputEngine
+from waits import Waiter
+from window_message_backend import WindowMessageBackend
+
 def check_system():
     """检查系统并显示相应提示"""
     system = platform.system()
@@ -21,30 +25,39 @@ def check_system():
     else:
         print(f"未知系统: {system}")
 
-def quick_send(message, delay=3):
+def quick_send(message, delay=3, backend=None):
     """
     快速发送消息到QQ
     
     Args:
         message: 要发送的消息
         delay: 延迟时间（秒），给用户时间切换到QQ窗口
+        backend: 输入后端（可选，默认使用pyautogui）
     """
-    print(f"将在 {delay} 秒后发送消息: {message}")
-    print("请确保QQ窗口处于活动状态，光标在输入框中")
-    print("提示：将鼠标移动到屏幕左上角可紧急停止脚本")
+    backend = backend or get_backend()
+    waiter = Waiter(backend)
     
-    # 倒计时
-    for i in range(delay, 0, -1):
-        print(f"倒计时: {i} 秒...")
-        time.sleep(1)
+    if backend.background:
+        # 后台输入直接送到QQ窗口，不需要倒计时切换窗口
+        print(f"后台发送消息到QQ窗口: {message}")
+    else:
+        print(f"将在 {delay} 秒后发送消息: {message}")
+        print("请确保QQ窗口处于活动状态，光标在输入框中")
+        print("提示：将鼠标移动到屏幕左上角可紧急停止脚本")
+        
+        # 倒计时
+        for i in range(delay, 0, -1):
+            print(f"倒计时: {i} 秒...")
+            time.sleep(1)
     
     try:
-        # 输入消息
-        pyautogui.write(message)
-        time.sleep(0.5)
+        # 输入消息（长消息或中文使用剪贴板粘贴），等待文字出现在输入框
+        typed = waiter.region_changed_probe(waiter.input_box_region())
+        InputEngine(backend=backend).input_text(message)
+        waiter.wait_for(typed, timeout=1, fallback=0 if backend.background else 0.5)
         
         # 发送消息
-        pyautogui.press('enter')
+        backend.press('enter')
         
         print("消息发送成功！")
         
@@ -55,18 +68,28 @@ def quick_send(message, delay=3):
 def main():
     """主函数"""
     # 设置pyautogui
-    pyautogui.FAILSAFE = True
-    pyautogui.PAUSE = 0.3
+    get_backend().configure(failsafe=True, pause=0.3)
     
     print("=== QQ快速发送脚本 ===")
     check_system()
     print("使用方法: python quick_send.py '消息内容'")
     print("或者直接运行脚本，然后输入消息")
+    print("加上 --background 时后台发送到QQ窗口（仅Windows），不需要切换窗口")
     print()
     
+    # --background: 使用后台窗口消息输入
+    args = sys.argv[1:]
+    if '--background' in args:
+        args.remove('--background')
+        try:
+            set_backend(WindowMessageBackend())
+        except RuntimeError as e:
+            print(e)
+            return
+    
     # 检查命令行参数
-    if len(sys.argv) > 1:
-        message = sys.argv[1]
+    if args:
+        message = args[0]
         quick_send(message)
     else:
         # 交互式输入
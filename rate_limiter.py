@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+令牌桶限速
+按持续速率和突发条数控制发送节奏，可同时限制总速率和每个联系人的速率，
+短时间内允许连续发送若干条，长时间窗口内仍不超过设定速率
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# 未指定联系人时使用的桶（当前聊天窗口）
+CURRENT_CHAT = None
+
+
+def rate_from_interval(interval: float) -> Optional[float]:
+    """把消息间隔（秒）换算为速率（条/秒），间隔不大于0时不限速"""
+    interval = float(interval)
+    return 1.0 / interval if interval > 0 else None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数（持续速率，条/秒）
+            burst: 桶容量，即最多可连续发送的条数
+            clock: 单调时钟
+        """
+        if rate <= 0:
+            raise ValueError(f"速率必须大于0: {rate}")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """距离可以取出一个令牌还需等待的秒数"""
+        self._refill(self.clock() if now is None else now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: Optional[float] = None):
+        """取出一个令牌（调用前应确认wait_time为0）"""
+        self._refill(self.clock() if now is None else now)
+        self.tokens -= 1
+
+
+class RateLimiter:
+    def __init__(self, rate: Optional[float] = None, burst: int = 1,
+                 contact_rate: Optional[float] = None, contact_burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化限速器
+
+        Args:
+            rate: 总速率（条/秒），None表示不限制
+            burst: 总突发条数
+            contact_rate: 每个联系人的速率（条/秒），None表示不限制
+            contact_burst: 每个联系人的突发条数
+            clock: 单调时钟
+        """
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.configure(rate, burst, contact_rate, contact_burst)
+
+    def configure(self, rate: Optional[float] = None, burst: int = 1,
+                  contact_rate: Optional[float] = None, contact_burst: int = 1):
+        """修改限速参数（已有的令牌状态会被重置）"""
+        with self.lock:
+            self.rate = rate
+            self.burst = max(1, int(burst))
+            self.contact_rate = contact_rate
+            self.contact_burst = max(1, int(contact_burst))
+            self.bucket = TokenBucket(rate, self.burst, self.clock) if rate else None
+            self.contact_buckets: Dict[Optional[str], TokenBucket] = {}
+
+    def settings(self) -> dict:
+        """当前限速参数"""
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'contact_rate': self.contact_rate,
+            'contact_burst': self.contact_burst,
+        }
+
+    def _buckets(self, contact: Optional[str]):
+        buckets = []
+        if self.bucket is not None:
+            buckets.append(self.bucket)
+        if self.contact_rate:
+            bucket = self.contact_buckets.get(contact)
+            if bucket is None:
+                bucket = self.contact_buckets[contact] = TokenBucket(
+                    self.contact_rate, self.contact_burst, self.clock)
+            buckets.append(bucket)
+        return buckets
+
+    def wait_time(self, contact: Optional[str] = CURRENT_CHAT) -> float:
+        """向该联系人发送下一条消息前还需等待的秒数"""
+        with self.lock:
+            now = self.clock()
+            return max([bucket.wait_time(now) for bucket in self._buckets(contact)], default=0.0)
+
+    def try_acquire(self, contact: Optional[str] = CURRENT_CHAT) -> float:
+        """
+        尝试取得一次发送配额
+        返回: 0表示已取得，否则为还需等待的秒数（此时不消耗任何令牌）
+        """
+        with self.lock:
+            now = self.clock()
+            buckets = self._buckets(contact)
+            wait = max([bucket.wait_time(now) for bucket in buckets], default=0.0)
+            if wait <= 0:
+                for bucket in buckets:
+                    bucket.consume(now)
+            return wait
+
+    def acquire(self, contact: Optional[str] = CURRENT_CHAT,
+                should_continue: Optional[Callable[[], bool]] = None,
+                poll_interval: float = 0.1, cancel=None) -> bool:
+        """
+        等待直到可以发送下一条消息
+        等待期间每隔poll_interval秒检查一次should_continue，返回False时放弃等待；
+        cancel为取消令牌（cancellation.CancelToken）时，取消后立即放弃等待
+        返回: 是否取得了发送配额
+        """
+        while True:
+            if should_continue is not None and not should_continue():
+                return False
+            if cancel is not None and cancel.cancelled:
+                return False
+            wait = self.try_acquire(contact)
+            if wait <= 0:
+                return True
+            if cancel is not None:
+                # 令牌恢复前一直等待，取消时立即被唤醒
+                if cancel.wait(wait):
+                    return False
+            else:
+                time.sleep(min(wait, poll_interval) if should_continue is not None else wait)
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定时发送
+一次性和按cron表达式重复的定时任务保存在SQLite中，按下次触发时间放入最小堆，
+由单个线程等待到最早的触发时间，到期后把消息加入发送队列
+"""
+
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from job_queue import DEFAULT_DB_FILE
+
+# 定时任务状态
+SCHEDULE_ACTIVE = 'active'        # 等待触发
+SCHEDULE_DONE = 'done'            # 一次性任务已触发
+SCHEDULE_CANCELLED = 'cancelled'  # 已取消
+SCHEDULE_STATES = (SCHEDULE_ACTIVE, SCHEDULE_DONE, SCHEDULE_CANCELLED)
+
+# 等待的最长时间（秒），系统时间被调整时最多晚这么久发现
+MAX_WAIT = 300
+# 一次性任务加入发送队列失败后重试的间隔（秒）
+FIRE_RETRY_DELAY = 60
+
+_CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+    '@yearly': '0 0 1 1 *',
+}
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS schedules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    state TEXT NOT NULL,
+    cron TEXT,
+    contact TEXT,
+    messages TEXT NOT NULL,
+    options TEXT NOT NULL,
+    next_run REAL,
+    last_run REAL,
+    last_job_id INTEGER,
+    fire_count INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_schedules_state ON schedules (state);
+'''
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _format_time(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_run_at(value) -> float:
+    """解析发送时间: 时间戳（秒）或ISO格式的本地时间（如 2024-01-01T08:00）"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).strip()).timestamp()
+    except ValueError:
+        raise ValueError(f"发送时间格式错误: {value}")
+
+
+def parse_when(value: str) -> Tuple[Optional[float], Optional[str]]:
+    """
+    解析发送时间或重复规则（cron表达式或@daily等别名）
+    返回: (run_at, cron)，其中一个为None
+
+    Raises:
+        ValueError: 格式错误
+    """
+    text = str(value).strip()
+    if text.startswith('@') or len(text.split()) == 5:
+        CronExpression(text)
+        return None, text
+    return parse_run_at(text), None
+
+
+def _parse_field(text: str, low: int, high: int) -> Set[int]:
+    """解析cron的一个字段: *、*/n、a、a-b、a-b/n 以及逗号分隔的组合"""
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"步长必须大于0: {text}")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_text, end_text = part.split('-', 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"超出范围 {low}-{high}: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    def __init__(self, expression: str):
+        """
+        解析cron表达式: 分 时 日 月 周（周日为0或7），也支持@hourly/@daily/@weekly/@monthly/@yearly
+
+        Raises:
+            ValueError: 表达式格式错误
+        """
+        self.expression = expression.strip()
+        fields = _CRON_ALIASES.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式需要5个字段: {expression}")
+        try:
+            self.minutes = _parse_field(fields[0], 0, 59)
+            self.hours = _parse_field(fields[1], 0, 23)
+            self.days = _parse_field(fields[2], 1, 31)
+            self.months = _parse_field(fields[3], 1, 12)
+            weekdays = _parse_field(fields[4], 0, 7)
+        except ValueError as e:
+            raise ValueError(f"cron表达式错误: {e}")
+        self.weekdays = {day % 7 for day in weekdays}
+        # 日和周都有限制时满足其一即可（与cron一致）
+        self.any_day = fields[2].startswith('*')
+        self.any_weekday = fields[4].startswith('*')
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """after之后（不含）的下一个触发时间"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + 8
+        while moment.year <= limit:
+            if moment.month not in self.months:
+                if moment.month == 12:
+                    moment = moment.replace(year=moment.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    moment = moment.replace(month=moment.month + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment
+        raise ValueError(f"cron表达式没有可触发的时间: {self.expression}")
+
+
+class Scheduler:
+    def __init__(self, on_fire: Callable[[Dict], Optional[int]], db_file: str = DEFAULT_DB_FILE,
+                 clock: Callable[[], float] = time.time):
+        """
+        打开（或创建）定时任务数据库
+
+        Args:
+            on_fire: 定时任务到期时的回调，参数为定时任务（含消息），返回加入队列的任务ID
+            db_file: SQLite数据库文件路径
+            clock: 返回当前时间戳的函数
+        """
+        self.on_fire = on_fire
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.executescript(_SCHEMA)
+        # 最小堆: [(下次触发时间, 定时任务ID), ...]，取消或改期后旧条目在出堆时丢弃
+        self.heap = []
+        self.pending: Dict[int, float] = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self._load()
+
+    def _load(self):
+        """载入等待触发的定时任务，程序未运行期间错过的重复任务从现在起重新计算"""
+        now = self.clock()
+        with self.lock:
+            rows = self.conn.execute("SELECT id, cron, next_run FROM schedules WHERE state = ?",
+                                     (SCHEDULE_ACTIVE,)).fetchall()
+        for row in rows:
+            next_run = row['next_run']
+            if row['cron'] and next_run < now:
+                next_run = self._next_cron_run(row['cron'], now)
+                with self.lock, self.conn:
+                    self.conn.execute("UPDATE schedules SET next_run = ? WHERE id = ?", (next_run, row['id']))
+            self._push(row['id'], next_run)
+
+    def _next_cron_run(self, cron: str, after: float) -> float:
+        return CronExpression(cron).next_after(datetime.fromtimestamp(after)).timestamp()
+
+    def _push(self, schedule_id: int, next_run: float):
+        with self.condition:
+            self.pending[schedule_id] = next_run
+            heapq.heappush(self.heap, (next_run, schedule_id))
+            # 新的最早触发时间需要唤醒等待线程
+            if self.heap[0][1] == schedule_id:
+                self.condition.notify()
+
+    def add(self, messages: List[str], contact: Optional[str] = None, options: Optional[Dict] = None,
+            run_at: Optional[float] = None, cron: Optional[str] = None) -> int:
+        """
+        添加定时任务，run_at（时间戳）和cron二选一
+        返回: 定时任务ID
+
+        Raises:
+            ValueError: 参数错误
+        """
+        if (run_at is None) == (not cron):
+            raise ValueError("请指定发送时间或cron表达式（二选一）")
+        next_run = self._next_cron_run(cron, self.clock()) if cron else float(run_at)
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO schedules (state, cron, contact, messages, options, next_run, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (SCHEDULE_ACTIVE, cron or None, contact, json.dumps(messages, ensure_ascii=False),
+                 json.dumps(options or {}, ensure_ascii=False), next_run, _now()))
+            schedule_id = cursor.lastrowid
+        self._push(schedule_id, next_run)
+        return schedule_id
+
+    def cancel(self, schedule_id: int) -> bool:
+        """
+        取消等待触发的定时任务
+        返回: 是否取消成功
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute("UPDATE schedules SET state = ?, next_run = NULL WHERE id = ? AND state = ?",
+                                       (SCHEDULE_CANCELLED, schedule_id, SCHEDULE_ACTIVE))
+        with self.condition:
+            self.pending.pop(schedule_id, None)
+        return cursor.rowcount > 0
+
+    def get(self, schedule_id: int, with_messages: bool = False) -> Optional[Dict]:
+        """获取定时任务信息，不存在时返回None"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM schedules WHERE id = ?", (schedule_id,)).fetchone()
+        return self._row_to_schedule(row, with_messages) if row is not None else None
+
+    def list_schedules(self, limit: int = 50) -> List[Dict]:
+        """所有等待触发的定时任务（按触发时间）以及最近结束的定时任务"""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM schedules WHERE state = ? ORDER BY next_run",
+                                     (SCHEDULE_ACTIVE,)).fetchall()
+            rows += self.conn.execute("SELECT * FROM schedules WHERE state != ? ORDER BY id DESC LIMIT ?",
+                                      (SCHEDULE_ACTIVE, limit)).fetchall()
+        return [self._row_to_schedule(row) for row in rows]
+
+    def count_pending(self) -> int:
+        """等待触发的定时任务数"""
+        with self.condition:
+            return len(self.pending)
+
+    def start(self):
+        """启动等待线程（重复调用无效）"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name='scheduler')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _next_due(self) -> Optional[int]:
+        """等待到最早的定时任务到期，返回其ID"""
+        with self.condition:
+            while True:
+                # 丢弃已取消或已改期的旧条目
+                while self.heap and self.pending.get(self.heap[0][1]) != self.heap[0][0]:
+                    heapq.heappop(self.heap)
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                next_run, schedule_id = self.heap[0]
+                delay = next_run - self.clock()
+                if delay > 0:
+                    self.condition.wait(min(delay, MAX_WAIT))
+                    continue
+                heapq.heappop(self.heap)
+                del self.pending[schedule_id]
+                return schedule_id
+
+    def _run(self):
+        while True:
+            schedule_id = self._next_due()
+            try:
+                self._fire(schedule_id)
+            except Exception as e:
+                print(f"定时任务#{schedule_id}触发失败: {e}")
+
+    def _fire(self, schedule_id: int):
+        schedule = self.get(schedule_id, with_messages=True)
+        if schedule is None or schedule['state'] != SCHEDULE_ACTIVE:
+            return
+
+        now = self.clock()
+        try:
+            job_id = self.on_fire(schedule)
+        except Exception as e:
+            # 出堆后回调失败不能丢失: 重复任务等下次触发，一次性任务稍后重试
+            if schedule['cron']:
+                retry_at = self._next_cron_run(schedule['cron'], now)
+            else:
+                retry_at = now + FIRE_RETRY_DELAY
+            print(f"定时任务#{schedule_id}加入发送队列失败，{_format_time(retry_at)} 重试: {e}")
+            self._reschedule(schedule_id, retry_at)
+            return
+        if schedule['cron']:
+            next_run = self._next_cron_run(schedule['cron'], now)
+            state = SCHEDULE_ACTIVE
+        else:
+            next_run = None
+            state = SCHEDULE_DONE
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE schedules SET state = ?, next_run = ?, last_run = ?, last_job_id = ?, "
+                "fire_count = fire_count + 1 WHERE id = ? AND state = ?",
+                (state, next_run, now, job_id, schedule_id, SCHEDULE_ACTIVE))
+        # 触发期间被取消的不再放回
+        if next_run is not None and cursor.rowcount > 0:
+            self._push(schedule_id, next_run)
+
+    def _reschedule(self, schedule_id: int, next_run: float):
+        """改为在next_run触发（期间被取消的不再放回）"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute("UPDATE schedules SET next_run = ? WHERE id = ? AND state = ?",
+                                       (next_run, schedule_id, SCHEDULE_ACTIVE))
+        if cursor.rowcount > 0:
+            self._push(schedule_id, next_run)
+
+    @staticmethod
+    def _row_to_schedule(row, with_messages: bool = False) -> Dict:
+        messages = json.loads(row['messages'])
+        schedule = {
+            'id': row['id'],
+            'state': row['state'],
+            'cron': row['cron'],
+            'contact': row['contact'],
+            'message_count': len(messages),
+            'options': json.loads(row['options']),
+            'next_run': _format_time(row['next_run']),
+            'last_run': _format_time(row['last_run']),
+            'last_job_id': row['last_job_id'],
+            'fire_count': row['fire_count'],
+            'created_at': row['created_at'],
+        }
+        if with_messages:
+            schedule['messages'] = messages
+        return schedule
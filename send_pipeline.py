@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送流水线
+把每条消息的发送拆成两步: 准备（生成并校验消息、检查QQ窗口是否在前台、记录输入框截图）和
+界面操作（清空、放入剪贴板并输入、回车）。每条消息在上一条回车后、限速等待之前准备，
+令牌桶在准备期间照常恢复，准备时间因此被等待时间抵消，等待结束时只剩下必须的界面操作。
+剪贴板在输入前才放入（等待期间不占用用户的剪贴板），切换聊天后由capture()重新截取输入框
+"""
+
+from typing import Optional, Sequence
+
+from input_engine import InputEngine
+from waits import Waiter, Probe
+
+
+class PreparedMessage:
+    """一条准备好的消息"""
+
+    def __init__(self, index: int):
+        # 消息序号（从1开始）
+        self.index = index
+        self.text = None
+        # 准备时QQ窗口是否在前台（无法判断时视为在前台）
+        self.focused = True
+        # 输入框区域及输入前的截图，用于确认文字已出现、回车后已清空
+        self.box_region = None
+        self.empty_box = None
+        # 准备时出现的错误，轮到这一条消息时再处理
+        self.error: Optional[Exception] = None
+
+
+class SendPipeline:
+    def __init__(self, messages: Sequence[str], input_engine: InputEngine, waiter: Waiter,
+                 focus_probe: Optional[Probe] = None):
+        """
+        Args:
+            messages: 消息列表（模板任务为按需生成的RenderedMessages）
+            input_engine: 输入引擎
+            waiter: 等待器，用于获取输入框区域和截图
+            focus_probe: QQ窗口在前台的探测函数，为None时不检查
+        """
+        self.messages = messages
+        self.input_engine = input_engine
+        self.waiter = waiter
+        self.focus_probe = focus_probe
+
+    def prepare(self, index: int) -> PreparedMessage:
+        """
+        准备第index条消息（从1开始）
+        不抛出异常，错误记录在返回值的error中
+        """
+        prepared = PreparedMessage(index)
+        try:
+            # 模板任务在这里才生成这一条消息
+            text = self.messages[index - 1]
+            if not text or not text.strip():
+                raise ValueError("消息为空")
+            prepared.text = text
+        except Exception as e:
+            prepared.error = e
+            return prepared
+
+        if self.focus_probe is not None:
+            try:
+                prepared.focused = bool(self.focus_probe())
+            except Exception:
+                prepared.focused = True
+        self.capture(prepared)
+        return prepared
+
+    def capture(self, prepared: PreparedMessage):
+        """记录输入框区域和输入前的截图（切换聊天后输入框的内容可能不同，需要重新记录）"""
+        prepared.box_region = self.waiter.input_box_region()
+        prepared.empty_box = self.waiter.capture_region(prepared.box_region)
+
+    def input(self, prepared: PreparedMessage) -> str:
+        """
+        输入准备好的消息，粘贴方式时这时才放入剪贴板
+        返回: 实际使用的输入方式
+        """
+        mode = self.input_engine.stage(prepared.text)
+        return self.input_engine.input_staged(prepared.text, mode)
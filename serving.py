@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web服务运行方式
+dev: Flask自带的开发服务器（每个请求新建一个线程）
+threaded: 固定大小线程池的服务器，只依赖Flask自带的Werkzeug，请求读取超时，过载时返回503；
+          Werkzeug每个响应后都会关闭连接，不支持keep-alive
+waitress: 使用waitress（固定线程池，支持keep-alive和空闲连接超时，推荐）
+发送线程独立于这些HTTP线程运行
+"""
+
+import queue
+import threading
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+# 运行方式
+SERVER_DEV = 'dev'
+SERVER_THREADED = 'threaded'
+SERVER_WAITRESS = 'waitress'
+SERVERS = (SERVER_DEV, SERVER_THREADED, SERVER_WAITRESS)
+
+# 默认HTTP线程数（每个打开的页面的实时日志会长期占用一个连接）
+DEFAULT_THREADS = 32
+# 默认超时（秒）：读取请求，以及（waitress）keep-alive连接的空闲时间
+DEFAULT_TIMEOUT = 30
+# 线程都忙时最多排队等待的连接数，超过后直接返回503
+DEFAULT_BACKLOG = 64
+
+_BUSY_RESPONSE = (b"HTTP/1.1 503 Service Unavailable\r\n"
+                  b"Content-Type: text/plain; charset=utf-8\r\n"
+                  b"Content-Length: 12\r\n"
+                  b"Retry-After: 1\r\n"
+                  b"Connection: close\r\n\r\n"
+                  b"server busy\n")
+
+
+class TimeoutRequestHandler(WSGIRequestHandler):
+    """读写连接超过timeout秒没有进展时放弃该连接；使用HTTP/1.1以便分块传输实时日志"""
+    protocol_version = 'HTTP/1.1'
+    timeout = DEFAULT_TIMEOUT
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    def __init__(self, host: str, port: int, app, threads: int = DEFAULT_THREADS,
+                 timeout: float = DEFAULT_TIMEOUT, backlog: int = DEFAULT_BACKLOG):
+        """
+        固定大小线程池的WSGI服务器
+
+        Args:
+            threads: 处理连接的线程数
+            timeout: 连接超时（秒）
+            backlog: 线程都忙时最多排队的连接数
+        """
+        handler = type('RequestHandler', (TimeoutRequestHandler,), {'timeout': timeout})
+        super().__init__(host, port, app, handler=handler)
+        # 等待处理的连接，线程都忙时最多排队backlog个
+        self.pending = queue.Queue(maxsize=max(1, backlog))
+        # 使用守护线程，实时日志等长连接不会阻止程序退出
+        self.workers = [threading.Thread(target=self._work, name=f'http-{i}', daemon=True)
+                        for i in range(threads)]
+        for worker in self.workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            # 过载时立即拒绝，而不是让连接无限排队
+            try:
+                request.sendall(_BUSY_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def _work(self):
+        while True:
+            request, client_address = self.pending.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+
+def serve(app, server: str = SERVER_DEV, host: str = '0.0.0.0', port: int = 5000,
+          threads: int = DEFAULT_THREADS, timeout: float = DEFAULT_TIMEOUT, backlog: int = DEFAULT_BACKLOG):
+    """
+    按指定方式运行Web服务（阻塞）
+
+    Raises:
+        ValueError: 不支持的运行方式
+        ImportError: 选择waitress但未安装
+    """
+    if server == SERVER_DEV:
+        app.run(host=host, port=port, debug=False, threaded=True)
+    elif server == SERVER_THREADED:
+        httpd = PooledWSGIServer(host, port, app, threads, timeout, backlog)
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
+    elif server == SERVER_WAITRESS:
+        try:
+            import waitress
+        except ImportError:
+            raise ImportError("未安装waitress，请运行: pip install waitress")
+        # channel_timeout同时是keep-alive连接的空闲超时
+        waitress.serve(app, host=host, port=port, threads=threads, channel_timeout=timeout,
+                       connection_limit=threads + backlog)
+    else:
+        raise ValueError(f"不支持的运行方式: {server}")
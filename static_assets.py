@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面静态资源
+读取 build_assets.py 构建好的 static/ 目录: 按清单查找文件，根据Accept-Encoding选择预压缩的版本，
+清单和文件内容在第一次请求时才读取并缓存在内存中，启动时不访问磁盘
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+# 资源清单文件名
+MANIFEST_FILE = 'manifest.json'
+
+# 预压缩格式: (Content-Encoding, 文件后缀)，浏览器支持多种格式时按此顺序优先
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+_SUFFIXES = dict(ENCODINGS)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """解析Accept-Encoding请求头，返回 {格式: q值}"""
+    accepted = {}
+    for item in (header or '').split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header: Optional[str], available) -> Optional[str]:
+    """
+    选择响应使用的压缩格式
+    返回: 'br'、'gzip'，或None表示不压缩
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for encoding, _ in ENCODINGS:
+        if encoding not in available:
+            continue
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class AssetStore:
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: build_assets.py的输出目录
+        """
+        self.directory = directory
+        self.lock = threading.Lock()
+        self._by_name = None
+        self._by_file = None
+        # (文件名, 压缩格式) -> 文件内容
+        self._contents: Dict[Tuple[str, Optional[str]], bytes] = {}
+
+    def _manifest(self):
+        if self._by_name is None:
+            with self.lock:
+                if self._by_name is None:
+                    path = os.path.join(self.directory, MANIFEST_FILE)
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            manifest = json.load(f)
+                    except FileNotFoundError:
+                        raise RuntimeError(f"找不到 {path}，请先运行: python build_assets.py")
+                    self._by_file = {entry['file']: entry for entry in manifest.values()}
+                    self._by_name = manifest
+        return self._by_name, self._by_file
+
+    def get(self, name: str) -> Optional[Dict]:
+        """按源文件名（如index.html）查找，不存在时返回None"""
+        return self._manifest()[0].get(name)
+
+    def find(self, filename: str) -> Optional[Dict]:
+        """按构建后的文件名（如app.1a2b3c4d5e.css）查找，不存在时返回None"""
+        return self._manifest()[1].get(filename)
+
+    def read(self, entry: Dict, encoding: Optional[str] = None) -> bytes:
+        """读取文件内容（encoding为压缩格式，None表示原文件）"""
+        key = (entry['file'], encoding)
+        data = self._contents.get(key)
+        if data is None:
+            filename = entry['file'] + (_SUFFIXES[encoding] if encoding else '')
+            with open(os.path.join(self.directory, filename), 'rb') as f:
+                data = f.read()
+            self._contents[key] = data
+        return data
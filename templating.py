@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+消息模板（邮件合并）
+模板中用 {{字段}} 或 {{字段|默认值}} 表示占位符，模板只解析一次，
+每位收件人的消息在发送到这一条时才生成，不预先生成全部消息；
+每位收件人的消息发到收件人表中该收件人的联系人（contact列）
+"""
+
+import csv
+import io
+import re
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# {{字段}} 或 {{字段|默认值}}
+_PLACEHOLDER = re.compile(r'\{\{\s*([^{}|]+?)\s*(?:\|([^{}]*))?\}\}')
+
+# 模板片段: 普通文本，或(字段名, 默认值)，默认值为None表示必填
+Part = Union[str, Tuple[str, Optional[str]]]
+
+# 收件人表中的联系人列（也接受中文列名）
+CONTACT_FIELD = 'contact'
+_CONTACT_ALIASES = (CONTACT_FIELD, '联系人')
+
+
+def recipient_contact(values: Dict) -> Optional[str]:
+    """收件人的联系人，没有时返回None"""
+    for name in _CONTACT_ALIASES:
+        value = values.get(name)
+        if value not in (None, '') and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+class MessageTemplate:
+    def __init__(self, text: str):
+        """
+        解析模板
+
+        Raises:
+            ValueError: 模板为空或不含任何内容
+        """
+        if not text or not text.strip():
+            raise ValueError("模板为空")
+        self.text = text
+        self.parts: List[Part] = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(text):
+            if match.start() > position:
+                self.parts.append(text[position:match.start()])
+            self.parts.append((match.group(1), match.group(2)))
+            position = match.end()
+        if position < len(text):
+            self.parts.append(text[position:])
+
+        fields = [part for part in self.parts if isinstance(part, tuple)]
+        # 按首次出现的顺序去重
+        self.fields = tuple(dict.fromkeys(name for name, _ in fields))
+        self.required = tuple(dict.fromkeys(name for name, default in fields if default is None))
+
+    def missing_fields(self, values: Dict) -> List[str]:
+        """该收件人缺少的必填字段"""
+        return [name for name in self.required if values.get(name) in (None, '')]
+
+    def render(self, values: Dict) -> str:
+        """
+        生成一位收件人的消息
+
+        Raises:
+            ValueError: 缺少必填字段
+        """
+        pieces = []
+        for part in self.parts:
+            if isinstance(part, str):
+                pieces.append(part)
+                continue
+            name, default = part
+            value = values.get(name)
+            if value in (None, ''):
+                if default is None:
+                    raise ValueError(f"缺少字段: {name}")
+                value = default
+            pieces.append(str(value))
+        return ''.join(pieces).strip()
+
+
+class RenderedMessages(Sequence):
+    """按需生成的消息列表，可像普通消息列表一样取长度和遍历"""
+
+    def __init__(self, template: MessageTemplate, recipients: List[Dict]):
+        self.template = template
+        self.recipients = recipients
+
+    def __len__(self) -> int:
+        return len(self.recipients)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.template.render(values) for values in self.recipients[index]]
+        return self.template.render(self.recipients[index])
+
+    def __iter__(self) -> Iterator[str]:
+        for values in self.recipients:
+            yield self.template.render(values)
+
+    def contact_at(self, index: int) -> Optional[str]:
+        """第index条消息（从0开始）要发到的联系人"""
+        return recipient_contact(self.recipients[index])
+
+
+def parse_recipients(value) -> List[Dict]:
+    """
+    解析收件人表: 对象列表，或首行为列名的CSV文本
+
+    Raises:
+        ValueError: 格式错误或为空
+    """
+    if isinstance(value, str):
+        reader = csv.DictReader(io.StringIO(value.strip()))
+        recipients = [{key.strip(): (item or '').strip() for key, item in row.items() if key}
+                      for row in reader]
+    elif isinstance(value, list):
+        recipients = value
+    else:
+        raise ValueError("收件人表应为对象列表或CSV文本")
+
+    if not recipients:
+        raise ValueError("收件人表为空")
+    for index, values in enumerate(recipients, 1):
+        if not isinstance(values, dict):
+            raise ValueError(f"第 {index} 位收件人格式错误")
+    return recipients
+
+
+def validate_recipients(template: MessageTemplate, recipients: List[Dict]):
+    """
+    检查每位收件人都有联系人和模板需要的字段
+    没有联系人的消息只能发到当前打开的聊天窗口，会发错人，所以整个表都不接受
+
+    Raises:
+        ValueError: 第一位缺少联系人或字段的收件人
+    """
+    for index, values in enumerate(recipients, 1):
+        if recipient_contact(values) is None:
+            raise ValueError(f"第 {index} 位收件人缺少联系人（{CONTACT_FIELD}列）")
+        missing = template.missing_fields(values)
+        if missing:
+            raise ValueError(f"第 {index} 位收件人缺少字段: {', '.join(missing)}")
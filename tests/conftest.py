@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""自动测试的公共设置: 从仓库根目录导入模块，发送流程使用模拟输入后端"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import input_backend  # noqa: E402
+from fake_backend import FakeBackend  # noqa: E402
+
+
+@pytest.fixture
+def web(tmp_path):
+    """
+    Web模块: 任务队列和定时任务使用临时数据库，发送器使用新的模拟后端（web.sender.backend）
+    """
+    input_backend.set_backend(FakeBackend())
+    import qq_message_sender_web as web
+    web.init_services(str(tmp_path / 'send_jobs.db'))
+    web.sender.use_backend(FakeBackend())
+    web.job_worker.start()
+    return web
+
+
+def wait_until(condition, timeout: float = 10):
+    """等待条件满足，超时时测试失败"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("等待超时")
+        time.sleep(0.01)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""动作计划编译: 删除被覆盖的按键、合并为全选、合并等待"""
+
+import pytest
+
+from action_plan import ACTION_WAIT, compile_plan, hotkey, press, wait
+
+
+def steps(plan):
+    return [action.describe() if action.kind != ACTION_WAIT else (action.timeout, action.fallback)
+            for action in plan.actions]
+
+
+def test_auto_select_sequence_compiles_to_tab_and_select_all():
+    plan = compile_plan([
+        press('tab'), wait(0.5, 0.2),
+        hotkey('ctrl', 'a'), wait(0.5, 0.2),
+        press('home'), wait(0.5, 0.2),
+        press('end'), wait(0.5, 0.2),
+        hotkey('ctrl', 'end'), wait(0.5, 0.2),
+        hotkey('ctrl', 'shift', 'home'), wait(0.5, 0.2),
+        wait(1, 0.5),
+    ])
+    assert steps(plan) == ['tab', 'ctrl+a', (1, 0.5)]
+    assert plan.key_count == 2
+    assert len(plan.source) == 13
+
+
+def test_ctrl_end_then_extend_to_start_is_select_all():
+    plan = compile_plan([hotkey('ctrl', 'end'), hotkey('ctrl', 'shift', 'home')])
+    assert steps(plan) == ['ctrl+a']
+    assert plan.removed == ['ctrl+end + ctrl+shift+home 合并为 ctrl+a']
+
+
+def test_extend_to_start_alone_is_kept():
+    plan = compile_plan([press('end'), hotkey('ctrl', 'shift', 'home')])
+    assert steps(plan) == ['end', 'ctrl+shift+home']
+
+
+def test_tab_is_never_removed():
+    plan = compile_plan([press('tab'), press('home'), press('tab'), hotkey('ctrl', 'a')])
+    assert steps(plan) == ['tab', 'home', 'tab', 'ctrl+a']
+
+
+def test_moves_are_overwritten_only_by_stronger_moves():
+    # 行首/行尾不能覆盖全选
+    assert steps(compile_plan([hotkey('ctrl', 'a'), press('end')])) == ['ctrl+a', 'end']
+    assert steps(compile_plan([press('home'), press('end')])) == ['end']
+    assert steps(compile_plan([press('end'), hotkey('ctrl', 'home'), hotkey('ctrl', 'a')])) == ['ctrl+a']
+
+
+def test_waits_merge_into_one_trailing_wait():
+    plan = compile_plan([wait(0.5, 0.3), press('tab'), wait(2, 0.1), press('x'), wait(1, 0.4)])
+    assert steps(plan) == ['tab', 'x', (2, 0.4)]
+    assert plan.removed == ['2 次按键间的等待（按键按顺序排队，只需在最后等待一次）']
+
+
+def test_no_trailing_wait():
+    plan = compile_plan([hotkey('ctrl', 'a'), wait(0.5, 0.2)], trailing_wait=False)
+    assert steps(plan) == ['ctrl+a']
+    assert plan.removed == ['1 次按键间的等待（按键按顺序排队，只需在最后等待一次）']
+
+
+def test_estimate():
+    plan = compile_plan([press('tab'), wait(0.5, 0.3), hotkey('ctrl', 'a'), wait(1, 0.5)])
+    assert plan.estimate(pause=0.5, key_seconds=0.01) == pytest.approx(2 * 0.51 + 0.5)
+    assert plan.estimate(pause=0.5, key_seconds=0.01, actions=plan.source) == pytest.approx(2 * 0.51 + 0.8)
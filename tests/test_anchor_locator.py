@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""锚点图片定位: 没有OpenCV时按原始大小精确匹配"""
+
+import pytest
+from PIL import Image
+
+import anchor_locator
+from anchor_locator import AnchorLocator
+from fake_backend import FakeBackend
+
+
+@pytest.fixture
+def anchor_path(tmp_path):
+    path = tmp_path / 'anchor.png'
+    Image.new('RGB', (8, 8), 'white').save(path)
+    return str(path)
+
+
+def test_without_opencv_matches_exactly_at_full_size(monkeypatch, anchor_path):
+    monkeypatch.setattr(anchor_locator, 'confidence_supported', lambda: False)
+    backend = FakeBackend()
+    locator = AnchorLocator(anchor_path, offset=(0, 40), backend=backend)
+    assert locator.scale == 1
+    assert locator.confidence is None
+    assert locator.anchor().size == (8, 8)
+
+    # 匹配结果不需要换算
+    backend.anchor_box = (10, 20, 8, 8)
+    window = backend.windows[0]
+    assert locator.position(window) == (window.left + 14, window.top + 64)
+    assert ('locate', (None,)) in backend.calls
+
+
+def test_with_opencv_matches_downscaled(monkeypatch, anchor_path):
+    monkeypatch.setattr(anchor_locator, 'confidence_supported', lambda: True)
+    backend = FakeBackend()
+    locator = AnchorLocator(anchor_path, offset=(0, 40), backend=backend)
+    assert locator.scale == anchor_locator.DEFAULT_SCALE
+    assert locator.anchor().size == (4, 4)
+
+    backend.anchor_box = (5, 10, 4, 4)
+    window = backend.windows[0]
+    assert locator.position(window) == (window.left + 14, window.top + 64)
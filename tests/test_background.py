@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""后台发送: 需要切换聊天窗口的请求在提交时就被拒绝"""
+
+import pytest
+
+from conftest import wait_until
+from fake_backend import FakeBackend
+
+
+@pytest.fixture
+def background_web(web):
+    web.sender.use_backend(FakeBackend(background=True))
+    return web
+
+
+def test_contact_is_rejected(background_web):
+    web = background_web
+    response = web.app.test_client().post('/api/send', json={
+        'message_type': 'single', 'single_message': 'hi', 'contact': 'A', 'delay': 0, 'interval': 0,
+    }).get_json()
+    assert not response['success']
+    assert '后台发送' in response['message']
+    assert web.job_queue.counts()[web.JOB_QUEUED] == 0
+
+
+@pytest.mark.parametrize('path, payload', [
+    ('/api/send', {'message_type': 'template', 'template': '{{姓名}}', 'recipients': 'contact,姓名\nA,张三'}),
+    ('/api/send/batch', {'jobs': [{'messages': ['a']}]}),
+    ('/api/schedule', {'messages': ['a'], 'contact': 'A', 'cron': '@daily'}),
+])
+def test_chat_switching_requests_are_rejected(background_web, path, payload):
+    response = background_web.app.test_client().post(path, json=payload).get_json()
+    assert not response['success']
+    assert '后台发送' in response['message']
+
+
+def test_import_is_rejected(background_web):
+    response = background_web.app.test_client().post(
+        '/api/import', data='contact,message\nA,a1\n'.encode('utf-8'), content_type='text/csv').get_json()
+    assert not response['success']
+    assert '后台发送' in response['message']
+    assert background_web.job_queue.counts()[background_web.JOB_QUEUED] == 0
+
+
+def test_current_chat_still_works(background_web):
+    web = background_web
+    response = web.app.test_client().post('/api/send', json={
+        'message_type': 'single', 'single_message': 'hi', 'delay': 0, 'interval': 0,
+    }).get_json()
+    assert response['success'], response
+    wait_until(lambda: web.job_queue.get(response['job_id'])['state'] == web.JOB_DONE)
+    assert web.sender.backend.sent == [(None, 'hi')]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""批量发送分组: 联系人按首次出现的顺序，同一联系人的消息保持原顺序"""
+
+from batching import count_switches, group_by_contact
+
+
+def test_group_by_contact_keeps_first_seen_and_message_order():
+    items = [('A', 'a1'), ('B', 'b1'), ('A', 'a2'), (None, 'n1'), ('B', 'b2'), ('A', 'a3')]
+    assert group_by_contact(items) == [
+        ('A', ['a1', 'a2', 'a3']),
+        ('B', ['b1', 'b2']),
+        (None, ['n1']),
+    ]
+
+
+def test_grouping_reduces_switches():
+    items = [('A', 'a1'), ('B', 'b1'), ('A', 'a2'), ('B', 'b2')]
+    assert count_switches(items) == 4
+    grouped = [(contact, message) for contact, messages in group_by_contact(items) for message in messages]
+    assert count_switches(grouped) == 2
+    assert count_switches([]) == 0
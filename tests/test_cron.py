@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""cron表达式: 解析、下次触发时间、日和周的"或"规则、夏令时切换"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from scheduler import CronExpression, Scheduler, parse_when
+
+
+def test_parse_fields_and_aliases():
+    cron = CronExpression('*/15 9-17 1,15 * 1-5')
+    assert cron.minutes == {0, 15, 30, 45}
+    assert cron.hours == set(range(9, 18))
+    assert cron.days == {1, 15}
+    assert cron.weekdays == {1, 2, 3, 4, 5}
+    assert CronExpression('@daily').next_after(datetime(2024, 1, 1, 8, 0)) == datetime(2024, 1, 2, 0, 0)
+    # 周日可以写成0或7
+    assert CronExpression('0 0 * * 7').weekdays == {0}
+
+
+@pytest.mark.parametrize('expression', [
+    '* * * *', '60 * * * *', '* 24 * * *', '* * 0 * *', '* * * 13 *', '*/0 * * * *', '5-1 * * * *', 'a * * * *',
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_parse_when():
+    assert parse_when('0 9 * * 1-5') == (None, '0 9 * * 1-5')
+    assert parse_when('@hourly') == (None, '@hourly')
+    assert parse_when('2024-01-01T08:00') == (datetime(2024, 1, 1, 8, 0).timestamp(), None)
+    with pytest.raises(ValueError):
+        parse_when('明天')
+
+
+def test_next_after_is_exclusive():
+    cron = CronExpression('0 9 * * *')
+    assert cron.next_after(datetime(2024, 1, 1, 9, 0)) == datetime(2024, 1, 2, 9, 0)
+    assert cron.next_after(datetime(2024, 1, 1, 8, 59, 30)) == datetime(2024, 1, 1, 9, 0)
+
+
+def test_month_and_year_rollover():
+    assert CronExpression('0 0 31 * *').next_after(datetime(2024, 4, 1)) == datetime(2024, 5, 31)
+    assert CronExpression('0 0 29 2 *').next_after(datetime(2024, 3, 1)) == datetime(2028, 2, 29)
+    assert CronExpression('@yearly').next_after(datetime(2024, 12, 31, 23, 59)) == datetime(2025, 1, 1)
+
+
+def test_day_of_month_or_day_of_week():
+    # 日和周都有限制时满足其一即可: 每月13日或每个周五
+    cron = CronExpression('0 0 13 * 5')
+    # 2024-09-01是周日，下一个周五是6日，之后是13日（周五）、20日（周五）
+    moment = datetime(2024, 9, 1)
+    fired = []
+    for _ in range(4):
+        moment = cron.next_after(moment)
+        fired.append(moment.day)
+    assert fired == [6, 13, 20, 27]
+    # 2024-10-13是周日，同样触发
+    assert cron.next_after(datetime(2024, 10, 12)) == datetime(2024, 10, 13)
+
+
+def test_day_restriction_with_any_weekday():
+    # 只限制日期时周字段不参与
+    assert CronExpression('0 0 15 * *').next_after(datetime(2024, 9, 1)) == datetime(2024, 9, 15)
+    # 只限制周几时日期字段不参与（2024-09-02是周一）
+    assert CronExpression('0 0 * * 1').next_after(datetime(2024, 9, 1)) == datetime(2024, 9, 2)
+
+
+@pytest.fixture
+def eastern_time(monkeypatch):
+    """美国东部时间: 2024-03-10 02:00跳到03:00，2024-11-03 02:00回到01:00"""
+    monkeypatch.setenv('TZ', 'EST5EDT,M3.2.0,M11.1.0')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return Scheduler(lambda schedule: None, str(tmp_path / 'db'))
+
+
+def test_skipped_hour_fires_after_spring_forward(eastern_time, scheduler):
+    after = datetime(2024, 3, 10, 0, 0).timestamp()
+    run = scheduler._next_cron_run('30 2 * * *', after)
+    # 02:30不存在，按跳过后的时间03:30触发，不会跳过这一天
+    assert datetime.fromtimestamp(run) == datetime(2024, 3, 10, 3, 30)
+    assert run - after == 2.5 * 3600
+
+
+def test_repeated_hour_fires_once_after_fall_back(eastern_time, scheduler):
+    first = scheduler._next_cron_run('30 1 * * *', datetime(2024, 11, 3, 0, 0).timestamp())
+    assert datetime.fromtimestamp(first) == datetime(2024, 11, 3, 1, 30)
+    # 01:30出现两次，只在第一次触发，下次为第二天（相隔25小时）
+    second = scheduler._next_cron_run('30 1 * * *', first + 1)
+    assert datetime.fromtimestamp(second) == datetime(2024, 11, 4, 1, 30)
+    assert second - first == 25 * 3600
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""/api/events: 服务器重启后客户端能重新收到日志"""
+
+import json
+
+
+def read_events(web, count, **headers):
+    """读取前count个SSE事件: [(事件ID, 事件名, 数据), ...]"""
+    response = web.app.test_client().get('/api/events', headers=headers, buffered=False)
+    events = []
+    chunks = iter(response.response)
+    try:
+        while len(events) < count:
+            chunk = next(chunks)
+            chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+            fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if ': ' in line)
+            if 'event' in fields:
+                events.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+    finally:
+        response.close()
+    return events
+
+
+def test_events_start_with_boot_id_and_last_seq(web):
+    web.add_log('第一条')
+    last_seq = web.message_logs.last_seq
+    event_id, name, data = read_events(web, 1)[0]
+    assert name == 'sync'
+    assert data == {'boot_id': web.BOOT_ID, 'last_seq': last_seq}
+
+
+def test_event_id_from_previous_boot_replays_all_logs(web):
+    web.add_log('重启后的日志')
+    # 上一次启动时已收到的序号比现在的大
+    stale_id = f'oldboot-{web.message_logs.last_seq + 100}'
+    events = read_events(web, len(web.message_logs) + 1, **{'Last-Event-ID': stale_id})
+    assert events[0][1] == 'sync'
+    logs = [data for _, name, data in events[1:] if name == 'log']
+    assert [log['seq'] for log in logs] == [log['seq'] for log in web.message_logs.since()['logs']]
+    assert logs[-1]['message'] == '重启后的日志'
+
+
+def test_event_id_from_this_boot_continues(web):
+    web.add_log('旧日志')
+    seen = web.message_logs.last_seq
+    web.add_log('新日志')
+    events = read_events(web, 3, **{'Last-Event-ID': web.log_event_id(seen)})
+    assert [name for _, name, _ in events] == ['sync', 'log', 'status']
+    assert events[1][2]['message'] == '新日志'
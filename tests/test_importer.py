@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""批量导入: 按定时合并任务、超过条数时拆分、出错的行单独报告"""
+
+import io
+
+from importer import FORMAT_CSV, FORMAT_JSONL, import_stream, open_text
+
+
+def collect():
+    jobs = []
+
+    def submit(messages, contacts, schedule):
+        jobs.append((contacts, schedule, messages))
+        return len(jobs)
+    return submit, jobs
+
+
+def test_rows_are_grouped_by_schedule_with_contact_per_message():
+    submit, jobs = collect()
+    text = ('contact,message,schedule\n'
+            'A,a1,\nA,a2,\nB,b1,\nB,b2,0 9 * * *\nA,a3,\n,current,\n')
+    report = import_stream(io.StringIO(text), FORMAT_CSV, submit)
+    assert jobs == [
+        (['A', 'A', 'B', 'A', None], None, ['a1', 'a2', 'b1', 'a3', 'current']),
+        (['B'], '0 9 * * *', ['b2']),
+    ]
+    assert report['rows'] == 6
+    assert report['imported'] == 6
+    assert report['jobs'] == 2
+    assert report['submitted'] == [1, 2]
+
+
+def test_one_row_per_contact_is_one_job():
+    submit, jobs = collect()
+    lines = ''.join(f'{{"contact": "c{i}", "message": "m{i}"}}\n' for i in range(5))
+    report = import_stream(io.StringIO(lines), FORMAT_JSONL, submit)
+    assert jobs == [([f'c{i}' for i in range(5)], None, [f'm{i}' for i in range(5)])]
+    assert report['jobs'] == 1
+
+
+def test_large_group_is_split():
+    submit, jobs = collect()
+    lines = ''.join(f'{{"contact": "A", "message": "m{i}"}}\n' for i in range(7))
+    report = import_stream(io.StringIO(lines), FORMAT_JSONL, submit, max_job_messages=3)
+    assert [len(messages) for _, _, messages in jobs] == [3, 3, 1]
+    assert [message for _, _, messages in jobs for message in messages] == [f'm{i}' for i in range(7)]
+    assert report['jobs'] == 3
+
+
+def test_bad_rows_are_reported_without_breaking_groups():
+    submit, jobs = collect()
+    text = ('{"contact": "A", "message": "a1"}\n'
+            '{"contact": "A", "message": ""}\n'
+            'not json\n'
+            '\n'
+            '{"contact": "A", "message": "a2", "schedule": "明天"}\n'
+            '{"contact": "A", "message": "a3"}\n')
+    report = import_stream(io.StringIO(text), FORMAT_JSONL, submit)
+    # 出错的行不打断合并
+    assert jobs == [(['A', 'A'], None, ['a1', 'a3'])]
+    assert report['error_count'] == 3
+    assert [error['line'] for error in report['errors']] == [2, 3, 5]
+
+
+def test_chinese_columns_and_bom():
+    submit, jobs = collect()
+    data = '联系人,消息\n张三,你好\n'.encode('utf-8-sig')
+    report = import_stream(open_text(io.BytesIO(data)), FORMAT_CSV, submit)
+    assert jobs == [(['张三'], None, ['你好'])]
+    assert report['error_count'] == 0
+
+
+def test_unreadable_file_keeps_earlier_jobs():
+    submit, jobs = collect()
+    # 文本流按块解码，坏字节放在第一块之后
+    rows = ''.join(f'A,m{i}\n' for i in range(3000))
+    data = f'contact,message\n{rows}'.encode('utf-8') + b'A,\xff\xfe\n'
+    report = import_stream(open_text(io.BytesIO(data)), FORMAT_CSV, submit)
+    assert 'aborted' in report
+    assert report['imported'] > 0
+    assert [message for _, _, messages in jobs for message in messages] == \
+        [f'm{i}' for i in range(report['imported'])]
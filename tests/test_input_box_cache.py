@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""输入框缓存: 发送失败后清空，下一个任务重新查找"""
+
+from fake_backend import FakeBackend
+from uia_focus import UIAFocus
+
+
+class FakeRect:
+    bottom = 500
+
+    def width(self):
+        return 300
+
+    def height(self):
+        return 80
+
+
+class FakeControl:
+    def rectangle(self):
+        return FakeRect()
+
+    def is_visible(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def set_focus(self):
+        pass
+
+
+class FakeDesktop:
+    """pywinauto的Desktop: 每个窗口中只有一个输入框控件"""
+
+    def __init__(self):
+        self.control = FakeControl()
+
+    def window(self, handle):
+        return self
+
+    def wrapper_object(self):
+        return self
+
+    def descendants(self, control_type):
+        return [self.control]
+
+
+class EnterFails(FakeBackend):
+    """按回车时出错（如输入框控件已失效，回车没有送到QQ）"""
+
+    def press(self, key: str):
+        if key == 'enter':
+            raise RuntimeError("回车发送失败")
+        super().press(key)
+
+
+def test_failed_send_forgets_uia_control(web):
+    backend = EnterFails()
+    sender = web.QQMessageSender(backend=backend)
+    sender.uia_focus = UIAFocus(backend, desktop=FakeDesktop())
+    hwnd = backend.windows[0]._hWnd
+
+    assert sender.run_job(['hi'], delay=0, interval=0) == web.JOB_FAILED
+    assert sender.uia_focus.locate_count == 1
+    assert hwnd not in sender.uia_focus.controls
+
+
+def test_successful_send_keeps_uia_control(web):
+    backend = FakeBackend()
+    sender = web.QQMessageSender(backend=backend)
+    sender.uia_focus = UIAFocus(backend, desktop=FakeDesktop())
+
+    assert sender.run_job(['a'], delay=0, interval=0) == web.JOB_DONE
+    assert sender.run_job(['b'], delay=0, interval=0) == web.JOB_DONE
+    assert sender.uia_focus.locate_count == 1
+    assert backend.sent_messages() == ['a', 'b']
+
+
+def test_failed_send_forgets_anchor_position(web, tmp_path):
+    from PIL import Image
+    from anchor_locator import AnchorLocator
+
+    anchor_path = tmp_path / 'anchor.png'
+    Image.new('RGB', (8, 8), 'white').save(anchor_path)
+    backend = EnterFails()
+    backend.anchor_box = (10, 20, 8, 8)
+    sender = web.QQMessageSender(backend=backend)
+    sender.anchor_locator = AnchorLocator(str(anchor_path), backend=backend)
+    hwnd = backend.windows[0]._hWnd
+
+    assert sender.run_job(['hi'], delay=0, interval=0) == web.JOB_FAILED
+    assert sender.anchor_locator.match_count == 1
+    assert hwnd not in sender.anchor_locator.positions
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""任务队列: 继续发送的任务排到已在排队的任务之后"""
+
+import sqlite3
+
+from job_queue import JOB_QUEUED, JOB_STOPPED, JobQueue
+
+
+def test_resumed_job_goes_to_the_back_of_the_queue():
+    queue = JobQueue(':memory:')
+    first = queue.enqueue(['a1', 'a2'])
+    assert queue.claim_next()['id'] == first
+    queue.checkpoint(first, 1)
+    queue.finish(first, JOB_STOPPED)
+
+    second = queue.enqueue(['b1'])
+    third = queue.enqueue(['c1'])
+    assert queue.resume(first)
+    assert queue.get(first)['position'] == 3
+    assert [job['id'] for job in queue.list_jobs() if job['state'] == JOB_QUEUED] == [second, third, first]
+
+    assert [queue.claim_next()['id'] for _ in range(3)] == [second, third, first]
+
+
+def test_old_database_is_queued_by_id(tmp_path):
+    db_file = str(tmp_path / 'send_jobs.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, state TEXT NOT NULL, contact TEXT, "
+                 "messages TEXT NOT NULL, options TEXT NOT NULL, created_at TEXT NOT NULL, started_at TEXT, "
+                 "finished_at TEXT, error TEXT)")
+    for message in ('old1', 'old2'):
+        conn.execute("INSERT INTO jobs (state, messages, options, created_at) VALUES (?, ?, '{}', '')",
+                     (JOB_QUEUED, f'["{message}"]'))
+    conn.commit()
+    conn.close()
+
+    queue = JobQueue(db_file)
+    new = queue.enqueue(['new'])
+    assert [queue.claim_next()['id'] for _ in range(3)] == [1, 2, new]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""日志环形缓冲区: 按序号获取新日志，报告已被覆盖的条数"""
+
+from log_buffer import LogBuffer
+
+
+def fill(buffer, count):
+    for i in range(count):
+        buffer.append({'message': f'm{i + 1}'})
+
+
+def seqs(result):
+    return [entry['seq'] for entry in result['logs']]
+
+
+def test_empty_buffer():
+    assert LogBuffer().since(5) == {'logs': [], 'last_seq': 0, 'dropped': 0}
+
+
+def test_since_returns_only_newer_entries():
+    buffer = LogBuffer(capacity=10)
+    fill(buffer, 5)
+    result = buffer.since(3)
+    assert seqs(result) == [4, 5]
+    assert result['last_seq'] == 5
+    assert result['dropped'] == 0
+    assert buffer.since(5)['logs'] == []
+    assert seqs(buffer.since()) == [1, 2, 3, 4, 5]
+
+
+def test_dropped_counts_overwritten_entries():
+    buffer = LogBuffer(capacity=3)
+    fill(buffer, 10)
+    assert len(buffer) == 3
+    # 已收到2，3到7已被覆盖
+    result = buffer.since(2)
+    assert seqs(result) == [8, 9, 10]
+    assert result['dropped'] == 5
+    # 已收到7，没有缺失
+    assert buffer.since(7)['dropped'] == 0
+    assert seqs(buffer.since(7)) == [8, 9, 10]
+    # 第一次获取不算缺失
+    assert buffer.since()['dropped'] == 0
+    assert buffer.since(0)['dropped'] == 7
+
+
+def test_client_ahead_of_server_gets_everything():
+    # 服务器重启后序号重新开始
+    buffer = LogBuffer(capacity=10)
+    fill(buffer, 3)
+    result = buffer.since(50)
+    assert seqs(result) == [1, 2, 3]
+    assert result['dropped'] == 0
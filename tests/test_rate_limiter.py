@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""令牌桶限速: 突发条数和令牌补充"""
+
+import pytest
+
+from rate_limiter import RateLimiter, TokenBucket, rate_from_interval
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_then_sustained_rate():
+    clock = Clock()
+    bucket = TokenBucket(rate=0.5, burst=3, clock=clock)
+    for _ in range(3):
+        assert bucket.wait_time() == 0
+        bucket.consume()
+    # 突发用完后按持续速率（每2秒一条）恢复
+    assert bucket.wait_time() == pytest.approx(2.0)
+    clock.now = 1.0
+    assert bucket.wait_time() == pytest.approx(1.0)
+    clock.now = 2.0
+    assert bucket.wait_time() == 0
+
+
+def test_refill_is_capped_at_burst():
+    clock = Clock()
+    bucket = TokenBucket(rate=1, burst=2, clock=clock)
+    bucket.consume()
+    bucket.consume()
+    clock.now = 100.0
+    assert bucket.wait_time() == 0
+    assert bucket.tokens == 2
+
+
+def test_clock_going_backwards_does_not_add_tokens():
+    clock = Clock()
+    clock.now = 10.0
+    bucket = TokenBucket(rate=1, burst=1, clock=clock)
+    bucket.consume()
+    clock.now = 5.0
+    assert bucket.wait_time() == pytest.approx(1.0)
+
+
+def test_invalid_rate_and_burst():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    assert TokenBucket(rate=1, burst=0).burst == 1
+
+
+def test_contact_buckets_are_independent():
+    clock = Clock()
+    limiter = RateLimiter(contact_rate=0.1, contact_burst=1, clock=clock)
+    assert limiter.try_acquire('A') == 0
+    assert limiter.try_acquire('A') == pytest.approx(10.0)
+    assert limiter.try_acquire('B') == 0
+
+
+def test_total_rate_limits_all_contacts():
+    clock = Clock()
+    limiter = RateLimiter(rate=1, burst=2, clock=clock)
+    assert limiter.try_acquire('A') == 0
+    assert limiter.try_acquire('B') == 0
+    # 未取得配额时不消耗令牌
+    assert limiter.try_acquire('C') == pytest.approx(1.0)
+    assert limiter.try_acquire('C') == pytest.approx(1.0)
+
+
+def test_rate_from_interval():
+    assert rate_from_interval(2) == 0.5
+    assert rate_from_interval(0) is None
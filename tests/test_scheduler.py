@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""定时发送: 触发回调失败时不丢失定时任务"""
+
+import pytest
+
+from scheduler import Scheduler, SCHEDULE_ACTIVE, SCHEDULE_DONE, FIRE_RETRY_DELAY
+
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def failing_once():
+    calls = []
+
+    def on_fire(schedule):
+        calls.append(schedule['id'])
+        if len(calls) == 1:
+            raise RuntimeError("数据库被锁定")
+        return 42
+    return on_fire, calls
+
+
+def test_one_off_is_retried_after_failed_fire(tmp_path, clock):
+    on_fire, calls = failing_once()
+    scheduler = Scheduler(on_fire, str(tmp_path / 'db'), clock=clock)
+    schedule_id = scheduler.add(['hi'], run_at=clock.now)
+
+    assert scheduler._next_due() == schedule_id
+    scheduler._fire(schedule_id)
+    assert scheduler.get(schedule_id)['state'] == SCHEDULE_ACTIVE
+    assert scheduler.pending == {schedule_id: clock.now + FIRE_RETRY_DELAY}
+
+    clock.now += FIRE_RETRY_DELAY
+    assert scheduler._next_due() == schedule_id
+    scheduler._fire(schedule_id)
+    schedule = scheduler.get(schedule_id)
+    assert schedule['state'] == SCHEDULE_DONE
+    assert schedule['last_job_id'] == 42
+    assert calls == [schedule_id, schedule_id]
+
+
+def test_cron_keeps_next_run_after_failed_fire(tmp_path, clock):
+    on_fire, calls = failing_once()
+    scheduler = Scheduler(on_fire, str(tmp_path / 'db'), clock=clock)
+    schedule_id = scheduler.add(['hi'], cron='* * * * *')
+    first_run = scheduler.pending[schedule_id]
+
+    clock.now = first_run
+    assert scheduler._next_due() == schedule_id
+    scheduler._fire(schedule_id)
+    assert scheduler.pending == {schedule_id: first_run + 60}
+    assert scheduler.get(schedule_id)['fire_count'] == 0
+
+
+def test_cancelled_schedule_is_not_retried(tmp_path, clock):
+    def on_fire(schedule):
+        scheduler.cancel(schedule['id'])
+        raise RuntimeError("失败")
+    scheduler = Scheduler(on_fire, str(tmp_path / 'db'), clock=clock)
+    schedule_id = scheduler.add(['hi'], run_at=clock.now)
+    assert scheduler._next_due() == schedule_id
+    scheduler._fire(schedule_id)
+    assert scheduler.pending == {}
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""发送流水线: 准备时不占用剪贴板，切换聊天后重新截取输入框"""
+
+from conftest import wait_until
+from fake_backend import FakeBackend
+from input_engine import InputEngine, INPUT_MODE_PASTE
+from send_pipeline import SendPipeline
+from waits import Waiter
+
+LONG = '你好' * 20
+
+
+def make_pipeline(messages):
+    backend = FakeBackend()
+    backend.clipboard = 'user'
+    pipeline = SendPipeline(messages, InputEngine(INPUT_MODE_PASTE, backend=backend), Waiter(backend))
+    return backend, pipeline
+
+
+def test_prepare_leaves_the_clipboard_alone():
+    backend, pipeline = make_pipeline([LONG])
+    prepared = pipeline.prepare(1)
+    assert prepared.error is None
+    assert backend.clipboard == 'user'
+
+    pipeline.input(prepared)
+    assert backend.input_box == LONG
+    pipeline.input_engine.finish()
+    assert backend.clipboard == 'user'
+
+
+def test_capture_after_chat_switch_uses_the_new_chat():
+    backend, pipeline = make_pipeline([LONG])
+    prepared = pipeline.prepare(1)
+    # 切换聊天后窗口内容变化，准备时的截图不再是空输入框
+    backend.chat_switches += 1
+    waiter = pipeline.waiter
+    assert not waiter.region_restored_probe(prepared.box_region, prepared.empty_box)()
+    pipeline.capture(prepared)
+    assert waiter.region_restored_probe(prepared.box_region, prepared.empty_box)()
+
+
+def test_message_is_copied_after_switching_chats(web):
+    job_id = web.job_queue.enqueue([LONG + '1', LONG + '2'], None, {
+        'delay': 0, 'interval': 0, 'input_mode': INPUT_MODE_PASTE, 'contacts': ['A', 'B']})
+    wait_until(lambda: web.job_queue.get(job_id)['state'] == web.JOB_DONE)
+
+    backend = web.sender.backend
+    assert backend.sent == [('A', LONG + '1'), ('B', LONG + '2')]
+    copies = [i for i, call in enumerate(backend.calls) if call == ('copy', (LONG + '2',))]
+    # 第二条消息在切换到B之后、粘贴之前才放入剪贴板
+    assert copies and backend.calls[copies[0] + 1] == ('paste', (LONG + '2',))
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""短消息: 输入后截图变化不明显时也不会长时间等待"""
+
+from fake_backend import FakeBackend
+from input_engine import INPUT_MODE_TYPE
+from phase_timer import PHASE_INPUT
+
+
+class TinyTextBackend(FakeBackend):
+    """输入框中的文字太少，截图看不出变化"""
+
+    def screenshot(self, region=None):
+        input_box, self.input_box = self.input_box, ""
+        try:
+            return super().screenshot(region)
+        finally:
+            self.input_box = input_box
+
+
+def test_one_character_message_does_not_wait_a_full_second(web):
+    backend = TinyTextBackend()
+    sender = web.QQMessageSender(backend=backend)
+    phases = []
+    state = sender.run_job(['好'], delay=0, interval=0, auto_select=False, input_mode=INPUT_MODE_TYPE,
+                           on_phase=lambda name, seconds: phases.append((name, seconds)))
+    assert state == web.JOB_DONE
+    assert backend.sent == [(None, '好')]
+    input_seconds = [seconds for name, seconds in phases if name == PHASE_INPUT]
+    assert input_seconds and input_seconds[0] < 0.8
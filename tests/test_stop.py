@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""停止发送: 输入到一半停止时不留下半条消息"""
+
+from conftest import wait_until
+from fake_backend import FakeBackend
+from input_engine import INPUT_MODE_TYPE
+
+
+class StopWhileTyping(FakeBackend):
+    """输入第一段文字后请求停止（相当于用户在输入过程中点击停止）"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sender = None
+
+    def write(self, text: str, pause: bool = True):
+        super().write(text, pause)
+        self.sender.stop_sending()
+
+
+class BackgroundStopWhileTyping(StopWhileTyping):
+    """后台输入: 不支持组合键"""
+
+    def hotkey(self, *keys: str):
+        raise NotImplementedError("后台输入不支持组合键")
+
+
+def run_stopped_job(web, backend):
+    sender = web.QQMessageSender(backend=backend)
+    backend.sender = sender
+    state = sender.run_job(['这是一条很长的消息，会分成好几段输入'], delay=0, interval=0,
+                           auto_select=False, input_mode=INPUT_MODE_TYPE)
+    return state
+
+
+def test_stop_mid_typing_clears_input_box(web):
+    backend = StopWhileTyping()
+    assert run_stopped_job(web, backend) == web.JOB_STOPPED
+    assert backend.sent == []
+    assert backend.input_box == ""
+    assert ('hotkey', ('ctrl', 'a')) in backend.calls
+
+
+def test_background_stop_deletes_typed_text(web):
+    backend = BackgroundStopWhileTyping(background=True)
+    assert run_stopped_job(web, backend) == web.JOB_STOPPED
+    assert backend.sent == []
+    assert backend.input_box == ""
+
+
+def test_stop_right_after_claim_stops_the_job(web):
+    # /api/stop在任务已取出、尚未开始发送时到达
+    def claim_then_stop(job):
+        web.sender.begin_job()
+        web.sender.stop_sending()
+    web.job_worker.on_claim = claim_then_stop
+
+    response = web.app.test_client().post('/api/send', json={
+        'message_type': 'single', 'single_message': 'hi', 'delay': 0, 'interval': 0,
+    }).get_json()
+    assert response['success'], response
+
+    wait_until(lambda: web.job_queue.get(response['job_id'])['state'] != web.JOB_QUEUED
+               and web.job_worker.current_job_id is None)
+    assert web.job_queue.get(response['job_id'])['state'] == web.JOB_STOPPED
+    assert web.sender.backend.sent == []
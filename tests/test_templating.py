@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""模板群发: 模板解析、收件人表校验、每位收件人的消息发到自己的联系人"""
+
+import pytest
+
+from conftest import wait_until
+from templating import MessageTemplate, RenderedMessages, parse_recipients, validate_recipients
+
+
+def test_missing_required_fields():
+    template = MessageTemplate('{{姓名}}你好，{{时间|明天}}开会')
+    assert template.missing_fields({'姓名': '张三'}) == []
+    assert template.missing_fields({'时间': '下午'}) == ['姓名']
+    assert template.missing_fields({'姓名': ''}) == ['姓名']
+    assert template.render({'姓名': '张三'}) == '张三你好，明天开会'
+
+
+def test_fields_and_required_fields():
+    template = MessageTemplate('{{ 姓名 }}，{{时间|明天}}{{地点|}}见，{{姓名}}')
+    assert template.fields == ('姓名', '时间', '地点')
+    assert template.required == ('姓名',)
+    assert template.render({'姓名': '张三'}) == '张三，明天见，张三'
+    assert template.render({'姓名': '张三', '时间': '今天', '地点': '门口'}) == '张三，今天门口见，张三'
+
+
+def test_render_rejects_missing_field():
+    with pytest.raises(ValueError, match='缺少字段: 姓名'):
+        MessageTemplate('{{姓名}}你好').render({'姓名': None})
+
+
+def test_empty_template_and_recipients_are_rejected():
+    with pytest.raises(ValueError):
+        MessageTemplate('  ')
+    with pytest.raises(ValueError):
+        parse_recipients('contact,姓名\n')
+    with pytest.raises(ValueError):
+        parse_recipients([{'contact': 'A'}, 'B'])
+    with pytest.raises(ValueError):
+        parse_recipients({'contact': 'A'})
+
+
+def test_recipients_need_contact_and_fields():
+    template = MessageTemplate('{{姓名}}你好')
+    validate_recipients(template, parse_recipients('contact,姓名\nA,张三\nB,李四'))
+    validate_recipients(template, [{'联系人': 'A', '姓名': '张三'}])
+
+    with pytest.raises(ValueError, match='第 2 位收件人缺少联系人'):
+        validate_recipients(template, parse_recipients('contact,姓名\nA,张三\n,李四'))
+    with pytest.raises(ValueError, match='第 1 位收件人'):
+        validate_recipients(template, [{'contact': 'A'}])
+
+
+def test_rendered_messages_know_their_contact():
+    recipients = parse_recipients('contact,姓名\nA,张三\nB,李四')
+    messages = RenderedMessages(MessageTemplate('{{姓名}}你好'), recipients)
+    assert list(messages) == ['张三你好', '李四你好']
+    assert [messages.contact_at(i) for i in range(len(messages))] == ['A', 'B']
+
+
+def test_template_job_switches_to_each_recipient(web):
+    client = web.app.test_client()
+    response = client.post('/api/send', json={
+        'message_type': 'template', 'delay': 0, 'interval': 0,
+        'template': '{{姓名}}你好',
+        'recipients': 'contact,姓名\nA,张三\nA,王五\nB,李四',
+    }).get_json()
+    assert response['success'], response
+
+    wait_until(lambda: web.job_queue.get(response['job_id'])['state'] == web.JOB_DONE)
+
+    backend = web.sender.backend
+    assert backend.sent == [('A', '张三你好'), ('A', '王五你好'), ('B', '李四你好')]
+    assert backend.chat_switches == 2
+
+
+def test_template_without_contacts_is_rejected(web):
+    client = web.app.test_client()
+    response = client.post('/api/send', json={
+        'message_type': 'template', 'template': '{{姓名}}你好', 'recipients': '姓名\n张三',
+    }).get_json()
+    assert not response['success']
+    assert '联系人' in response['message']
+    assert web.job_queue.counts()[web.JOB_QUEUED] == 0
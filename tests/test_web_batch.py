@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""/api/send/batch: 每个任务发到自己的联系人"""
+
+from conftest import wait_until
+
+
+def test_two_contact_batch_switches_chats(web):
+    client = web.app.test_client()
+    response = client.post('/api/send/batch', json={
+        'defaults': {'delay': 0, 'interval': 0},
+        'jobs': [
+            {'contact': 'A', 'messages': ['a1', 'a2']},
+            {'contact': 'B', 'messages': ['b1']},
+        ],
+    }).get_json()
+    assert response['success'], response
+    job_ids = [job['job_id'] for job in response['jobs']]
+
+    wait_until(lambda: all(web.job_queue.get(job_id)['state'] == web.JOB_DONE for job_id in job_ids))
+
+    backend = web.sender.backend
+    assert backend.sent == [('A', 'a1'), ('A', 'a2'), ('B', 'b1')]
+    assert backend.chat_switches == 2
+
+
+def test_batch_is_rejected_as_a_whole(web):
+    client = web.app.test_client()
+    response = client.post('/api/send/batch', json={
+        'jobs': [{'contact': 'A', 'messages': ['a1']}, {'contact': 'B', 'messages': []}],
+    }).get_json()
+    assert not response['success']
+    assert [error['index'] for error in response['errors']] == [1]
+    assert web.job_queue.counts()[web.JOB_QUEUED] == 0
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""/api/import: 不定时的行合并为一个任务，逐条发到各自的联系人"""
+
+import io
+
+from conftest import wait_until
+
+
+def test_one_row_per_contact_is_sent_as_one_job(web):
+    client = web.app.test_client()
+    text = 'contact,message\nA,a1\nB,b1\nB,b2\nA,a2\n'
+    report = client.post('/api/import?format=csv&delay=0&interval=0',
+                         data=text.encode('utf-8'), content_type='text/csv').get_json()
+    assert report['success'], report
+    assert report['jobs'] == 1
+    job_id = report['submitted'][0]['job_id']
+
+    wait_until(lambda: web.job_queue.get(job_id)['state'] == web.JOB_DONE)
+
+    backend = web.sender.backend
+    assert backend.sent == [('A', 'a1'), ('B', 'b1'), ('B', 'b2'), ('A', 'a2')]
+    assert backend.chat_switches == 3
+
+
+def test_later_import_jobs_skip_the_countdown(web):
+    lines = ''.join(f'{{"contact": "c{i}", "message": "m{i}"}}\n' for i in range(3))
+    pending = []
+    submit = web.import_submitter({'delay': 3, 'interval': 0}, pending)
+    # 每个任务最多1条，拆成3个任务
+    web.import_stream(io.StringIO(lines), web.FORMAT_JSONL, submit, max_job_messages=1)
+    assert [job['options']['delay'] for job, _ in pending] == [3, 0, 0]
+    assert [job['contact'] for job, _ in pending] == ['c0', 'c1', 'c2']
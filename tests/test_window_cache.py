@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""QQ窗口缓存: 句柄被其他进程复用、窗口被移动或调整大小时重新查找"""
+
+import window_cache
+from fake_backend import FakeBackend
+from window_cache import WindowCache
+
+
+class FakeUser32:
+    def IsWindow(self, hwnd):
+        return True
+
+
+def test_cached_window_is_rejected_when_pid_changes(monkeypatch):
+    pids = {1: 100}
+    monkeypatch.setattr(window_cache, '_window_pid', lambda hwnd: pids[hwnd])
+    monkeypatch.setattr(window_cache, '_window_text', lambda hwnd: 'QQ')
+    cache = WindowCache('QQ', FakeBackend())
+    cache.user32 = FakeUser32()
+
+    assert cache.get() is not None
+    assert cache.pid == 100
+    assert cache.is_valid()
+
+    # QQ已关闭，其他进程的窗口拿到了同一个句柄
+    pids[1] = 200
+    assert not cache.is_valid()
+    cache.get()
+    assert cache.discover_count == 2
+    assert cache.pid == 200
+
+
+def test_cached_window_is_rejected_when_moved_or_resized(monkeypatch):
+    monkeypatch.setattr(window_cache, '_window_pid', lambda hwnd: 100)
+    monkeypatch.setattr(window_cache, '_window_text', lambda hwnd: 'QQ')
+    backend = FakeBackend()
+    cache = WindowCache('QQ', backend)
+    cache.user32 = FakeUser32()
+
+    assert cache.get() is backend.window
+    assert cache.geometry == (100, 100, 800, 600)
+    assert cache.is_valid()
+
+    backend.window.left = 300
+    assert not cache.is_valid()
+    cache.get()
+    assert cache.discover_count == 2
+    assert cache.geometry == (300, 100, 800, 600)
+    assert cache.is_valid()
+
+    backend.window.width = 1000
+    assert not cache.is_valid()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""后台输入的目标窗口: 只选QQ进程的窗口"""
+
+import window_message_backend
+from window_message_backend import WindowMessageBackend, choose_target
+
+DASHBOARD = (10, 'QQ消息发送器 - Windows版本 - Google Chrome', 'chrome.exe')
+QQ_MAIN = (20, 'QQ', 'qq.exe')
+
+
+def test_dashboard_above_qq_is_skipped():
+    # 浏览器中的控制台页面在QQ窗口上面
+    assert choose_target([DASHBOARD, QQ_MAIN], 'QQ') == 20
+
+
+def test_exact_title_preferred_over_higher_partial_match():
+    qq_mail = (15, 'QQ邮箱提醒', 'qq.exe')
+    assert choose_target([qq_mail, QQ_MAIN], 'QQ') == 20
+    assert choose_target([qq_mail], 'QQ') == 15
+
+
+def test_chat_window_by_contact_name():
+    chat = (30, '张三', 'qq.exe')
+    notes = (40, '给张三的备忘 - 记事本', 'notepad.exe')
+    assert choose_target([notes, QQ_MAIN, chat], '张三') == 30
+
+
+def test_no_qq_window():
+    assert choose_target([DASHBOARD, (50, 'QQ', None)], 'QQ') is None
+
+
+class FakeUser32:
+    def IsWindow(self, hwnd):
+        return True
+
+
+class Window:
+    def __init__(self, hwnd, title):
+        self._hWnd = hwnd
+        self.title = title
+
+
+def test_backend_targets_qq_not_the_dashboard(monkeypatch):
+    processes = {10: 'chrome.exe', 20: 'qq.exe'}
+    monkeypatch.setattr(window_message_backend, '_user32', FakeUser32())
+    monkeypatch.setattr(window_message_backend, '_process_name', lambda hwnd: processes[hwnd])
+    backend = WindowMessageBackend('QQ')
+    # find_windows按Z序返回，控制台页面在最上面
+    monkeypatch.setattr(backend, 'find_windows',
+                        lambda title: [Window(10, 'QQ消息发送器 - Windows版本'), Window(20, 'QQ')])
+    assert backend.target() == 20
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通过UI Automation聚焦QQ消息输入框
+每个QQ窗口只查找一次输入框控件并缓存引用，之后直接设置焦点，不再用Tab键逐个切换；
+缓存的控件失效（已销毁、不可见）时重新查找，找不到时由调用方退回按键方式
+需要Windows和pywinauto（requirements_windows.txt），第一次使用时才导入
+"""
+
+import platform
+from typing import Dict, Optional
+
+from input_backend import InputBackend, PyAutoGUIBackend, get_backend
+
+# 消息输入框的控件类型
+INPUT_CONTROL_TYPE = 'Edit'
+
+
+class UIAFocus:
+    def __init__(self, backend: Optional[InputBackend] = None, desktop=None):
+        """
+        Args:
+            backend: 输入后端，只有真实的pyautogui后端才使用UI Automation
+            desktop: pywinauto的Desktop(backend="uia")对象，默认第一次使用时创建
+        """
+        self.backend = backend or get_backend()
+        self._desktop = desktop
+        if desktop is None:
+            self.enabled = platform.system() == "Windows" and isinstance(self.backend, PyAutoGUIBackend)
+        else:
+            self.enabled = True
+        # 窗口句柄 -> 输入框控件
+        self.controls: Dict[int, object] = {}
+        # 查找控件的次数，用于观察缓存命中情况
+        self.locate_count = 0
+
+    def available(self) -> bool:
+        """UI Automation是否可用（pywinauto未安装或初始化失败时不可用）"""
+        if not self.enabled:
+            return False
+        if self._desktop is None:
+            try:
+                from pywinauto import Desktop
+                self._desktop = Desktop(backend="uia")
+            except Exception as e:
+                print(f"UI Automation不可用，使用按键方式选中输入框: {e}")
+                self.enabled = False
+                return False
+        return True
+
+    def focus(self, hwnd: Optional[int]) -> bool:
+        """
+        聚焦窗口中的消息输入框
+        返回: 是否成功（失败时调用方应退回按键方式）
+        """
+        if not hwnd or not self.available():
+            return False
+
+        control = self.controls.get(hwnd)
+        if control is not None and self._usable(control):
+            try:
+                control.set_focus()
+                return True
+            except Exception:
+                pass
+
+        # 缓存无效，重新查找
+        self.invalidate(hwnd)
+        control = self.locate(hwnd)
+        if control is None:
+            return False
+        try:
+            control.set_focus()
+        except Exception:
+            return False
+        self.controls[hwnd] = control
+        return True
+
+    def locate(self, hwnd: int):
+        """查找窗口中的消息输入框: 可见、可编辑的Edit控件中位置最靠下的一个（搜索框在上方）"""
+        self.locate_count += 1
+        try:
+            window = self._desktop.window(handle=hwnd).wrapper_object()
+            candidates = window.descendants(control_type=INPUT_CONTROL_TYPE)
+        except Exception:
+            return None
+
+        best, best_bottom = None, None
+        for control in candidates:
+            if not self._usable(control) or self._read_only(control):
+                continue
+            bottom = control.rectangle().bottom
+            if best_bottom is None or bottom > best_bottom:
+                best, best_bottom = control, bottom
+        return best
+
+    def invalidate(self, hwnd: Optional[int] = None):
+        """清空某个窗口（默认所有窗口）的缓存"""
+        if hwnd is None:
+            self.controls.clear()
+        else:
+            self.controls.pop(hwnd, None)
+
+    @staticmethod
+    def _usable(control) -> bool:
+        """控件是否仍存在、可见且可用"""
+        try:
+            rect = control.rectangle()
+            return (control.is_visible() and control.is_enabled()
+                    and rect.width() > 0 and rect.height() > 0)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _read_only(control) -> bool:
+        """控件是否只读（聊天记录等），不支持ValuePattern时视为可编辑"""
+        try:
+            return bool(control.iface_value.CurrentIsReadOnly)
+        except Exception:
+            return False
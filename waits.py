@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+就绪等待工具
+轮询具体条件（前台窗口是QQ、屏幕区域变化、输入框已清空）代替固定的time.sleep，
+没有可用探测条件时才退回到固定延迟
+"""
+
+import time
+from typing import Callable, Optional
+
+from cancellation import CancelToken
+from input_backend import InputBackend, Region, get_backend
+
+# PIL只在第一次截图比较时导入，不拖慢程序启动
+_image_chops = None
+
+
+def _load_image_chops():
+    """导入PIL.ImageChops，未安装时返回None"""
+    global _image_chops
+    if _image_chops is None:
+        try:
+            from PIL import ImageChops
+        except ImportError:
+            ImageChops = False
+        _image_chops = ImageChops
+    return _image_chops or None
+
+# 探测函数: 返回True表示条件已满足
+Probe = Callable[[], bool]
+
+# 灰度差超过该值的像素视为发生变化
+PIXEL_TOLERANCE = 16
+# 变化像素数超过该值才认为区域发生了变化（忽略闪烁的光标）
+CHANGED_PIXELS_THRESHOLD = 30
+
+
+class Waiter:
+    def __init__(self, backend: Optional[InputBackend] = None, poll_interval: float = 0.05,
+                 enabled: bool = True, cancel: Optional[CancelToken] = None):
+        """
+        初始化等待器
+
+        Args:
+            backend: 输入后端，用于获取前台窗口和截图，默认使用pyautogui
+            poll_interval: 轮询间隔（秒）
+            enabled: 是否启用探测，关闭后所有等待都使用固定延迟
+            cancel: 取消令牌，取消后所有等待立即结束
+        """
+        self.backend = backend or get_backend()
+        self.poll_interval = poll_interval
+        self.enabled = enabled
+        self.cancel = cancel
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        固定延迟，取消时立即结束
+        返回: 是否已取消
+        """
+        if self.cancel is not None:
+            return self.cancel.wait(seconds)
+        if seconds > 0:
+            time.sleep(seconds)
+        return False
+
+    def wait_for(self, probe: Optional[Probe], timeout: float, fallback: float) -> bool:
+        """
+        等待条件满足
+
+        Args:
+            probe: 探测函数，为None时直接使用固定延迟
+            timeout: 最长等待时间（秒）
+            fallback: 没有探测函数或探测出错时的固定延迟（秒）
+        返回: 条件是否满足（使用固定延迟时视为满足）
+        """
+        if probe is None or not self.enabled:
+            self.sleep(fallback)
+            return True
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if probe():
+                    return True
+            except Exception:
+                # 探测失败，退回固定延迟
+                self.sleep(fallback)
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self.sleep(min(self.poll_interval, remaining)):
+                return False
+
+    def foreground_probe(self, keyword: str = "QQ") -> Optional[Probe]:
+        """
+        前台窗口标题包含关键字的探测函数
+        平台不支持获取前台窗口时返回None
+        """
+        if self.backend.get_active_window() is None:
+            return None
+
+        def probe():
+            window = self.backend.get_active_window()
+            return window is not None and keyword in (window.title or "")
+
+        return probe
+
+    def window_region(self, window=None) -> Optional[Region]:
+        """获取窗口所在的屏幕区域，默认使用前台窗口"""
+        if window is None:
+            window = self.backend.get_active_window()
+        if window is None or window.width <= 0 or window.height <= 0:
+            return None
+        return (window.left, window.top, window.width, window.height)
+
+    def input_box_region(self, window=None) -> Optional[Region]:
+        """
+        估算聊天窗口输入框所在的区域
+        QQ聊天窗口的输入框位于窗口底部，去掉工具栏和发送按钮所在的行
+        """
+        region = self.window_region(window)
+        if region is None:
+            return None
+        left, top, width, height = region
+        box_top = top + int(height * 0.78)
+        box_height = max(1, int(height * 0.15))
+        return (left + 10, box_top, max(1, width - 20), box_height)
+
+    def capture_region(self, region: Optional[Region]):
+        """截取屏幕区域，失败时返回None"""
+        if region is None or _load_image_chops() is None:
+            return None
+        try:
+            return self.backend.screenshot(region)
+        except Exception:
+            return None
+
+    def region_changed_probe(self, region: Optional[Region], baseline=None) -> Optional[Probe]:
+        """
+        屏幕区域发生变化的探测函数
+        以baseline（默认为调用时的截图）为基准，无法截图时返回None
+        """
+        if baseline is None:
+            baseline = self.capture_region(region)
+        if baseline is None:
+            return None
+
+        def probe():
+            current = self.capture_region(region)
+            return current is not None and changed_pixels(baseline, current) > CHANGED_PIXELS_THRESHOLD
+
+        return probe
+
+    def region_restored_probe(self, region: Optional[Region], reference) -> Optional[Probe]:
+        """
+        屏幕区域恢复为参考截图的探测函数（如回车后输入框已清空）
+        没有参考截图时返回None
+        """
+        if reference is None:
+            return None
+
+        def probe():
+            current = self.capture_region(region)
+            return current is not None and changed_pixels(reference, current) <= CHANGED_PIXELS_THRESHOLD
+
+        return probe
+
+
+def changed_pixels(first, second) -> int:
+    """统计两张截图中发生变化的像素数"""
+    if first.size != second.size:
+        return first.size[0] * first.size[1]
+    diff = _load_image_chops().difference(first.convert('L'), second.convert('L'))
+    return diff.point(lambda v: 255 if v > PIXEL_TOLERANCE else 0).histogram()[255]
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+QQ窗口查找缓存
+记住找到的QQ窗口（句柄、进程ID、标题、位置大小），复用前只做低成本的有效性检查，
+窗口被关闭、句柄被其他进程的窗口复用、标题变化或被移动、调整大小时才重新枚举所有窗口
+"""
+
+import ctypes
+import platform
+from typing import Optional, Tuple
+
+from input_backend import InputBackend, PyAutoGUIBackend, get_backend
+
+# Windows下直接调用user32检查窗口句柄，避免枚举所有顶层窗口
+if platform.system() == "Windows":
+    _user32 = ctypes.windll.user32
+else:
+    _user32 = None
+
+# 窗口位置大小: (left, top, width, height)
+Geometry = Tuple[int, int, int, int]
+
+
+def _window_text(hwnd: int) -> str:
+    """读取窗口标题"""
+    length = _user32.GetWindowTextLengthW(hwnd)
+    buffer = ctypes.create_unicode_buffer(length + 1)
+    _user32.GetWindowTextW(hwnd, buffer, length + 1)
+    return buffer.value
+
+
+def _window_pid(hwnd: int) -> Optional[int]:
+    """读取窗口所属进程ID"""
+    pid = ctypes.c_ulong()
+    _user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+    return pid.value or None
+
+
+class WindowCache:
+    def __init__(self, keyword: str = "QQ", backend: Optional[InputBackend] = None):
+        """
+        初始化窗口缓存
+
+        Args:
+            keyword: 窗口标题关键字
+            backend: 输入后端，默认使用pyautogui
+        """
+        self.keyword = keyword
+        self.backend = backend or get_backend()
+        # 只有真实窗口才能用user32按句柄检查
+        self.user32 = _user32 if isinstance(self.backend, PyAutoGUIBackend) else None
+        self.window = None
+        self.hwnd = None
+        self.pid = None
+        self.title = None
+        self.geometry = None
+        # 枚举窗口的次数，用于观察缓存命中情况
+        self.discover_count = 0
+
+    def get(self):
+        """
+        获取QQ窗口，缓存有效时直接返回
+        返回: 窗口对象，找不到时返回None
+        """
+        if self.window is not None and self.is_valid():
+            return self.window
+        return self.discover()
+
+    def discover(self):
+        """重新枚举窗口并更新缓存"""
+        self.invalidate()
+        self.discover_count += 1
+
+        qq_windows = self.backend.find_windows(self.keyword)
+        if not qq_windows:
+            return None
+
+        window = qq_windows[0]
+        self.window = window
+        self.hwnd = getattr(window, '_hWnd', None)
+        self.title = window.title
+        self.pid = _window_pid(self.hwnd) if self.user32 is not None and self.hwnd else None
+        self.geometry = self._read_geometry()
+        return window
+
+    def invalidate(self):
+        """清空缓存"""
+        self.window = None
+        self.hwnd = None
+        self.pid = None
+        self.title = None
+        self.geometry = None
+
+    def is_valid(self) -> bool:
+        """
+        检查缓存的窗口是否仍然存在、仍属于同一进程、标题和位置大小都未变化
+        窗口被移动或调整大小后，按窗口位置计算的输入框等坐标不再准确，视为失效
+        """
+        try:
+            if self.user32 is not None and self.hwnd:
+                if not self.user32.IsWindow(self.hwnd):
+                    return False
+                # 窗口关闭后句柄可能被其他进程的新窗口复用
+                if _window_pid(self.hwnd) != self.pid:
+                    return False
+                title = _window_text(self.hwnd)
+            else:
+                title = self.window.title
+        except Exception:
+            return False
+        return title == self.title and self._read_geometry() == self.geometry
+
+    def is_foreground(self) -> bool:
+        """缓存的窗口是否已是前台窗口"""
+        if self.user32 is None or not self.hwnd:
+            return self.window is not None and self.backend.get_active_window() is self.window
+        return self.user32.GetForegroundWindow() == self.hwnd
+
+    def _read_geometry(self) -> Optional[Geometry]:
+        """读取窗口当前的位置大小，读取失败时返回None"""
+        if self.window is None:
+            return None
+        try:
+            return (self.window.left, self.window.top, self.window.width, self.window.height)
+        except Exception:
+            return None
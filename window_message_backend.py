@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台窗口消息输入后端（仅Windows）
+不模拟键盘，而是用PostMessage把文字（WM_CHAR）和回车（WM_KEYDOWN/WM_KEYUP）直接投递到QQ聊天窗口，
+QQ窗口在后台时也能发送，不需要倒计时让用户切换窗口，发送期间电脑可以正常使用。
+投递的消息按顺序进入QQ的消息队列；文字逐个字符投递，中文也能直接输入，不使用剪贴板。
+目标窗口只在QQ进程的窗口中选择，标题同样含有"QQ"的其他窗口（如本程序的网页）不会收到输入
+"""
+
+import ctypes
+import platform
+import os
+import time
+from ctypes import wintypes
+from typing import List, Optional, Sequence, Tuple
+
+from input_backend import InputBackend, Region
+
+if platform.system() == "Windows":
+    _user32 = ctypes.windll.user32
+    _kernel32 = ctypes.windll.kernel32
+else:
+    _user32 = None
+    _kernel32 = None
+
+WM_KEYDOWN = 0x0100
+WM_KEYUP = 0x0101
+WM_CHAR = 0x0102
+
+# 按键名称 -> 虚拟键码
+VIRTUAL_KEYS = {
+    'enter': 0x0D, 'return': 0x0D, 'tab': 0x09, 'backspace': 0x08,
+    'esc': 0x1B, 'escape': 0x1B, 'space': 0x20,
+    'end': 0x23, 'home': 0x24, 'left': 0x25, 'up': 0x26, 'right': 0x27, 'down': 0x28,
+    'delete': 0x2E,
+}
+
+# QQ的进程名（小写），只向这些进程的窗口投递
+QQ_PROCESS_NAMES = ('qq.exe', 'tim.exe')
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+# 消息队列已满时重试投递的次数和间隔（秒）
+POST_RETRIES = 50
+POST_RETRY_DELAY = 0.01
+
+
+class _GUIThreadInfo(ctypes.Structure):
+    _fields_ = [
+        ('cbSize', wintypes.DWORD),
+        ('flags', wintypes.DWORD),
+        ('hwndActive', wintypes.HWND),
+        ('hwndFocus', wintypes.HWND),
+        ('hwndCapture', wintypes.HWND),
+        ('hwndMenuOwner', wintypes.HWND),
+        ('hwndMoveSize', wintypes.HWND),
+        ('hwndCaret', wintypes.HWND),
+        ('rcCaret', wintypes.RECT),
+    ]
+
+
+def _window_text(hwnd: int) -> str:
+    length = _user32.GetWindowTextLengthW(hwnd)
+    buffer = ctypes.create_unicode_buffer(length + 1)
+    _user32.GetWindowTextW(hwnd, buffer, length + 1)
+    return buffer.value
+
+
+def _process_name(hwnd: int) -> Optional[str]:
+    """窗口所属进程的可执行文件名（小写），无法读取时返回None"""
+    pid = wintypes.DWORD()
+    _user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+    process = _kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+    if not process:
+        return None
+    try:
+        buffer = ctypes.create_unicode_buffer(260)
+        size = wintypes.DWORD(len(buffer))
+        if not _kernel32.QueryFullProcessImageNameW(process, 0, buffer, ctypes.byref(size)):
+            return None
+        return os.path.basename(buffer.value).lower()
+    finally:
+        _kernel32.CloseHandle(process)
+
+
+def choose_target(windows: Sequence[Tuple[int, str, Optional[str]]], keyword: str,
+                  process_names: Sequence[str] = QQ_PROCESS_NAMES) -> Optional[int]:
+    """
+    选出目标窗口
+    windows: 按Z序（从上到下）排列的(句柄, 标题, 进程名)
+    只考虑QQ进程中标题包含关键字的窗口，标题与关键字完全相同的优先，其次为最上层的一个
+    返回: 窗口句柄，没有时返回None
+    """
+    matches = [(hwnd, title) for hwnd, title, process in windows
+               if keyword in title and process in process_names]
+    for hwnd, title in matches:
+        if title == keyword:
+            return hwnd
+    return matches[0][0] if matches else None
+
+
+class MessageWindow:
+    """按句柄访问的窗口，属性与pyautogui的窗口对象一致"""
+
+    def __init__(self, hwnd: int):
+        self._hWnd = hwnd
+
+    @property
+    def title(self) -> str:
+        return _window_text(self._hWnd)
+
+    def _rect(self):
+        rect = wintypes.RECT()
+        _user32.GetWindowRect(self._hWnd, ctypes.byref(rect))
+        return rect
+
+    @property
+    def left(self) -> int:
+        return self._rect().left
+
+    @property
+    def top(self) -> int:
+        return self._rect().top
+
+    @property
+    def width(self) -> int:
+        rect = self._rect()
+        return rect.right - rect.left
+
+    @property
+    def height(self) -> int:
+        rect = self._rect()
+        return rect.bottom - rect.top
+
+    @property
+    def isActive(self) -> bool:
+        return _user32.GetForegroundWindow() == self._hWnd
+
+    def activate(self):
+        _user32.SetForegroundWindow(self._hWnd)
+
+
+class WindowMessageBackend(InputBackend):
+    """向QQ窗口投递窗口消息的后台输入后端"""
+
+    background = True
+
+    def __init__(self, keyword: str = "QQ"):
+        """
+        Args:
+            keyword: 目标窗口标题关键字（QQ进程中标题等于或包含关键字的可见窗口）
+        """
+        if _user32 is None:
+            raise RuntimeError("后台窗口消息输入只支持Windows")
+        self.keyword = keyword
+        self.failsafe = True
+        self.pause = 0.0
+        self.hwnd = None
+
+    def configure(self, failsafe: bool = True, pause: float = 0.5):
+        # 投递窗口消息不需要每次操作后停顿，只记录设置
+        self.failsafe = failsafe
+        self.pause = pause
+
+    def target(self) -> int:
+        """目标窗口句柄，窗口已关闭时重新查找"""
+        if self.hwnd is None or not _user32.IsWindow(self.hwnd):
+            windows = [(window._hWnd, window.title, _process_name(window._hWnd))
+                       for window in self.find_windows(self.keyword)]
+            self.hwnd = choose_target(windows, self.keyword)
+            if self.hwnd is None:
+                raise RuntimeError(f"找不到标题包含 {self.keyword} 的QQ窗口")
+        return self.hwnd
+
+    def _focus_target(self) -> int:
+        """
+        接收键盘消息的窗口: QQ窗口线程中拥有焦点的子窗口（如新版QQ的网页渲染窗口），
+        没有时为QQ窗口本身；窗口在后台时线程的焦点窗口同样有效
+        """
+        hwnd = self.target()
+        info = _GUIThreadInfo()
+        info.cbSize = ctypes.sizeof(_GUIThreadInfo)
+        thread_id = _user32.GetWindowThreadProcessId(hwnd, None)
+        if _user32.GetGUIThreadInfo(thread_id, ctypes.byref(info)):
+            focus = info.hwndFocus
+            if focus and (focus == hwnd or _user32.IsChild(hwnd, focus)):
+                return focus
+        return hwnd
+
+    def _post(self, hwnd: int, message: int, wparam: int, lparam: int):
+        for _ in range(POST_RETRIES):
+            if _user32.PostMessageW(hwnd, message, wparam, lparam):
+                return
+            # 目标线程的消息队列已满，稍后重试
+            time.sleep(POST_RETRY_DELAY)
+        raise ctypes.WinError()
+
+    def _key(self, hwnd: int, vk: int):
+        scan = _user32.MapVirtualKeyW(vk, 0)
+        self._post(hwnd, WM_KEYDOWN, vk, 1 | (scan << 16))
+        self._post(hwnd, WM_KEYUP, vk, 1 | (scan << 16) | 0xC0000000)
+
+    def press(self, key: str):
+        vk = VIRTUAL_KEYS.get(key.lower())
+        if vk is None and len(key) == 1 and key.isalnum():
+            vk = ord(key.upper())
+        if vk is None:
+            raise ValueError(f"后台输入不支持按键: {key}")
+        self._key(self._focus_target(), vk)
+
+    def hotkey(self, *keys: str):
+        # 投递的消息不改变键盘状态，QQ看不到按下的Ctrl/Shift
+        raise NotImplementedError("后台输入不支持组合键")
+
+    def write(self, text: str, pause: bool = True):
+        hwnd = self._focus_target()
+        data = text.encode('utf-16-le')
+        # 按UTF-16编码单元投递，超出基本平面的字符（如表情）为两个代理项
+        for i in range(0, len(data), 2):
+            self._post(hwnd, WM_CHAR, int.from_bytes(data[i:i + 2], 'little'), 1)
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None):
+        raise NotImplementedError("后台输入不支持鼠标点击")
+
+    def clipboard_available(self) -> bool:
+        # 粘贴需要Ctrl+V组合键，后台输入始终逐字输入
+        return False
+
+    def paste(self, text: str, restore_clipboard: bool = True, restore_delay: float = 0.1):
+        raise NotImplementedError("后台输入不支持粘贴")
+
+    def copy(self, text: str):
+        raise NotImplementedError("后台输入不支持剪贴板")
+
+    def read_clipboard(self) -> Optional[str]:
+        return None
+
+    def press_paste(self):
+        raise NotImplementedError("后台输入不支持粘贴")
+
+    def find_windows(self, title: str) -> List:
+        windows = []
+
+        @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        def callback(hwnd, _):
+            if _user32.IsWindowVisible(hwnd) and title in _window_text(hwnd):
+                windows.append(MessageWindow(hwnd))
+            return True
+
+        _user32.EnumWindows(callback, 0)
+        return windows
+
+    def get_active_window(self):
+        """输入直接投递到目标窗口，目标窗口视为前台窗口（找不到时返回None）"""
+        try:
+            return MessageWindow(self.target())
+        except RuntimeError:
+            return None
+
+    def activate_window(self, window):
+        # 不需要切换到前台，只把它作为之后的输入目标
+        self.hwnd = window._hWnd
+
+    def screenshot(self, region: Optional[Region] = None):
+        # 后台窗口可能被遮挡，屏幕截图不能反映它的状态
+        return None
+
+    def locate(self, needle, haystack, confidence: Optional[float] = None) -> Optional[Region]:
+        return None